@@ -31,7 +31,10 @@ setuptools.setup(
         "Operating System :: POSIX :: Linux",
     ],
     install_requires=[
-    'z3-solver'],
+    'z3-solver',
+    'numpy'],
+    extras_require={
+    'pysat': ['python-sat']},
     packages=setuptools.find_packages(),
     python_requires='>=3.6',
     entry_points={
@@ -42,7 +45,10 @@ setuptools.setup(
             'crTRAPFabricBuilder = src.crTRAPFabricBuilder_cli:main',
             'lutCRFabricBuilder = src.lutCRFabricBuilder_cli:main',
             'abcAttack = src.abcAttack_cli:main',
-            'stateLocate = src.stateLocate_cli:main'
+            'batchRun = src.batchRun_cli:main',
+            'benchmark = src.benchmark_cli:main',
+            'stateLocate = src.stateLocate_cli:main',
+            'synthGen = src.synthGen_cli:main'
         ]
     }
 )
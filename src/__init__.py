@@ -3,9 +3,12 @@
 # 'method' is a function present in a file called 'file.py'
 
 from .abcAttack import abcAttack
+from .batchRun import batchRun
+from .benchmark import benchmark
 from .crTRAPFabricBuilder import crTRAPFabricBuilder
 from .lutCRFabricBuilder import lutCRFabricBuilder
 from .satAttack import satAttack
 from .satVerify import satVerify
 from .stateLocate import stateLocate
+from .synthGen import synthGen
 from .trapFabricBuilder import trapFabricBuilder
\ No newline at end of file
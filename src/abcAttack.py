@@ -14,6 +14,11 @@ import glob
 import subprocess
 import datetime
 from typing import Tuple
+from .oracle import VerilogOracle,buildPyOracle,gatesToPL
+from .oracleCache import openOracleCache,cacheName,sharedCacheFile
+from .plCircuit import PLCircuit
+from .plReader import readZ3pl
+from .dipSet import DIPSet
 
 # ----------------
 # GLOBALS
@@ -371,24 +376,41 @@ def runiVerilog(cktIn:dict,trgtNetlist:str,topLevelMod:str,inList:list,outList:l
     return cktOut
 
 
-def runPyOracle(oracleIns:dict,oracleFile:str) -> dict:
+def runPyOracle(oracleIns:dict,oracleFile:str,inList:list,outList:list) -> dict:
     '''
-    Run Python oracle script.
+    Run Python oracle script. The oracle file must describe the unencrypted circuit functionally in
+    Z3-PL, with every net defined by an equality clause. Returns oracle outputs as a dict.
 
-    There's nothing here yet!
+    For many queries, build a PyOracle once instead, so the circuit is only compiled one time.
     '''
-    raise RuntimeError('Whoops, using a Python oracle is not currently supported. Use a Verilog one instead.')
+    oracle = buildPyOracle(PLCircuit(*readZ3pl(oracleFile),name=oracleFile),inList,outList)
+    return oracle.query({k: v == '1' for k,v in oracleIns.items() if k in inList})
 
 
-def queryOracle(oracleFile:str,topLevelMod:str,vars:dict,queryVals:dict,trgtTb='',simOutFile='',oracleSel=False) -> dict:
+def queryOracle(oracleFile:str,topLevelMod:str,vars:dict,queryVals:dict,trgtTb='',simOutFile='',oracleSel=False,oracle=None,cache=None) -> dict:
     '''
     Function for selecting desired oracle query method. Returns oracle outputs as a dict.
 
     oracleIns   - Values for inputs to query oracle with.
     topLevelMod - Name of top level mod in Verilog file. Necessary only if oracleSel = False.
     oracleSel   - If true, indicates that oracleFile is a Python file instead of a Verilog file.
+    oracle      - Running oracle object (e.g. VerilogOracle). If provided, it answers the query
+                    and all other oracle arguments are ignored.
+    cache       - OracleCache consulted before the oracle is queried. New responses are added to it
     '''
-    vars,gates,name = readVerilog(oracleFile)
+    if cache is not None:
+        oracleOut = cache.lookup({k: v == '1' for k,v in queryVals.items()})
+        if oracleOut is not None:
+            return oracleOut
+
+    if oracle is not None:
+        oracleOut = oracle.query({k: v == '1' for k,v in queryVals.items() if k in oracle.inList})
+        if cache is not None:
+            cache.store({k: v == '1' for k,v in queryVals.items()},oracleOut)
+        return oracleOut
+
+    if not oracleSel:
+        vars,gates,name = readVerilog(oracleFile)
     inVars = [x for x in vars if vars[x] == 'input']
     outVars = [x for x in vars if vars[x] == 'output']
     if not oracleSel and trgtTb != '' and simOutFile != '':
@@ -397,8 +419,10 @@ def queryOracle(oracleFile:str,topLevelMod:str,vars:dict,queryVals:dict,trgtTb='
     elif not oracleSel:
         raise RuntimeError('Missing arguments for using an iVerilog oracle testbench.')
     else:
-        oracleOut = runPyOracle()
+        oracleOut = runPyOracle(queryVals,oracleFile,inVars,outVars)
 
+    if cache is not None:
+        cache.store({k: v == '1' for k,v in queryVals.items()},oracleOut)
     return oracleOut
 
 
@@ -537,7 +561,7 @@ def initKeySolveHalves(vars:dict,gateDefs:list,dipsList:list,oracleOutList:list,
 # ----------------
 # MAIN
 # ----------------
-def abcAttack(encV,orcV,fresh,fraig):
+def abcAttack(encV,orcV,fresh,fraig,recompileOracle=False,pythonOracle=False,oracleCache=True,sharedOracleCache=False):
     '''
     Runs a SAT attack on some gate-level Verilog for a locked circuit, against 
     an oracle unlocked Verilog circuit.
@@ -558,42 +582,70 @@ def abcAttack(encV,orcV,fresh,fraig):
 
     # Read I/O
     vars,gates,modName = readVerilog(encV)
-    orcVars,orcGates,orcName = readVerilog(orcV)
+    if pythonOracle and orcV.endswith('.py'):   # Z3-PL oracle shares the locked circuit's I/O names
+        orcVars,orcName = {k:v for k,v in vars.items() if v in ('input','output')},None
+    else:
+        orcVars,orcGates,orcName = readVerilog(orcV)
     ins = [x for x in vars if vars[x] == 'input']
     keys = [x for x in vars if vars[x] == 'key']
 
-    # Create two copies of locked circuit, freezing inputs, outputs, internal nets. Must create double keys and provide to both (dumb I know)
-    miterFile1,miterFile2,miterVars = initMiterHalves(vars,gates,miterModName,workDir)
+    # The oracle simulator and the oracle cache are released however the attack ends
+    oracle = None
+    cache = None
+    try:
+        # Compile the oracle once and keep it for the whole attack
+        orcIns = [x for x in orcVars if orcVars[x] == 'input']
+        orcOuts = [x for x in orcVars if orcVars[x] == 'output']
+        if pythonOracle and orcV.endswith('.py'):
+            oracle = buildPyOracle(PLCircuit(*readZ3pl(orcV),name=orcV),orcIns,orcOuts)
+        elif pythonOracle:      # Gate-level Verilog oracle, simulated in-process instead of with iVerilog
+            oracle = buildPyOracle(PLCircuit(*gatesToPL(orcVars,orcGates),name=orcV),orcIns,orcOuts)
+        elif not recompileOracle:
+            oracle = VerilogOracle(orcV,orcName,orcIns,orcOuts,os.path.join(here,workDir))
+
+        # Responses from previous runs against the same oracle are reused from the on-disk cache
+        if oracleCache:
+            cache = openOracleCache(orcV,orcName,orcIns,orcOuts,sharedCacheFile if sharedOracleCache else os.path.join(here,workDir)+cacheName)
+
+        # Create two copies of locked circuit, freezing inputs, outputs, internal nets. Must create double keys and provide to both (dumb I know)
+        miterFile1,miterFile2,miterVars = initMiterHalves(vars,gates,miterModName,workDir)
     
-    iters = 1
-    dipsList = []
-    oracleOutList = []
-    print(f'\nRunning SAT on Miter clauses, round #{iters}.')
-    sat,valAssigns = runBerkSAT(miterFile1,miterFile2,workDir,miterVars)
-
-    while(sat):
-        dip = dict([(k,v) for k,v in valAssigns.items() if k in ins])
-        logging.info(f'Miter circuit SATISFIED at round #{iters}. Extracted DIP: {dip}')
-        print(f'Miter circuit SATISFIED at round #{iters}. Extracted DIP: {dip}')
-        if dip in dipsList:
-            logging.debug(f'The attack has revisited DIP {dip} in round {iters}. This is the first revisited DIP. The attack has not been formulated properly, and will now terminate early. Check the miter circuit.')
-            raise RuntimeError('DIP revisited - please check input files')
-        dipsList.append(dip)
-
-        # Feed ABC results to iVerilog
-        oracleOut = queryOracle(orcV,orcName,orcVars,valAssigns,trgtTb=tb,simOutFile=tbOutputFile)
-        print(f'\nOracle queried for round #{iters} DIP. Oracle response: {oracleOut}')
-        oracleOutList.append(oracleOut)
-
-        # Append circuit copies to two copies of circuit files
-        miterFile1,miterFile2 = appendMiter(vars,gates,dip,oracleOut,(miterFile1,miterFile2),iters,miterModName,workDir)
-
-        iters += 1
+        iters = 1
+        dipsList = []
+        dipSet = DIPSet(ins)
+        oracleOutList = []
         print(f'\nRunning SAT on Miter clauses, round #{iters}.')
-        sat,valAssigns = runBerkSAT(miterFile1,miterFile2,workDir,miterVars,fraig=fraig)
-
-    logging.info(f'Miter circuit UNSATISFIED at round #{iters}.')
-    print(f'Miter circuit UNSATISFIED at round #{iters}.')
+        sat,valAssigns = runBerkSAT(miterFile1,miterFile2,workDir,miterVars)
+
+        while(sat):
+            dip = dict([(k,v) for k,v in valAssigns.items() if k in ins])
+            logging.info(f'Miter circuit SATISFIED at round #{iters}. Extracted DIP: {dip}')
+            print(f'Miter circuit SATISFIED at round #{iters}. Extracted DIP: {dip}')
+            pastIndex = dipSet.add(dip)
+            if pastIndex is not None:
+                logging.debug(f'The attack has revisited DIP {dip} in round {iters}. This DIP was first explored as DIP #{pastIndex+1}. This is the first revisited DIP. The attack has not been formulated properly, and will now terminate early. Check the miter circuit.')
+                raise RuntimeError('DIP revisited - please check input files')
+            dipsList.append(dip)
+
+            # Feed ABC results to iVerilog
+            oracleOut = queryOracle(orcV,orcName,orcVars,valAssigns,trgtTb=tb,simOutFile=tbOutputFile,oracleSel=pythonOracle,oracle=oracle,cache=cache)
+            print(f'\nOracle queried for round #{iters} DIP. Oracle response: {oracleOut}')
+            oracleOutList.append(oracleOut)
+
+            # Append circuit copies to two copies of circuit files
+            miterFile1,miterFile2 = appendMiter(vars,gates,dip,oracleOut,(miterFile1,miterFile2),iters,miterModName,workDir)
+
+            iters += 1
+            print(f'\nRunning SAT on Miter clauses, round #{iters}.')
+            sat,valAssigns = runBerkSAT(miterFile1,miterFile2,workDir,miterVars,fraig=fraig)
+
+        logging.info(f'Miter circuit UNSATISFIED at round #{iters}.')
+        print(f'Miter circuit UNSATISFIED at round #{iters}.')
+    finally:
+        if oracle is not None:
+            oracle.close()
+        if cache is not None:
+            cache.close()
     print('\nProceeding to key solve step...')
 
     # SAT solve step - create a bunch of circuit copies in Verilog, send the to ABC to be turned into CNF, then call MiniSAT on the CNF
@@ -613,8 +665,12 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(prog='abcAttack',description='A SAT attack script built around MiniSAT, iVerilog, and the verification capabilities of ABC')
     parser.add_argument('encVerilog',type=str,help='Path to Verilog file describing encrypted circuit')
     parser.add_argument('orcVerilog',type=str,help='Path to Verilog file describing unencrypted circuit (oracle)')
+    parser.add_argument('-c','--recompileOracle',default=False,action='store_true',help='Regenerate the testbench and recompile the Verilog oracle for every query, instead of compiling it once and streaming queries to a running simulator')
     parser.add_argument('-f','--fresh',default=False,action='store_true',help='Creates fresh working and log directories upon calling this script')
     parser.add_argument('-g','--fraig',default=True,action='store_false',help='Disable fraiging capabilities of ABC solver (on by default)')
+    parser.add_argument('-n','--noOracleCache',default=True,action='store_false',dest='oracleCache',help='Disable the on-disk cache of oracle responses, so every query is simulated. By default, responses are kept in work/oracleCache.sqlite and reused by later runs in the same directory against the same oracle file')
+    parser.add_argument('-p','--pythonOracle',default=False,action='store_true',help='Compile the oracle once and evaluate it in-process instead of with iVerilog. orcVerilog may be a gate-level Verilog file or a functional Z3-PL (.py) file, whose input/output names must coincide with the encrypted circuit')
+    parser.add_argument('-s','--sharedOracleCache',default=False,action='store_true',help='Keep the oracle response cache in $XDG_CACHE_HOME/transat/ (~/.cache/transat/ if unset) instead of the work/ directory, so it is shared by runs in every directory')
     clArgs= parser.parse_args()
 
-    abcAttack(clArgs.encVerilog,clArgs.orcVerilog,clArgs.fresh,clArgs.fraig)
+    abcAttack(clArgs.encVerilog,clArgs.orcVerilog,clArgs.fresh,clArgs.fraig,clArgs.recompileOracle,clArgs.pythonOracle,clArgs.oracleCache,clArgs.sharedOracleCache)
@@ -10,11 +10,15 @@ def main():
     parser = argparse.ArgumentParser(prog='abcAttack',description='A SAT attack script built around MiniSAT, iVerilog, and the verification capabilities of ABC')
     parser.add_argument('encVerilog',type=str,help='Path to Verilog file describing encrypted circuit')
     parser.add_argument('orcVerilog',type=str,help='Path to Verilog file describing unencrypted circuit (oracle)')
+    parser.add_argument('-c','--recompileOracle',default=False,action='store_true',help='Regenerate the testbench and recompile the Verilog oracle for every query, instead of compiling it once and streaming queries to a running simulator')
     parser.add_argument('-f','--fresh',default=False,action='store_true',help='Creates fresh working and log directories upon calling this script')
     parser.add_argument('-g','--fraig',default=True,action='store_false',help='Disable fraiging capabilities of ABC solver (on by default)')
+    parser.add_argument('-n','--noOracleCache',default=True,action='store_false',dest='oracleCache',help='Disable the on-disk cache of oracle responses, so every query is simulated. By default, responses are kept in work/oracleCache.sqlite and reused by later runs in the same directory against the same oracle file')
+    parser.add_argument('-p','--pythonOracle',default=False,action='store_true',help='Compile the oracle once and evaluate it in-process instead of with iVerilog. orcVerilog may be a gate-level Verilog file or a functional Z3-PL (.py) file, whose input/output names must coincide with the encrypted circuit')
+    parser.add_argument('-s','--sharedOracleCache',default=False,action='store_true',help='Keep the oracle response cache in $XDG_CACHE_HOME/transat/ (~/.cache/transat/ if unset) instead of the work/ directory, so it is shared by runs in every directory')
     clArgs= parser.parse_args()
 
-    abcAttack(clArgs.encVerilog,clArgs.orcVerilog,clArgs.fresh,clArgs.fraig)
+    abcAttack(clArgs.encVerilog,clArgs.orcVerilog,clArgs.fresh,clArgs.fraig,clArgs.recompileOracle,clArgs.pythonOracle,clArgs.oracleCache,clArgs.sharedOracleCache)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+'''
+Batch runner for sweeps of TRANSAT tools. A JSON manifest lists the jobs to run: each job calls one
+tool (satAttack, satVerify, abcAttack or stateLocate) with its own arguments. Every job runs in its own
+work directory, in a fresh worker process of a process pool, since the tools compute their output paths
+from the working directory when they are imported. Keys, round counts and timings of every job are
+collected into a single results table.
+
+Manifest format (paths are relative to the manifest's directory):
+    {"jobs": [
+        {"name": "c17", "tool": "satAttack",
+         "args": ["encryptC17pl.py", "encryptC17io.csv", "c17.py", "c17"],
+         "kwargs": {"pythonOracle": true},
+         "verify": "c17.py"},
+        ...
+    ]}
+A satAttack job with a "verify" entry runs satVerify on its extracted key afterwards, against the
+given functional PL file. A bare list of jobs is also accepted.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import csv
+import json
+import time
+import argparse
+import resource
+import importlib
+import traceback
+import multiprocessing
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+batchTools = ['satAttack','satVerify','abcAttack','stateLocate']
+defBatchDir = 'batch/'
+resultsName = 'results.csv'
+resultsFields = ['name','tool','status','runtime','rounds','dips','attackTime','keySolveTime','verified','verifyTime','peakRSS','result','workDir','error']
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def readManifest(manifestFile:str,batchDir=defBatchDir) -> list:
+    '''
+    Read a batch manifest and return its list of jobs. Each job gets a unique name and an absolute
+    work directory within batchDir, and every relative path among its arguments is made absolute.
+
+    manifestFile    - Path to the JSON manifest
+    batchDir        - Directory holding the work directories of every job
+    '''
+    with open(manifestFile,'r') as f:
+        manifest = json.load(f)
+    jobs = manifest['jobs'] if isinstance(manifest,dict) else manifest
+    baseDir = os.path.dirname(os.path.abspath(manifestFile))
+
+    def resolve(val):
+        if isinstance(val,str) and not os.path.isabs(val) and os.path.exists(os.path.join(baseDir,val)):
+            return os.path.join(baseDir,val)
+        return val
+
+    names = set()
+    for i,job in enumerate(jobs):
+        if job.get('tool') not in batchTools:
+            raise RuntimeError(f'Job #{i} of batch manifest "{manifestFile}" has unrecognized tool "{job.get("tool")}". Expected one of: {", ".join(batchTools)}')
+        name = str(job.get('name',f'{job["tool"]}{i}'))
+        if name in names:
+            name = f'{name}_{i}'
+        names.add(name)
+        job['name'] = name
+        job['args'] = [resolve(arg) for arg in job.get('args',[])]
+        job['kwargs'] = {kw: resolve(val) for kw,val in job.get('kwargs',{}).items()}
+        if 'verify' in job:
+            job['verify'] = resolve(job['verify'])
+        job['workDir'] = os.path.join(os.path.abspath(batchDir),name)
+    return jobs
+
+
+def runJob(job:dict) -> dict:
+    '''
+    Run one batch job within its work directory and return its row of the results table. Meant to
+    run in a fresh worker process: the tool modules are re-imported after changing directory, so the
+    paths they compute at import time point into the job's work directory.
+
+    job     - Job dict, as returned by readManifest
+    '''
+    row = {'name':job['name'],'tool':job['tool'],'workDir':job['workDir']}
+    startTime = time.time()
+    try:
+        os.makedirs(job['workDir'],exist_ok=True)
+        os.chdir(job['workDir'])
+        importlib.reload(importlib.import_module(f'{__package__}.globals'))
+        toolModule = importlib.reload(importlib.import_module(f'{__package__}.{job["tool"]}'))
+        kwargs = dict(job['kwargs'])
+        if job['tool'] in ('satAttack','satVerify'):
+            kwargs.setdefault('quiet',True)
+        if job['tool'] == 'satAttack':
+            stats = {}
+            result = toolModule.satAttack(*job['args'],stats=stats,**kwargs)
+            row.update(stats)
+        else:
+            result = getattr(toolModule,job['tool'])(*job['args'],**kwargs)
+        row['status'] = 'ok'
+        row['result'] = result
+
+        # Verify the extracted key against the functional circuit, in the same work directory
+        if job['tool'] == 'satAttack' and job.get('verify') and result != -1:
+            verifyStartTime = time.time()
+            verifyModule = importlib.reload(importlib.import_module(f'{__package__}.satVerify'))
+            ioCSV = job['args'][1] if len(job['args']) > 1 else job['kwargs']['ioCSV']
+            highImpedance = kwargs.get('highImpedance',False)
+            decision,voiVals = verifyModule.satVerify(job['args'][0],job['verify'],ioCSV,os.path.join(job['workDir'],'work','extracted_key.csv'),quiet=True,highImpedance=highImpedance)
+            row['verified'] = not decision
+            row['verifyTime'] = round(time.time()-verifyStartTime,3)
+    except Exception as err:
+        row['status'] = 'error'
+        row['error'] = ''.join(traceback.format_exception_only(type(err),err)).strip()
+        with open(os.path.join(job['workDir'],'batchError.log'),'w') as f:
+            f.write(traceback.format_exc())
+    row['runtime'] = round(time.time()-startTime,3)
+    row['peakRSS'] = peakRSS()
+    return row
+
+
+def peakRSS() -> float:
+    '''
+    Return the peak resident set size of this process and its waited-for children (e.g. iVerilog), in MiB.
+    '''
+    return round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)/1024,1)
+
+
+def writeResults(rows:list,resultsFile:str,fields=resultsFields) -> None:
+    '''
+    Write the results table of a batch to a CSV file.
+
+    rows        - List of result dicts, as returned by runJob
+    resultsFile - Desired path and filename of the CSV file
+    fields      - Columns of the table. Other entries of the result dicts are left out
+    '''
+    with open(resultsFile,'w',newline='') as f:
+        writer = csv.DictWriter(f,fieldnames=fields,extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def batchRun(manifestFile:str,batchDir=defBatchDir,numWorkers=None,quiet=False) -> list:
+    '''
+    Run every job of a batch manifest in a process pool. Returns the results table as a list of dicts
+    (in manifest order), which is also written to results.csv within batchDir.
+
+    manifestFile    - Path to the JSON manifest. See module docstring for its format
+    batchDir        - Directory holding the work directories of every job, and the results table
+    numWorkers      - Number of jobs run at once. Defaults to the number of CPUs
+    quiet           - Prevent printing of job progress to terminal
+    '''
+    jobs = readManifest(manifestFile,batchDir)
+    os.makedirs(batchDir,exist_ok=True)
+    resultsFile = os.path.join(batchDir,resultsName)
+    numWorkers = min(numWorkers or os.cpu_count() or 1,max(len(jobs),1))
+    if not quiet:
+        print(f'Running {len(jobs)} jobs from {manifestFile} with {numWorkers} workers...')
+
+    # Each worker process runs a single job, so module globals and logging setup never leak between jobs
+    rows = {}
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(numWorkers,maxtasksperchild=1) as pool:
+        for row in pool.imap_unordered(runJob,jobs):
+            rows[row['name']] = row
+            if not quiet:
+                print(f'[{len(rows)}/{len(jobs)}] {row["name"]}: {row["status"]} in {row["runtime"]} s')
+
+    rows = [rows[job['name']] for job in jobs]
+    writeResults(rows,resultsFile)
+    if not quiet:
+        print(f'\nResults written to: {resultsFile}')
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='batchRun',description='Run a manifest of TRANSAT attacks and verifications in a process pool, each in its own work directory, and collect the results into one table')
+    parser.add_argument('manifest',type=str,help='Path to the JSON manifest listing the jobs to run. Each job has a "name", a "tool" (satAttack, satVerify, abcAttack or stateLocate), positional "args", keyword "kwargs", and optionally a functional PL file to "verify" an extracted key against')
+    parser.add_argument('-j','--workers',type=int,default=None,help='Number of jobs run at once. Defaults to the number of CPUs')
+    parser.add_argument('-o','--batchDir',type=str,default=defBatchDir,help='Directory holding the work directory of every job and the results table (results.csv)')
+    parser.add_argument('-q','--quiet',default=False,action='store_true',help='Prevent printing of job progress to terminal')
+    clArgs = parser.parse_args()
+
+    # Worker processes must find runJob in the package module rather than in __main__
+    importlib.import_module(f'{__package__}.batchRun').batchRun(clArgs.manifest,clArgs.batchDir,clArgs.workers,clArgs.quiet)
@@ -0,0 +1,20 @@
+'''
+Command-line interface for batchRun.py
+
+Author:     Aric Fowler
+'''
+import argparse
+from .batchRun import batchRun,defBatchDir
+
+def main():
+    parser = argparse.ArgumentParser(prog='batchRun',description='Run a manifest of TRANSAT attacks and verifications in a process pool, each in its own work directory, and collect the results into one table')
+    parser.add_argument('manifest',type=str,help='Path to the JSON manifest listing the jobs to run. Each job has a "name", a "tool" (satAttack, satVerify, abcAttack or stateLocate), positional "args", keyword "kwargs", and optionally a functional PL file to "verify" an extracted key against')
+    parser.add_argument('-j','--workers',type=int,default=None,help='Number of jobs run at once. Defaults to the number of CPUs')
+    parser.add_argument('-o','--batchDir',type=str,default=defBatchDir,help='Directory holding the work directory of every job and the results table (results.csv)')
+    parser.add_argument('-q','--quiet',default=False,action='store_true',help='Prevent printing of job progress to terminal')
+    clArgs = parser.parse_args()
+
+    batchRun(clArgs.manifest,clArgs.batchDir,clArgs.workers,clArgs.quiet)
+
+if __name__ == '__main__':
+    exit(main())
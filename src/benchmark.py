@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+'''
+Benchmark suite for TRANSAT. Runs the tools on the circuits shipped in the test/ directory (C17, the
+TRAP NAND2, LUT+Friends, a circuit with a don't-care key, and the s27 and s298 state detection circuits)
+and on TRAP fabrics, LUT islands and locked circuits of increasing size from synthGen, one case at a time, each in a fresh process and its own work directory.
+Wall time, rounds, DIPs, peak RSS and solver statistics of every case are written to results.json and
+results.csv, and compared against a stored baseline to flag performance regressions.
+
+A baseline is recorded from a run with --saveBaseline, on the machine the benchmarks are compared on.
+A case regresses when it no longer succeeds, when it needs more rounds, or when its runtime or peak
+RSS grows by more than the tolerance (and by more than a noise floor).
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import csv
+import sys
+import json
+import shutil
+import argparse
+import platform
+import datetime
+import importlib
+import multiprocessing
+from .batchRun import runJob,writeResults
+from .synthGen import synthGen,parseSizes
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+defTestDir = 'test/'
+defBenchDir = 'benchmark/'
+defBaselineFile = os.path.join(defBenchDir,'baseline.json')
+defTimeout = 600                # Seconds allotted to each case
+defTolerance = 0.25             # Allowed relative growth of runtime and peak RSS
+defMinDelta = {'runtime':0.5,'peakRSS':16.0}    # Noise floors (s, MiB) below which growth is ignored
+defTrapSizes = [(1,1)]          # (rows,columns) of generated TRAP fabrics
+defLutSizes = [2,4,8,16]        # Number of LUTs of generated LUT islands
+defLockedSizes = [10,100,1000]  # Number of gates of generated locked circuits
+defSeed = 2026                  # Locked circuits are the same in every run, so results stay comparable
+benchFields = ['name','tool','status','runtime','rounds','dips','attackTime','keySolveTime','verified','verifyTime','peakRSS','miterConflicts','keyConflicts','error']
+
+# Cases on the circuits shipped in the test/ directory. Paths are relative to the test directory. satAttack
+# cases skip the final round once every input pattern is a DIP, as the satAttack command does by default
+shippedCases = [
+    {'name':'c17','tool':'satAttack','dir':'Test02-C17',
+     'args':['encryptC17pl.py','encryptC17io.csv','c17.py','c17'],'kwargs':{'pythonOracle':True,'noEarlyTermination':True},'verify':'c17.py'},
+    {'name':'c17_abc','tool':'abcAttack','dir':'Test02-C17','requires':['abc'],
+     'args':['c17Locked.v','c17.v'],'kwargs':{'fresh':False,'fraig':True,'pythonOracle':True}},
+    {'name':'trapNAND2','tool':'satAttack','dir':'Test08-TRAP_NAND2',
+     'args':['trapNAND2.py','trapNAND2_io.csv','nand2PL.py','nand2'],'kwargs':{'pythonOracle':True,'highImpedance':True,'noEarlyTermination':True},'verify':'nand2PL.py'},
+    {'name':'lutFriends','tool':'satAttack','dir':'Test09-LUT+Friends',
+     'args':['lutWithLogic.py','io.csv','oracle.py','oracle'],'kwargs':{'pythonOracle':True,'noEarlyTermination':True},'verify':'oracle.py'},
+    {'name':'lutFriends_pysat','tool':'satAttack','dir':'Test09-LUT+Friends',
+     'args':['lutWithLogic.py','io.csv','oracle.py','oracle'],'kwargs':{'pythonOracle':True,'noEarlyTermination':True,'backend':'pysat'},'verify':'oracle.py'},
+    {'name':'dontCareKey','tool':'satAttack','dir':'Test12-DontCare_Key',
+     'args':['lockedPL.py','io.csv','oracle.py','oracle'],'kwargs':{'pythonOracle':True,'noEarlyTermination':True},'verify':'oracle.py'},
+    {'name':'dontCareKey_cube','tool':'satAttack','dir':'Test12-DontCare_Key',
+     'args':['lockedPL.py','io.csv','oracle.py','oracle'],'kwargs':{'pythonOracle':True,'noEarlyTermination':True,'cubeDepth':2},'verify':'oracle.py'},
+    {'name':'s27','tool':'stateLocate','dir':'Test11-State_Detection','args':['s27.py','s27_io.csv'],'kwargs':{}},
+    {'name':'s298','tool':'stateLocate','dir':'Test11-State_Detection','args':['s298.py','s298_io.csv'],'kwargs':{}},
+]
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def blockPrint():
+    sys.stdout = open(os.devnull, 'w')
+
+
+def enablePrint():
+    sys.stdout = sys.__stdout__
+
+
+def testCases(testDir:str,benchDir:str) -> list:
+    '''
+    Return the jobs of the cases on the shipped test circuits, in the format of batchRun jobs.
+
+    testDir     - Path to the test/ directory of the TRANSAT repository
+    benchDir    - Directory holding the work directory of every case
+    '''
+    jobs = []
+    for case in shippedCases:
+        caseDir = os.path.join(os.path.abspath(testDir),case['dir'])
+        job = {key: val for key,val in case.items() if key != 'dir'}
+        job['args'] = [os.path.join(caseDir,arg) if os.path.exists(os.path.join(caseDir,arg)) else arg for arg in case['args']]
+        job['kwargs'] = dict(case['kwargs'])
+        if 'verify' in case:
+            job['verify'] = os.path.join(caseDir,case['verify'])
+        job['workDir'] = os.path.join(os.path.abspath(benchDir),case['name'])
+        jobs.append(job)
+    return jobs
+
+
+def synthCases(benchDir:str,trapSizes=defTrapSizes,lutSizes=defLutSizes,lockedSizes=defLockedSizes) -> list:
+    '''
+    Generate synthetic TRAP fabrics, LUT islands and locked circuits of the requested sizes within
+    benchDir with synthGen, and return the jobs attacking them, in the format of batchRun jobs. Locked
+    circuits are also attacked with abcAttack.
+
+    benchDir    - Directory the circuits (and the work directory of every case) are placed in
+    trapSizes   - List of (rows,columns) of TRAP fabrics
+    lutSizes    - List of LUT counts of LUT islands
+    lockedSizes - List of gate counts of locked circuits
+    '''
+    synthDir = os.path.join(os.path.abspath(benchDir),'synth')
+    circuits = synthGen('trap',trapSizes,synthDir) + synthGen('lut',lutSizes,synthDir) + synthGen('locked',lockedSizes,synthDir,seed=defSeed)
+    jobs = []
+    for circuit in circuits:
+        kwargs = {'pythonOracle':True,'noEarlyTermination':True}
+        if circuit['highImpedance']:
+            kwargs['highImpedance'] = True
+        jobs.append({'name':circuit['name'],'tool':'satAttack','args':[circuit['pl'],circuit['io'],circuit['funPL'],circuit['top']],'kwargs':kwargs,'verify':circuit['funPL']})
+        if 'lockedV' in circuit:
+            jobs.append({'name':f'{circuit["name"]}_abc','tool':'abcAttack','requires':['abc'],'args':[circuit['lockedV'],circuit['oracleV']],
+                         'kwargs':{'fresh':False,'fraig':True,'pythonOracle':True}})
+
+    for job in jobs:
+        job['workDir'] = os.path.join(os.path.abspath(benchDir),job['name'])
+    return jobs
+
+
+def runCase(job:dict,timeout=defTimeout,quiet=False) -> dict:
+    '''
+    Run one benchmark case in a fresh process, so that its peak RSS is its own. Returns the case's row
+    of the results table, with the solver conflict counts of satAttack cases picked out of the solver
+    statistics.
+
+    job     - Job dict, in the format of batchRun jobs. A "requires" list of executables skips the case
+                when any of them is not on the PATH
+    timeout - Seconds allotted to the case, after which it is stopped
+    quiet   - Prevent printing by the case's tool to terminal
+    '''
+    missing = [binary for binary in job.get('requires',[]) if shutil.which(binary) is None]
+    if missing:
+        return {'name':job['name'],'tool':job['tool'],'status':'skipped','error':f'{", ".join(missing)} not found'}
+    if os.path.exists(job['workDir']):
+        shutil.rmtree(job['workDir'])
+
+    # The case process is not daemonic, so cases can start worker processes of their own (e.g. -u, -j)
+    ctx = multiprocessing.get_context('spawn')
+    recvConn,sendConn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=caseWorker,args=(job,sendConn,quiet))
+    proc.start()
+    sendConn.close()
+    try:
+        if not recvConn.poll(timeout):
+            proc.terminate()
+            return {'name':job['name'],'tool':job['tool'],'status':'timeout','runtime':timeout}
+        row = recvConn.recv()
+    except EOFError:    # Case process died without answering
+        row = {'name':job['name'],'tool':job['tool'],'status':'error','error':f'case process exited with code {proc.exitcode}'}
+    finally:
+        recvConn.close()
+        proc.join()
+    for session in ('miter','key'):
+        solverStats = row.get(f'{session}Stats',{})
+        if 'conflicts' in solverStats:
+            row[f'{session}Conflicts'] = solverStats['conflicts']
+    return row
+
+
+def caseWorker(job:dict,conn,quiet=False) -> None:
+    '''
+    Run one benchmark case and send its row of the results table through a pipe. Runs in a fresh process.
+    '''
+    if quiet: blockPrint()
+    conn.send(runJob(job))
+    conn.close()
+
+
+def compareBaseline(rows:list,baseline:dict,tolerance=defTolerance,minDelta=defMinDelta) -> list:
+    '''
+    Compare benchmark results against a baseline. Returns a list of regression descriptions, empty if
+    there are none. Cases missing from either side are not compared.
+
+    rows        - List of result dicts, as returned by runCase
+    baseline    - Baseline dict, as written by saveBaseline
+    tolerance   - Allowed relative growth of runtime and peak RSS
+    minDelta    - Dict of absolute growth of runtime (s) and peak RSS (MiB) that is always allowed
+    '''
+    regressions = []
+    for row in rows:
+        base = baseline['cases'].get(row['name'])
+        if base is None or base.get('status') == 'skipped' or row.get('status') == 'skipped':
+            continue
+        if base.get('status') == 'ok' and row.get('status') != 'ok':
+            regressions.append(f'{row["name"]}: status {row.get("status")} (baseline ok)')
+            continue
+        if base.get('verified') is True and row.get('verified') is False:
+            regressions.append(f'{row["name"]}: extracted key no longer verifies')
+        if row.get('rounds') is not None and base.get('rounds') is not None and row['rounds'] > base['rounds']:
+            regressions.append(f'{row["name"]}: {row["rounds"]} rounds (baseline {base["rounds"]})')
+        for metric,unit in (('runtime','s'),('peakRSS','MiB')):
+            if row.get(metric) is None or base.get(metric) is None:
+                continue
+            if (row[metric] > base[metric]*(1+tolerance)) and (row[metric]-base[metric] > minDelta[metric]):
+                regressions.append(f'{row["name"]}: {metric} {row[metric]} {unit} (baseline {base[metric]} {unit}, +{100*(row[metric]/base[metric]-1):.0f}%)')
+    return regressions
+
+
+def saveBaseline(rows:list,baselineFile:str) -> None:
+    '''
+    Store benchmark results as the baseline later runs are compared against.
+
+    rows            - List of result dicts, as returned by runCase
+    baselineFile    - Desired path and filename of the baseline JSON file
+    '''
+    if os.path.dirname(baselineFile):
+        os.makedirs(os.path.dirname(baselineFile),exist_ok=True)
+    baseline = {'created':datetime.datetime.now().isoformat(timespec='seconds'),'host':platform.node(),
+                'python':platform.python_version(),'cases':{row['name']: row for row in rows}}
+    with open(baselineFile,'w') as f:
+        json.dump(baseline,f,indent=2,default=str)
+
+
+def benchmark(testDir=defTestDir,benchDir=defBenchDir,baselineFile=defBaselineFile,save=False,trapSizes=defTrapSizes,lutSizes=defLutSizes,lockedSizes=defLockedSizes,cases=None,timeout=defTimeout,tolerance=defTolerance,quiet=False) -> list:
+    '''
+    Run the benchmark suite. Returns the list of regressions against the baseline, which is empty when
+    there is no baseline to compare against, or when the results are saved as the new baseline.
+
+    testDir         - Path to the test/ directory of the TRANSAT repository
+    benchDir        - Directory holding the work directory of every case, the generated circuits and the results
+    baselineFile    - Path to the baseline JSON file
+    save            - Store the results as the new baseline instead of comparing against it
+    trapSizes       - List of (rows,columns) of generated TRAP fabrics
+    lutSizes        - List of LUT counts of generated LUT islands
+    lockedSizes     - List of gate counts of generated locked circuits
+    cases           - List of case names to run. All cases are run if None
+    timeout         - Seconds allotted to each case
+    tolerance       - Allowed relative growth of runtime and peak RSS
+    quiet           - Prevent printing of case progress to terminal
+    '''
+    os.makedirs(benchDir,exist_ok=True)
+    if quiet: blockPrint()     # The fabric builders print their progress
+    try:
+        jobs = testCases(testDir,benchDir) + synthCases(benchDir,trapSizes,lutSizes,lockedSizes)
+    finally:
+        if quiet: enablePrint()
+    if cases is not None:
+        jobs = [job for job in jobs if job['name'] in cases]
+    if not quiet:
+        print(f'Running {len(jobs)} benchmark cases...')
+
+    # Cases run one after another, so they do not compete for CPU time
+    rows = []
+    for i,job in enumerate(jobs):
+        row = runCase(job,timeout,quiet)
+        rows.append(row)
+        if not quiet:
+            print(f'[{i+1}/{len(jobs)}] {row["name"]}: {row["status"]}, {row.get("runtime","-")} s, {row.get("peakRSS","-")} MiB')
+
+    with open(os.path.join(benchDir,'results.json'),'w') as f:
+        json.dump(rows,f,indent=2,default=str)
+    writeResults(rows,os.path.join(benchDir,'results.csv'),fields=benchFields)
+
+    regressions = []
+    if save:
+        saveBaseline(rows,baselineFile)
+        if not quiet:
+            print(f'\nBaseline saved to: {baselineFile}')
+    elif os.path.exists(baselineFile):
+        with open(baselineFile,'r') as f:
+            baseline = json.load(f)
+        regressions = compareBaseline(rows,baseline,tolerance)
+        if not quiet:
+            print(f'\nCompared against baseline {baselineFile} ({baseline["created"]}, {baseline["host"]}):')
+            print('\n'.join(regressions) if regressions else 'No regressions.')
+    elif not quiet:
+        print(f'\nNo baseline found at {baselineFile}. Run with --saveBaseline to create one.')
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='benchmark',description='Run the TRANSAT benchmark suite on the shipped test circuits and generated TRAP fabrics, LUT islands and locked circuits, and compare against a stored baseline to flag performance regressions')
+    parser.add_argument('-B','--baseline',type=str,default=defBaselineFile,help='Path to the baseline JSON file')
+    parser.add_argument('-c','--cases',type=str,default=None,help='Comma-separated names of the cases to run (e.g. c17,trapNAND2,lut4,locked100). All cases are run by default')
+    parser.add_argument('-l','--lutSizes',type=str,default=','.join([str(size) for size in defLutSizes]),help='Comma-separated LUT counts of generated LUT islands, e.g. "2,4,8"')
+    parser.add_argument('-m','--lockedSizes',type=str,default=','.join([str(size) for size in defLockedSizes]),help='Comma-separated gate counts of generated XOR/XNOR-locked circuits, e.g. "10,100,1000"')
+    parser.add_argument('-o','--benchDir',type=str,default=defBenchDir,help='Directory holding the work directory of every case, the generated circuits, and the results (results.json, results.csv)')
+    parser.add_argument('-q','--quiet',default=False,action='store_true',help='Prevent printing of case progress to terminal')
+    parser.add_argument('-r','--trapSizes',type=str,default=','.join([f'{rows}x{cols}' for rows,cols in defTrapSizes]),help='Comma-separated sizes (rows x columns) of generated TRAP fabrics, e.g. "1x1,1x2"')
+    parser.add_argument('-s','--saveBaseline',default=False,action='store_true',help='Store the results as the new baseline instead of comparing against it')
+    parser.add_argument('-t','--testDir',type=str,default=defTestDir,help='Path to the test/ directory of the TRANSAT repository')
+    parser.add_argument('-T','--timeout',type=int,default=defTimeout,help='Seconds allotted to each case')
+    parser.add_argument('-x','--tolerance',type=float,default=defTolerance,help='Allowed relative growth of runtime and peak RSS before a case is flagged as a regression')
+    clArgs = parser.parse_args()
+
+    # Worker processes must find runJob in the package module rather than in __main__
+    regressions = importlib.import_module(f'{__package__}.benchmark').benchmark(clArgs.testDir,clArgs.benchDir,clArgs.baseline,clArgs.saveBaseline,parseSizes(clArgs.trapSizes),parseSizes(clArgs.lutSizes),parseSizes(clArgs.lockedSizes),
+                                                                             clArgs.cases.split(',') if clArgs.cases else None,clArgs.timeout,clArgs.tolerance,clArgs.quiet)
+    sys.exit(1 if regressions else 0)
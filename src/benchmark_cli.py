@@ -0,0 +1,31 @@
+'''
+Command-line interface for benchmark.py
+
+Author:     Aric Fowler
+'''
+import sys
+import argparse
+from .benchmark import benchmark,defBaselineFile,defBenchDir,defLockedSizes,defLutSizes,defTestDir,defTimeout,defTolerance,defTrapSizes
+from .synthGen import parseSizes
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmark',description='Run the TRANSAT benchmark suite on the shipped test circuits and generated TRAP fabrics, LUT islands and locked circuits, and compare against a stored baseline to flag performance regressions')
+    parser.add_argument('-B','--baseline',type=str,default=defBaselineFile,help='Path to the baseline JSON file')
+    parser.add_argument('-c','--cases',type=str,default=None,help='Comma-separated names of the cases to run (e.g. c17,trapNAND2,lut4,locked100). All cases are run by default')
+    parser.add_argument('-l','--lutSizes',type=str,default=','.join([str(size) for size in defLutSizes]),help='Comma-separated LUT counts of generated LUT islands, e.g. "2,4,8"')
+    parser.add_argument('-m','--lockedSizes',type=str,default=','.join([str(size) for size in defLockedSizes]),help='Comma-separated gate counts of generated XOR/XNOR-locked circuits, e.g. "10,100,1000"')
+    parser.add_argument('-o','--benchDir',type=str,default=defBenchDir,help='Directory holding the work directory of every case, the generated circuits, and the results (results.json, results.csv)')
+    parser.add_argument('-q','--quiet',default=False,action='store_true',help='Prevent printing of case progress to terminal')
+    parser.add_argument('-r','--trapSizes',type=str,default=','.join([f'{rows}x{cols}' for rows,cols in defTrapSizes]),help='Comma-separated sizes (rows x columns) of generated TRAP fabrics, e.g. "1x1,1x2"')
+    parser.add_argument('-s','--saveBaseline',default=False,action='store_true',help='Store the results as the new baseline instead of comparing against it')
+    parser.add_argument('-t','--testDir',type=str,default=defTestDir,help='Path to the test/ directory of the TRANSAT repository')
+    parser.add_argument('-T','--timeout',type=int,default=defTimeout,help='Seconds allotted to each case')
+    parser.add_argument('-x','--tolerance',type=float,default=defTolerance,help='Allowed relative growth of runtime and peak RSS before a case is flagged as a regression')
+    clArgs = parser.parse_args()
+
+    regressions = benchmark(clArgs.testDir,clArgs.benchDir,clArgs.baseline,clArgs.saveBaseline,parseSizes(clArgs.trapSizes),parseSizes(clArgs.lutSizes),parseSizes(clArgs.lockedSizes),
+                            clArgs.cases.split(',') if clArgs.cases else None,clArgs.timeout,clArgs.tolerance,clArgs.quiet)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+'''
+Binary checkpoints of SAT attack progress. A checkpoint holds everything needed to resume an attack at
+the round it stopped, without solving anything again: the DIPs and their oracle outputs (as packed bit
+arrays), the round number, the I/O variables, and the attack settings that shape the miter. The DIPs
+and oracle outputs are the whole solver-independent constraint set of the attack, since the miter and
+key-solve constraints are rebuilt from the locked circuit by one circuit copy per DIP.
+
+Checkpoints are NumPy .npz archives, replaced atomically so an interruption while writing leaves the
+previous checkpoint intact.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+checkpointVersion = 1
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def fileHash(fileName:str) -> str:
+    '''
+    Return the SHA-256 digest of a file's contents, as a hex string.
+    '''
+    with open(fileName,'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def packBits(patterns:list,varList:list) -> np.ndarray:
+    '''
+    Pack a list of pattern dicts into a 2D uint8 array, one row per pattern, 8 variables per byte in
+    varList order.
+    '''
+    return np.packbits(np.array([[pat[var] for var in varList] for pat in patterns],dtype=bool).reshape(-1,len(varList)),axis=1)
+
+
+def unpackBits(packed:np.ndarray,varList:list) -> list:
+    '''
+    Unpack a 2D array written by packBits into a list of pattern dicts.
+    '''
+    bits = np.unpackbits(packed,axis=1,count=len(varList)).astype(bool)
+    return [{var: bool(val) for var,val in zip(varList,row)} for row in bits]
+
+
+def writeCheckpoint(checkpointFile:str,roundNum:int,DIPs:list,oracleOuts:list,inVars:list,keyVars:list,outVars:list,config:dict) -> None:
+    '''
+    Write a checkpoint of an attack, replacing any previous one.
+
+    checkpointFile  - Path of the checkpoint (.npz) file
+    roundNum        - Last completed round
+    DIPs            - List of DIP dicts found so far, in order
+    oracleOuts      - List of oracle output dicts, one per DIP
+    inVars          - List of input variables
+    keyVars         - List of key variables
+    outVars         - List of output variables
+    config          - JSON-serializable dict of attack settings, checked when resuming
+    '''
+    tmpFile = checkpointFile + '.tmp'
+    with open(tmpFile,'wb') as f:
+        np.savez(f,version=checkpointVersion,round=roundNum,dips=packBits(DIPs,inVars),outs=packBits(oracleOuts,outVars),
+                 inVars=np.array(inVars,dtype=str),keyVars=np.array(keyVars,dtype=str),outVars=np.array(outVars,dtype=str),
+                 config=json.dumps(config,sort_keys=True))
+    os.replace(tmpFile,checkpointFile)
+
+
+def readCheckpoint(checkpointFile:str,inVars:list,keyVars:list,outVars:list,config:dict) -> dict:
+    '''
+    Read a checkpoint written by writeCheckpoint, and check that it belongs to the same attack: the same
+    I/O variables and the same settings in config. Returns a dict with the last completed "round", and
+    the lists of "dips" and "outs".
+
+    checkpointFile  - Path of the checkpoint (.npz) file
+    inVars          - List of input variables of the attack being resumed
+    keyVars         - List of key variables of the attack being resumed
+    outVars         - List of output variables of the attack being resumed
+    config          - Dict of settings of the attack being resumed
+    '''
+    with np.load(checkpointFile) as ckpt:
+        if int(ckpt['version']) != checkpointVersion:
+            logging.error(f'Checkpoint "{checkpointFile}" has version {int(ckpt["version"])}, but version {checkpointVersion} is expected.')
+            raise RuntimeError('Incompatible checkpoint. See log for details.')
+        for name,varList in (('in',inVars),('key',keyVars),('out',outVars)):
+            if list(ckpt[f'{name}Vars']) != list(varList):
+                logging.error(f'The {name}Vars of checkpoint "{checkpointFile}" do not match those of the attack being resumed.')
+                raise RuntimeError('Checkpoint belongs to a different attack. See log for details.')
+        ckptConfig = json.loads(str(ckpt['config']))
+        for setting,val in config.items():
+            if ckptConfig.get(setting) != val:
+                logging.error(f'Checkpoint "{checkpointFile}" was written with {setting} = {ckptConfig.get(setting)}, but the attack being resumed has {setting} = {val}.')
+                raise RuntimeError('Checkpoint belongs to a different attack. See log for details.')
+        return {'round':int(ckpt['round']),'dips':unpackBits(ckpt['dips'],inVars),'outs':unpackBits(ckpt['outs'],outVars)}
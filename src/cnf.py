@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+'''
+Tseitin CNF encoding of PL clauses and pluggable SAT solver backends. Purely Boolean problems (the
+miter, DIP-circuit and verification problems of non-counting circuits) can be converted to CNF,
+written out in DIMACS format, and solved by an incremental pysat solver (CaDiCaL, Glucose, etc.) or
+an external DIMACS solver binary (kissat, etc.) instead of Z3.
+
+Backends are selected with a string:
+    z3                  - Z3 Solver on the original PL clauses (default)
+    pysat[:name]        - pysat incremental solver, e.g. "pysat:cadical153" or "pysat:glucose4"
+    dimacs:binary       - External solver binary that reads a DIMACS file and prints results in the
+                            SAT competition format ("s SATISFIABLE" and "v" lines)
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import ast
+import shutil
+import logging
+import tempfile
+import subprocess
+from typing import Tuple
+from .plCircuit import VAR,CONST,NAME,parseNode
+from .solverSession import SolverSession
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+defBackend = 'z3'
+defPysatSolver = 'cadical153'
+commutativeOps = {'And','Or','Xor','==','!='}
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class CNFEncoder:
+    '''
+    Tseitin encoder from PL expression trees into CNF. Every subexpression is given its own DIMACS
+    variable, and identical subexpressions share one variable (structural hashing).
+
+    varMap      - Dict mapping each PL variable name to its DIMACS variable number
+    clauses     - List of CNF clauses, each a list of nonzero DIMACS literals
+    numVars     - Number of DIMACS variables allocated so far
+    '''
+    def __init__(self):
+        self.varMap = {}
+        self.clauses = []
+        self.numVars = 0
+        self.gates = {}                     # (op,literals) -> literal of the gate output
+        self.trueLit = self.newVar()
+        self.clauses.append([self.trueLit])
+
+
+    def newVar(self) -> int:
+        self.numVars += 1
+        return self.numVars
+
+
+    def declare(self,var:str) -> int:
+        '''
+        Return the DIMACS variable of a PL variable, allocating one if needed.
+        '''
+        if var not in self.varMap:
+            self.varMap[var] = self.newVar()
+        return self.varMap[var]
+
+
+    def assertNode(self,node:tuple,names:list) -> None:
+        '''
+        Add CNF clauses asserting that an expression tree is true.
+
+        node    - Expression tree, as created by plCircuit.parseNode
+        names   - List of variable names indexed by the symbol numbers used in node
+        '''
+        op = node[0]
+        if op == 'And':
+            for arg in node[1:]:
+                self.assertNode(arg,names)
+        elif op == 'Or':
+            self.clauses.append([self.encode(arg,names) for arg in node[1:]])
+        elif op == 'Implies':
+            self.clauses.append([-self.encode(node[1],names),self.encode(node[2],names)])
+        elif op == '==':
+            lft,rht = self.encode(node[1],names),self.encode(node[2],names)
+            self.clauses.extend([[-lft,rht],[lft,-rht]])
+        else:
+            self.clauses.append([self.encode(node,names)])
+
+
+    def encode(self,node:tuple,names:list) -> int:
+        '''
+        Return a DIMACS literal that is equivalent to an expression tree, adding the Tseitin clauses
+        that define it.
+
+        node    - Expression tree, as created by plCircuit.parseNode
+        names   - List of variable names indexed by the symbol numbers used in node
+        '''
+        op = node[0]
+        if op == VAR:
+            return self.declare(names[node[1]])
+        elif op == CONST and node[1] is True:
+            return self.trueLit
+        elif op == CONST and node[1] is False:
+            return -self.trueLit
+        elif op == 'Not':
+            return -self.encode(node[1],names)
+        elif op == 'Implies':
+            return self.gate('Or',[-self.encode(node[1],names),self.encode(node[2],names)])
+        elif op in ('And','Or','Xor','If'):
+            return self.gate(op,[self.encode(arg,names) for arg in node[1:]])
+        elif op == '==':
+            return -self.gate('Xor',[self.encode(node[1],names),self.encode(node[2],names)])
+        elif op == '!=':
+            return self.gate('Xor',[self.encode(node[1],names),self.encode(node[2],names)])
+        raise ValueError(f'"{node[1] if op in (NAME,CONST) else op}" has no Boolean CNF encoding')
+
+
+    def gate(self,op:str,lits:list) -> int:
+        '''
+        Return the output literal of a gate over the given literals, creating it if it does not exist.
+        '''
+        if op in ('And','Or') and len(lits) == 1:
+            return lits[0]
+        key = (op,tuple(sorted(lits)) if op in commutativeOps else tuple(lits))
+        if key in self.gates:
+            return self.gates[key]
+
+        out = self.newVar()
+        if op == 'And':
+            self.clauses.extend([[-out,lit] for lit in lits])
+            self.clauses.append([out]+[-lit for lit in lits])
+        elif op == 'Or':
+            self.clauses.extend([[out,-lit] for lit in lits])
+            self.clauses.append([-out]+lits)
+        elif op == 'Xor':
+            prev = lits[0]
+            for lit in lits[1:-1]:              # Chain any extra operands
+                prev = self.gate('Xor',[prev,lit])
+            a,b = prev,lits[-1]
+            self.clauses.extend([[-out,a,b],[-out,-a,-b],[out,-a,b],[out,a,-b]])
+        elif op == 'If':
+            c,a,b = lits
+            self.clauses.extend([[-out,-c,a],[-out,c,b],[out,-c,-a],[out,c,-b]])
+        self.gates[key] = out
+        return out
+
+
+class CNFSession:
+    '''
+    Incremental solving session over a CNF backend. Mirrors the interface of SolverSession, so the
+    attack tools can use either one: PL clause strings are parsed, Tseitin-encoded, and passed to the
+    backend as they are added.
+
+    backend     - Backend string, e.g. "pysat:cadical153" or "dimacs:kissat"
+    encoder     - CNFEncoder holding every clause added so far
+    plVars      - Dict of variable names and their (varType,varArgs) tuples declared so far
+    plClauses   - List of every clause string added to the session, in order
+    '''
+    def __init__(self,name='',backend=f'pysat:{defPysatSolver}'):
+        '''
+        Constructor for CNFSession.
+
+        name    - Name used when logging information about this session
+        backend - Backend string. See module docstring
+        '''
+        self.name = name
+        self.backend = backend
+        self.encoder = CNFEncoder()
+        self.plVars = {}
+        self.plClauses = []
+        self.index = {}
+        self.names = []
+        self.numSent = 0                    # Number of encoder clauses passed to the solver so far
+        self.interruptible = False          # Solve with solve_limited, so a check can be interrupted (see portfolio)
+
+        kind,_,arg = backend.partition(':')
+        if kind == 'pysat':
+            try:
+                from pysat.solvers import Solver
+            except ImportError:
+                logging.error('The pysat backend requires the python-sat package (pip install python-sat).')
+                raise RuntimeError('pysat is not installed. See log for details.')
+            self.solver = Solver(name=arg or defPysatSolver)
+        elif kind == 'dimacs':
+            if arg == '' or shutil.which(arg) is None:
+                logging.error(f'DIMACS solver binary "{arg}" was not found on the PATH.')
+                raise RuntimeError('DIMACS solver binary not found. See log for details.')
+            self.solver = None
+        else:
+            raise RuntimeError(f'Unrecognized CNF backend "{backend}".')
+
+
+    def declare(self,plVars:dict) -> None:
+        '''
+        Declare PL variables within the session. Only Bool variables can be encoded in CNF.
+
+        plVars  - Dict of variables and their (varType,varArgs) tuples, as returned by readZ3pl
+        '''
+        for var,varAtts in plVars.items():
+            if var in self.index:
+                continue
+            if varAtts[0] != 'Bool':
+                logging.error(f'Variable "{var}" in solver session "{self.name}" has type {varAtts[0]}, which cannot be encoded in CNF.')
+                raise RuntimeError(f'Non-Boolean variable in CNF session "{self.name}". See log for details.')
+            self.index[var] = len(self.names)
+            self.names.append(var)
+            self.plVars[var] = varAtts
+            self.encoder.declare(var)
+
+
+    def add(self,plClauses:list) -> None:
+        '''
+        Tseitin-encode PL clause strings and add them to the solver.
+
+        plClauses   - List of clause strings written with the Z3 Python API
+        '''
+        for clause in plClauses:
+            try:
+                self.encoder.assertNode(parseNode(ast.parse(clause.strip(),mode='eval').body,self.index),self.names)
+            except (SyntaxError,ValueError) as err:
+                logging.error(f'Clause "{clause}" added to CNF session "{self.name}" cannot be encoded: {err}')
+                raise RuntimeError(f'Unable to encode a clause in CNF session "{self.name}". See log for details.')
+        self.plClauses.extend(plClauses)
+        self.sendClauses()
+
+
+    def addCopy(self,plCircuit,nodes:list,names:list,plClauses:list) -> None:
+        '''
+        Tseitin-encode a copy of a parsed PL circuit straight from its expression trees, without parsing
+        its clause strings. Mirrors SolverSession.addCopy.
+
+        plCircuit   - PLCircuit the copy is made from
+        nodes       - List of the copy's clause expression trees, in plCircuit's symbol numbers
+        names       - List of the copy's variable names, indexed by symbol number
+        plClauses   - List of the copy's clause strings, kept in plClauses
+        '''
+        for node,clause in zip(nodes,plClauses):
+            try:
+                self.encoder.assertNode(node,names)
+            except ValueError as err:
+                logging.error(f'Clause "{clause}" of a copy of "{plCircuit.name}" added to CNF session "{self.name}" cannot be encoded: {err}')
+                raise RuntimeError(f'Unable to encode a clause in CNF session "{self.name}". See log for details.')
+        self.plClauses.extend(plClauses)
+        self.sendClauses()
+
+
+    def sendClauses(self) -> None:
+        '''
+        Pass the CNF clauses encoded since the last call to the backend solver, if it is incremental.
+        '''
+        if self.solver is not None:
+            for cnfClause in self.encoder.clauses[self.numSent:]:
+                self.solver.add_clause(cnfClause)
+            self.numSent = len(self.encoder.clauses)
+
+
+    def check(self,voi=[]) -> Tuple[bool,dict]:
+        '''
+        Run the solver on all clauses added so far. Returns True if the solver returns SAT, along with
+        a dict of values for the variables of interest. Mirrors SolverSession.check.
+
+        voi     - "Variables of interest": a list of all variable names you desire to be returned. If
+                    left blank, all declared variables are returned
+        '''
+        if self.solver is not None:
+            if not (self.solver.solve_limited(expect_interrupt=True) if self.interruptible else self.solver.solve()):
+                return False,None
+            model = self.solver.get_model()
+        else:
+            sat,model = runDimacsBinary(self.backend.partition(':')[2],self.encoder)
+            if not sat:
+                return False,None
+
+        trueLits = set([lit for lit in model if lit > 0])
+        varList = sorted(set(voi).intersection(self.index.keys())) if voi != [] else sorted(self.index.keys())
+        return True,{var: self.encoder.varMap[var] in trueLits for var in varList}
+
+
+    def writeDimacs(self,dimacsFile:str) -> None:
+        writeDimacs(self.encoder,dimacsFile)
+
+
+    def statistics(self) -> dict:
+        '''
+        Return the size of the session and its CNF encoding, and the accumulated statistics of the pysat
+        solver (conflicts, decisions, propagations, restarts) where available, as a dict.
+        '''
+        stats = {'vars':len(self.names),'clauses':len(self.plClauses),'cnfVars':self.encoder.numVars,'cnfClauses':len(self.encoder.clauses)}
+        if self.solver is not None:
+            stats = stats | (self.solver.accum_stats() or {})
+        return stats
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def writeDimacs(encoder:CNFEncoder,dimacsFile:str) -> None:
+    '''
+    Write the clauses of a CNF encoder to a DIMACS file. PL variable names are recorded in comment
+    lines ("c var name number") so results can be mapped back.
+
+    encoder     - CNFEncoder holding the clauses
+    dimacsFile  - Desired path and filename of the DIMACS file
+    '''
+    with open(dimacsFile,'w') as f:
+        for var,num in encoder.varMap.items():
+            f.write(f'c var {var} {num}\n')
+        f.write(f'p cnf {encoder.numVars} {len(encoder.clauses)}\n')
+        for clause in encoder.clauses:
+            f.write(' '.join([str(lit) for lit in clause]) + ' 0\n')
+
+
+def runDimacsBinary(binary:str,encoder:CNFEncoder) -> Tuple[bool,list]:
+    '''
+    Solve the clauses of a CNF encoder with an external DIMACS solver binary. Returns True if the
+    problem is satisfiable, along with a list of model literals.
+
+    binary      - Name or path of the solver binary
+    encoder     - CNFEncoder holding the clauses
+    '''
+    fd,dimacsFile = tempfile.mkstemp(suffix='.cnf')
+    os.close(fd)
+    try:
+        writeDimacs(encoder,dimacsFile)
+        result = subprocess.run([binary,dimacsFile],capture_output=True,text=True)
+    finally:
+        os.remove(dimacsFile)
+
+    sat = None
+    model = []
+    for line in result.stdout.splitlines():
+        if line.startswith('s '):
+            sat = line.split()[1] == 'SATISFIABLE'
+        elif line.startswith('v '):
+            model.extend([int(lit) for lit in line.split()[1:] if lit != '0'])
+    if sat is None:
+        logging.error(f'Unable to parse a result from DIMACS solver "{binary}" (exit code {result.returncode}):\n{result.stdout}{result.stderr}')
+        raise RuntimeError('DIMACS solver returned no result. See log for details.')
+    return sat,model
+
+
+def openSession(name:str,backend:str,plVars:dict):
+    '''
+    Create a solving session for the requested backend. Falls back to a Z3 SolverSession (with a
+    logged warning) when the problem has non-Boolean variables, which cannot be encoded in CNF.
+
+    name    - Name used when logging information about the session
+    backend - Backend string. See module docstring
+    plVars  - Dict of the variables of the problem, used to check that it is purely Boolean
+    '''
+    if backend == defBackend:
+        return SolverSession(name)
+    nonBool = [var for var,varAtts in plVars.items() if varAtts[0] != 'Bool']
+    if nonBool:
+        logging.warning(f'Solver session "{name}" has non-Boolean variables (e.g. "{nonBool[0]}"), so it cannot use the "{backend}" backend. Using Z3 instead.')
+        return SolverSession(name)
+    logging.info(f'Solver session "{name}" using the "{backend}" backend.')
+    return CNFSession(name,backend)
+
+
+def solvePL(name:str,backend:str,plVars:dict,plClauses:list,voi=[]) -> Tuple[bool,dict]:
+    '''
+    Solve one PL problem with the requested backend. Returns values the same way as SolverSession.check.
+
+    name        - Name used when logging information about the problem
+    backend     - Backend string. See module docstring
+    plVars      - Dict of variables and their (varType,varArgs) tuples, as returned by readZ3pl
+    plClauses   - List of clause strings, as returned by readZ3pl
+    voi         - "Variables of interest": a list of all variable names you desire to be returned
+    '''
+    session = openSession(name,backend,plVars)
+    session.declare(plVars)
+    session.add(plClauses)
+    return session.check(voi)
+
+
+def exportDimacs(plVars:dict,plClauses:list,dimacsFile:str) -> None:
+    '''
+    Tseitin-encode a purely Boolean PL problem and write it to a DIMACS file.
+
+    plVars      - Dict of variables and their (varType,varArgs) tuples, as returned by readZ3pl
+    plClauses   - List of clause strings, as returned by readZ3pl
+    dimacsFile  - Desired path and filename of the DIMACS file
+    '''
+    encoder = CNFEncoder()
+    names = list(plVars.keys())
+    index = {var: i for i,var in enumerate(names)}
+    for var,varAtts in plVars.items():
+        if varAtts[0] != 'Bool':
+            raise ValueError(f'variable "{var}" has type {varAtts[0]}, which cannot be encoded in CNF')
+        encoder.declare(var)
+    for clause in plClauses:
+        encoder.assertNode(parseNode(ast.parse(clause.strip(),mode='eval').body,index),names)
+    writeDimacs(encoder,dimacsFile)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+'''
+Set of the DIPs explored by an attack. Each DIP is packed into a single integer, one bit per input in
+a fixed input order, and kept in a hash table along with the round it was first explored in. Checking
+whether a DIP was explored before then takes constant time, rather than a scan over every past DIP.
+For circuits with few enough inputs, a bitmap of the whole input space is also kept, one bit per
+pattern, from which the patterns not yet explored can be listed.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import numpy as np
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+bitmapInputs = 24       # Maximum number of inputs for which a coverage bitmap is kept (2 MiB)
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class DIPSet:
+    '''
+    Hash set of DIPs, packed as integers.
+
+    inList  - List of input names. Input i is bit i of a packed DIP
+    packed  - Dict of packed DIPs and their index, in order of exploration
+    bitmap  - Explored input patterns, bit p of byte-array set if packed pattern p was explored. None if
+                the circuit has more than bitmapInputs inputs
+    '''
+    def __init__(self,inList:list):
+        '''
+        Constructor for DIPSet.
+
+        inList  - List of input names, in the order they are packed
+        '''
+        self.inList = list(inList)
+        self.packed = {}
+        self.bitmap = np.zeros((2**len(self.inList)+7)//8,dtype=np.uint8) if len(self.inList) <= bitmapInputs else None
+
+
+    def __len__(self) -> int:
+        return len(self.packed)
+
+
+    def __contains__(self,dip:dict) -> bool:
+        return self.pack(dip) in self.packed
+
+
+    def pack(self,dip:dict) -> int:
+        '''
+        Return a DIP packed as an integer. Values may be booleans, integers, or "0"/"1" characters.
+        '''
+        return sum(1 << i for i,var in enumerate(self.inList) if int(dip[var]))
+
+
+    def unpack(self,packedDIP:int) -> dict:
+        '''
+        Return a packed DIP as a dict of input names and boolean values.
+        '''
+        return {var: bool((packedDIP >> i) & 1) for i,var in enumerate(self.inList)}
+
+
+    def add(self,dip:dict):
+        '''
+        Add a DIP to the set. Returns the index the DIP was first added at if it is already in the set
+        (it is not added again), else None.
+        '''
+        packedDIP = self.pack(dip)
+        if packedDIP in self.packed:
+            return self.packed[packedDIP]
+        self.packed[packedDIP] = len(self.packed)
+        if self.bitmap is not None:
+            self.bitmap[packedDIP >> 3] |= 1 << (packedDIP & 7)
+        return None
+
+
+    def coverage(self) -> float:
+        '''
+        Return the fraction of the input space explored.
+        '''
+        return len(self.packed) / 2**len(self.inList)
+
+
+    def complete(self) -> bool:
+        '''
+        Return True if every input pattern has been explored. This is the only termination the set decides:
+        whether the remaining patterns are irrelevant to the key is left to the attack's miter.
+        '''
+        return len(self.packed) >= 2**len(self.inList)
+
+
+    def unexplored(self) -> list:
+        '''
+        Return the list of input patterns not yet explored, as dicts. Only available with a bitmap.
+        '''
+        if self.bitmap is None:
+            raise RuntimeError(f'Unexplored input patterns can only be listed for circuits with at most {bitmapInputs} inputs.')
+        explored = np.unpackbits(self.bitmap,count=2**len(self.inList),bitorder='little')
+        return [self.unpack(int(packedDIP)) for packedDIP in np.flatnonzero(explored == 0)]
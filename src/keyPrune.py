@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+'''
+Key-space pruning ahead of a SAT attack. Locked fabrics, and TRAP fabrics in particular, contain many
+key bits whose setting cannot change the circuit's function for the given pin map (don't-care keys),
+and pairs of key bits that can be exchanged without changing it (symmetric keys). Each of them
+multiplies the number of equivalent keys the attack has to distinguish. Once found, every don't-care
+key is fixed to a constant and every symmetric pair is ordered (ki <= kj), which removes equivalent keys
+while keeping at least one key of each equivalence class, so a correct key is still found.
+
+Candidates are filtered by bit-parallel random simulation, when the locked circuit is a functional,
+purely Boolean description, and confirmed by SAT:
+    Don't-care key k        - A miter of two circuit copies that differ only in k (k=0 vs k=1) is UNSAT
+    Symmetric keys ki,kj    - A miter of two circuit copies with ki and kj exchanged is UNSAT
+Relational circuits (e.g. TRAP fabrics, whose switches are implications) can have no consistent
+assignment at all for some inputs and keys, which a miter cannot see. In them, a key is only fixed to
+a value v if every assignment satisfying the circuit with the key at the other value still satisfies it
+with the key at v (true of a switch key Implies(k,(a == b)) for v = False). A key pair is only ordered if
+exchanging the two keys leaves the clauses of the circuit unchanged.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import logging
+from collections import defaultdict
+from typing import Tuple
+import numpy as np
+import z3
+from .plCircuit import PLCircuit,VAR,CONST,NAME,TRUE,canonicalNode,simplifyNode
+from .solverSession import SolverSession
+from .oracle import PyOracle,randomWords,wordOnes
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+defPatterns = 4096          # Number of random patterns simulated per candidate check
+maxPairChecks = 1024        # Maximum number of SAT checks spent on symmetric key pair candidates
+defSeed = 2026              # Seed of the random patterns, so the pruned key space is the same in every run
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def findPrunableKeys(plCircuit:PLCircuit,inVars:list,keyVars:list,outVars:list,hiZVars={},numPatterns=defPatterns,seed=defSeed) -> Tuple[dict,list]:
+    '''
+    Detect don't-care and symmetric key bits of a locked circuit. Returns a dict of don't-care keys and
+    the values they can be fixed to, and a list of (ki,kj) symmetric key pairs that can be ordered so
+    ki implies kj. Pairs never include don't-care keys.
+
+    plCircuit   - Parsed PL circuit of the locked design
+    inVars      - List of input variables
+    keyVars     - List of key variables
+    outVars     - List of output variables
+    hiZVars     - Dict of output variables and their tri-state variables, compared along with the outputs
+    numPatterns - Number of random patterns simulated per candidate. Set to 0 to skip simulation
+    seed        - Seed for the random pattern generator. Candidates, and which symmetric pairs are checked
+                    within maxPairChecks, depend on it
+    '''
+    keys = [var for var in keyVars if var in plCircuit.index and plCircuit.isBool[plCircuit.index[var]]]
+    obsVars = [var for var in list(outVars)+list(hiZVars.values()) if var in plCircuit.index]
+    if not keys or not obsVars:
+        return {},[]
+    try:
+        oracle = PyOracle(plCircuit,list(inVars)+keys,obsVars)
+    except ValueError as err:
+        logging.info(f'Key pruning treats "{plCircuit.name}" as a relational circuit, since it is not a functional description: {err}')
+        oracle = None
+    simulate = oracle is not None and oracle.evaluateWords is not None and numPatterns > 0
+    numWords = -(-numPatterns // 64)
+    rng = np.random.default_rng(seed)
+
+    # Miter of two circuit copies that share their inputs. Keys are compared (or tied) per check
+    miter = SolverSession(f'{plCircuit.name} key pruning miter')
+    for suff in ('_a','_b'):
+        plCircuit.copy(inVars,keys,obsVars,keySuff=suff,outSuff=suff,netSuff=suff,session=miter)
+    miter.add([f'Or({",".join([f"{var}_a != {var}_b" for var in obsVars])})'])
+    keyA = {key: miter.z3Vars[f'{key}_a'] for key in keys}
+    keyB = {key: miter.z3Vars[f'{key}_b'] for key in keys}
+
+    def distinguishable(constraints:list,tied:set) -> bool:
+        miter.push()
+        miter.solver.add([keyA[key] == keyB[key] for key in keys if key not in tied] + constraints)
+        result = miter.solver.check()
+        miter.pop()
+        return result != z3.unsat
+
+    # Don't-care keys
+    candidates = keys
+    if simulate:
+        words = randomWords(len(inVars)+len(keys),numWords,rng.integers(2**32))
+        base = oracle.simulate(words)
+        candidates = []
+        for i,key in enumerate(keys):
+            flipped = words.copy()
+            flipped[len(inVars)+i] ^= wordOnes
+            if not (oracle.simulate(flipped) != base).any():
+                candidates.append(key)
+        logging.info(f'Key pruning simulation left {len(candidates)} of {len(keys)} keys as don\'t-care candidates.')
+    fixedKeys = {}
+    if oracle is None:
+        circuit = z3.Solver()
+        circuit.add(plCircuit.z3Copy(plCircuit.clauses,plCircuit.symbols,{}))
+    for key in candidates:
+        if oracle is None:
+            val = implicationValue(plCircuit,key,circuit)
+            if val is None:
+                continue
+        else:
+            val = False
+        if not distinguishable([z3.Not(keyA[key]),keyB[key]],{key}):
+            fixedKeys[key] = val
+
+    # Symmetric key pairs, bucketed by a signature that symmetric keys must share
+    free = [key for key in keys if key not in fixedKeys]
+    buckets = defaultdict(list)
+    if simulate:
+        inWords = randomWords(len(inVars),numWords,rng.integers(2**32))
+        keyRow = randomWords(1,numWords,rng.integers(2**32))
+        sameKeys = np.vstack([inWords]+[keyRow]*len(keys))      # Every key at the same value in each pattern
+        for key in free:
+            flipped = sameKeys.copy()
+            flipped[len(inVars)+keys.index(key)] ^= wordOnes
+            buckets[oracle.simulate(flipped).tobytes()].append(key)
+    else:
+        for key in free:
+            buckets[keyShape(plCircuit,plCircuit.index[key])].append(key)
+
+    keyPairs = []
+    checks = 0
+    skipped = 0
+    for bucket in buckets.values():
+        for i,keyI in enumerate(bucket):
+            for keyJ in bucket[i+1:]:
+                if oracle is None:
+                    if swapInvariant(plCircuit,plCircuit.index[keyI],plCircuit.index[keyJ]):
+                        keyPairs.append((keyI,keyJ))
+                    continue
+                if simulate:
+                    swapped = words.copy()
+                    rowI,rowJ = len(inVars)+keys.index(keyI),len(inVars)+keys.index(keyJ)
+                    swapped[[rowI,rowJ]] = swapped[[rowJ,rowI]]
+                    if (oracle.simulate(swapped) != base).any():
+                        continue
+                if checks >= maxPairChecks:
+                    skipped += 1
+                    continue
+                checks += 1
+                if not distinguishable([keyA[keyI] == keyB[keyJ],keyA[keyJ] == keyB[keyI],z3.Xor(keyA[keyI],keyA[keyJ])],{keyI,keyJ}):
+                    keyPairs.append((keyI,keyJ))
+
+    if skipped:
+        logging.info(f'Key pruning left {skipped} symmetric key pair candidates unchecked, after {maxPairChecks} SAT checks.')
+    logging.info(f'Key pruning found {len(fixedKeys)} don\'t-care keys and {len(keyPairs)} symmetric key pairs among {len(keyVars)} keys (seed {seed}).')
+    return fixedKeys,keyPairs
+
+
+def implicationValue(plCircuit:PLCircuit,key:str,solver:z3.Solver):
+    '''
+    Return a value v such that every assignment satisfying the circuit with a key at (not v) still
+    satisfies it with the key at v, or None if there is no such value. Only the clauses the key appears
+    in need to be checked, and none at all if they all fold to True with the key at v.
+
+    plCircuit   - Parsed PL circuit
+    key         - Name of a Bool key variable
+    solver      - Z3 solver holding the circuit's clauses over its own variables (see PLCircuit.z3Copy),
+                    reused across calls
+    '''
+    sym = plCircuit.index[key]
+    local = [plCircuit.clauses[i] for i in plCircuit.occurs[sym]]
+    for val in (False,True):
+        if all([simplifyNode(clause,lambda s: (CONST,val) if s == sym else (VAR,s)) == TRUE for clause in local]):
+            return val
+    z3Key = plCircuit.z3Base.z3Vars[key]
+    z3Local = plCircuit.z3Copy(local,plCircuit.symbols,{})
+    for val in (False,True):
+        solver.push()
+        solver.add(z3Key == (not val),z3.Not(z3.substitute(z3Local,(z3Key,z3.BoolVal(val)))))
+        result = solver.check()
+        solver.pop()
+        if result == z3.unsat:
+            return val
+    return None
+
+
+def keyShape(plCircuit:PLCircuit,sym:int) -> tuple:
+    '''
+    Return the clauses a variable appears in, with every other variable made anonymous, as a sorted
+    tuple of strings. Variables that can be exchanged without changing the clauses have the same shape.
+    '''
+    def anonymize(node):
+        if node[0] == VAR:
+            return (VAR,-1 if node[1] == sym else 0)
+        elif node[0] in (CONST,NAME):
+            return node
+        return (node[0],) + tuple(anonymize(arg) for arg in node[1:])
+    return tuple(sorted(repr(canonicalNode(anonymize(plCircuit.clauses[i]))) for i in plCircuit.occurs[sym]))
+
+
+def swapInvariant(plCircuit:PLCircuit,symA:int,symB:int) -> bool:
+    '''
+    Return True if exchanging two variables leaves the clauses of the circuit unchanged.
+    '''
+    swap = {symA:(VAR,symB),symB:(VAR,symA)}
+    touched = sorted(set(plCircuit.occurs[symA]) | set(plCircuit.occurs[symB]))
+    before = sorted(repr(canonicalNode(simplifyNode(plCircuit.clauses[i],lambda sym: (VAR,sym)))) for i in touched)
+    after = sorted(repr(canonicalNode(simplifyNode(plCircuit.clauses[i],lambda sym: swap.get(sym,(VAR,sym))))) for i in touched)
+    return before == after
+
+
+def pruneClauses(fixedKeys:dict,keyPairs:list,suff='') -> list:
+    '''
+    Return the clause strings that fix don't-care keys and order symmetric key pairs.
+
+    fixedKeys   - Dict of don't-care keys and their values, as returned by findPrunableKeys
+    keyPairs    - List of (ki,kj) symmetric key pairs, as returned by findPrunableKeys
+    suff        - Suffix of the key variables (e.g. the copy suffix of a miter)
+    '''
+    return [f'{key}{suff} == {val}' for key,val in fixedKeys.items()] + [f'Implies({keyI}{suff},{keyJ}{suff})' for keyI,keyJ in keyPairs]
@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+'''
+Oracle interfaces shared by the TRANSAT attack tools. Rather than regenerating a testbench and
+recompiling the oracle netlist for every query, a VerilogOracle compiles the netlist once with a
+testbench that reads input vectors from stdin and writes output vectors to stdout. The compiled
+simulator is kept running for the whole attack, so each query is a single line of I/O, and a batch of
+input patterns is streamed through it the same way. Without a running simulator, many input patterns
+can also be evaluated at once in a single simulator run with runiVerilogBatch. A PyOracle evaluates a
+functional Z3-PL description in-process, with no simulator at all. Purely Boolean descriptions are also
+compiled bit-parallel, evaluating 64 input patterns per uint64 word. Structural Verilog gate lists can
+be converted to PL with gatesToPL and evaluated the same way.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import shutil
+import logging
+import subprocess
+import numpy as np
+from .plCircuit import PLCircuit,VAR,CONST,NAME,NEG,renderNode,nodeSymbols
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+oracleTbName = 'oracle_tb.v'
+oracleSimName = 'oracle.vvp'
+batchTbName = 'oracle_batch_tb.v'
+batchSimName = 'oracle_batch.vvp'
+batchInName = 'oracle_batch_in.txt'
+batchOutName = 'oracle_batch_out.txt'
+respPrefix = '@'                # Marks simulator output lines that hold an output vector
+batchChunkBytes = 1 << 15       # Bytes of simulator responses left unread at once by a streamed batch query
+
+# Python equivalents of Z3 functions & operators, used when compiling a PyOracle. Each entry formats
+# a list of already-compiled argument expressions
+pyOps = {
+    'And':      lambda args: '(' + ' and '.join(args) + ')',
+    'Or':       lambda args: '(' + ' or '.join(args) + ')',
+    'Not':      lambda args: f'(not {args[0]})',
+    'Xor':      lambda args: f'({args[0]} != {args[1]})',
+    'Implies':  lambda args: f'((not {args[0]}) or {args[1]})',
+    'If':       lambda args: f'({args[1]} if {args[0]} else {args[2]})',
+    'BoolVal':  lambda args: f'bool({args[0]})',
+    'IntVal':   lambda args: f'int({args[0]})',
+}
+pyInfixOps = {'==','!=','<','<=','>','>=','+','-','*'}
+
+# Bitwise equivalents of Z3 Boolean functions & operators over uint64 words, used when compiling the
+# bit-parallel evaluator of a PyOracle. Each bit of a word holds the value for one input pattern
+wordOps = {
+    'And':      lambda args: '(' + ' & '.join(args) + ')',
+    'Or':       lambda args: '(' + ' | '.join(args) + ')',
+    'Not':      lambda args: f'(~{args[0]})',
+    'Xor':      lambda args: f'({args[0]} ^ {args[1]})',
+    'Implies':  lambda args: f'((~{args[0]}) | {args[1]})',
+    'If':       lambda args: f'(({args[0]} & {args[1]}) | ((~{args[0]}) & {args[2]}))',
+    '==':       lambda args: f'(~({args[0]} ^ {args[1]}))',
+    '!=':       lambda args: f'({args[0]} ^ {args[1]})',
+}
+wordBits = 64
+wordOnes = np.uint64(0xFFFF_FFFF_FFFF_FFFF)
+wordZero = np.uint64(0)
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class VerilogOracle:
+    '''
+    Persistent iVerilog simulation of an oracle netlist. Input vectors are streamed to the compiled
+    simulator through a pipe and output vectors are read back one line per query.
+
+    inList      - List of oracle input names, in the order bits are streamed to the simulator
+    outList     - List of oracle output names, in the order bits are read back from the simulator
+    '''
+    def __init__(self,netlist:str,topLevelMod:str,inList:list,outList:list,runDir:str):
+        '''
+        Constructor for VerilogOracle. Builds the streaming testbench, compiles it along with the
+        oracle netlist, and starts the simulator.
+
+        netlist     - Path to the Verilog netlist of the oracle
+        topLevelMod - Name of the top-level module within the netlist
+        inList      - List of oracle input names
+        outList     - List of oracle output names
+        runDir      - Directory where the testbench and compiled simulator are written
+        '''
+        self.netlist = netlist
+        self.topLevelMod = topLevelMod
+        self.inList = list(inList)
+        self.outList = list(outList)
+        self.runDir = runDir
+        self.tbFile = os.path.join(runDir,oracleTbName)
+        self.simFile = os.path.join(runDir,oracleSimName)
+        self.queries = 0
+
+        if shutil.which('iverilog') is None or shutil.which('vvp') is None:
+            logging.error('iVerilog (iverilog & vvp) must be installed and on the PATH to use a Verilog oracle.')
+            raise RuntimeError('iVerilog not found. See log for details.')
+
+        buildStreamingTestbench(self.tbFile,self.inList,self.outList,topLevelMod)
+        compiled = subprocess.run(['iverilog','-s','tb','-o',self.simFile,self.netlist,self.tbFile],capture_output=True,text=True)
+        if compiled.returncode != 0:
+            logging.error(f'iVerilog was unable to compile oracle netlist "{netlist}":\n{compiled.stderr}')
+            raise RuntimeError('Oracle netlist failed to compile. See log for details.')
+        logging.info(f'Oracle netlist "{netlist}" compiled once to: {self.simFile}')
+
+        self.proc = subprocess.Popen(['vvp','-n',self.simFile],stdin=subprocess.PIPE,stdout=subprocess.PIPE,text=True,bufsize=1)
+
+
+    def query(self,oracleIns:dict) -> dict:
+        '''
+        Query the oracle with a single input pattern. Returns oracle outputs as a dict.
+
+        oracleIns   - Dict of input names and their boolean values
+        '''
+        vec = ''.join(['1' if oracleIns[var] else '0' for var in self.inList])
+        self.send([vec])
+        outVec = self.receive(vec)
+        return {var: bit == '1' for var,bit in zip(self.outList,outVec)}
+
+
+    def queryBatch(self,patterns) -> np.ndarray:
+        '''
+        Query the oracle with many input patterns, streamed through the running simulator. Returns a 2D
+        NumPy bool array with one row per pattern and one column per output, in outList order. Vectors
+        are sent in chunks whose responses fit in the pipe buffer, so the simulator never blocks on output
+        that has not been read yet.
+
+        patterns    - List of input dicts, or 2D array-like of bools with columns in inList order
+        '''
+        inArr = packPatterns(patterns,self.inList)
+        outArr = np.zeros((len(inArr),len(self.outList)),dtype=bool)
+        vecs = [''.join(row) for row in np.where(inArr,'1','0')]
+        chunk = max(1,batchChunkBytes // (len(self.outList)+len(respPrefix)+1))
+        for start in range(0,len(vecs),chunk):
+            self.send(vecs[start:start+chunk])
+            for i,vec in enumerate(vecs[start:start+chunk],start):
+                outArr[i] = [bit == '1' for bit in self.receive(vec)]
+        return outArr
+
+
+    def send(self,vecs:list) -> None:
+        '''
+        Write binary input vectors to the simulator, one per line.
+        '''
+        try:
+            self.proc.stdin.write(''.join([vec+'\n' for vec in vecs]))
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            logging.error(f'Oracle simulator for "{self.netlist}" exited before query #{self.queries+1}.')
+            raise RuntimeError('Oracle simulator exited unexpectedly. See log for details.')
+
+
+    def receive(self,vec:str) -> str:
+        '''
+        Read the simulator's response to the next input vector in line. Returns the binary output vector.
+
+        vec     - Binary input vector the response belongs to, for error reporting
+        '''
+        while True:
+            line = self.proc.stdout.readline()
+            if line == '':
+                logging.error(f'Oracle simulator for "{self.netlist}" exited before answering query #{self.queries+1} ({vec}).')
+                raise RuntimeError('Oracle simulator exited unexpectedly. See log for details.')
+            if line.startswith(respPrefix):
+                break
+            logging.debug(f'Oracle simulator: {line.rstrip()}')     # Simulator warnings, etc.
+
+        outVec = line[len(respPrefix):].strip()
+        if len(outVec) != len(self.outList):
+            logging.error(f'Unable to parse oracle simulator response "{line.rstrip()}" for input vector {vec}')
+            raise RuntimeError('Unable to parse oracle simulator response. See log for details.')
+        checkOutVector(outVec,self.outList,self.netlist,vec)
+
+        self.queries += 1
+        return outVec
+
+
+    def close(self) -> None:
+        '''
+        Stop the simulator. Closing its stdin ends the testbench's read loop.
+        '''
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        logging.info(f'Oracle simulator for "{self.netlist}" closed after {self.queries} queries.')
+
+
+class PyOracle:
+    '''
+    In-process oracle for a functional circuit described in Z3-PL. Every net must be defined by an
+    equality clause (e.g. "n1 == Not(And(a,b))"). The definitions are ordered topologically once and
+    compiled into a straight-line Python function, so each query is a single function call.
+
+    If every variable is a Bool, a second, bit-parallel evaluator is compiled as well. It takes one
+    uint64 array per input and evaluates 64 patterns per word with NumPy bitwise operations.
+
+    inList      - List of oracle input names, in the order they are passed to the evaluator
+    outList     - List of oracle output names, in the order they are returned by the evaluator
+    order       - List of symbol numbers of nets, in the order they are evaluated
+    source      - Python source of the compiled evaluator, kept for debugging
+    wordSource  - Python source of the bit-parallel evaluator, or None if it could not be compiled
+    '''
+    def __init__(self,plCircuit:PLCircuit,inList:list,outList:list):
+        '''
+        Constructor for PyOracle. Orders the circuit's definitions and compiles the evaluators.
+        Raises ValueError if the circuit is not a functional description. Use buildPyOracle to log
+        the reason and raise a RuntimeError instead.
+
+        plCircuit   - Parsed PL circuit of the unencrypted (functional) design
+        inList      - List of oracle input names
+        outList     - List of oracle output names
+        '''
+        self.name = plCircuit.name
+        self.inList = list(inList)
+        self.outList = list(outList)
+        self.queries = 0
+
+        self.defs = findDefinitions(plCircuit,self.inList)
+        self.order = orderDefinitions(plCircuit,self.defs,self.inList,self.outList)
+        self.source = compileEvaluator(plCircuit,self.defs,self.order,self.inList,self.outList)
+        namespace = {}
+        exec(compile(self.source,f'<oracle {self.name}>','exec'),namespace)
+        self.evaluate = namespace['evaluate']
+
+        # Bit-parallel evaluator, only for purely Boolean circuits
+        self.wordSource = None
+        self.evaluateWords = None
+        used = [plCircuit.index[var] for var in self.inList if var in plCircuit.index] + self.order
+        if all([plCircuit.plVars[plCircuit.symbols[sym]][0] == 'Bool' for sym in used]):
+            try:
+                self.wordSource = compileEvaluator(plCircuit,self.defs,self.order,self.inList,self.outList,fnName='evaluateWords',exprFn=wordExpr)
+            except ValueError as err:
+                logging.debug(f'Python oracle "{self.name}" has no bit-parallel evaluator: {err}')
+        if self.wordSource is not None:
+            namespace = {'wordOnes':wordOnes,'wordZero':wordZero}
+            exec(compile(self.wordSource,f'<oracle {self.name} words>','exec'),namespace)
+            self.evaluateWords = namespace['evaluateWords']
+
+        logging.info(f'Python oracle "{self.name}" compiled: {len(self.order)} nets evaluated per query{" (bit-parallel)" if self.evaluateWords else ""}.')
+
+
+    def query(self,oracleIns:dict) -> dict:
+        '''
+        Query the oracle with a single input pattern. Returns oracle outputs as a dict.
+
+        oracleIns   - Dict of input names and their boolean values
+        '''
+        self.queries += 1
+        outVals = self.evaluate(*[bool(oracleIns[var]) for var in self.inList])
+        return dict(zip(self.outList,outVals))
+
+
+    def queryBatch(self,patterns) -> np.ndarray:
+        '''
+        Query the oracle with many input patterns. Returns a 2D NumPy bool array with one row per
+        pattern and one column per output, in outList order.
+
+        patterns    - List of input dicts, or 2D array-like of bools with columns in inList order
+        '''
+        inArr = packPatterns(patterns,self.inList)
+        self.queries += len(inArr)
+        if self.evaluateWords is not None:
+            return unpackWords(self.simulate(packWords(inArr)),len(inArr))
+        outArr = np.array([self.evaluate(*row) for row in inArr.tolist()],dtype=bool)
+        return outArr.reshape(-1,len(self.outList))
+
+
+    def simulate(self,inWords:np.ndarray) -> np.ndarray:
+        '''
+        Bit-parallel simulation. Returns a 2D uint64 array with one row of words per output, in
+        outList order. Only available for purely Boolean circuits (see evaluateWords).
+
+        inWords     - 2D uint64 array with one row of words per input, in inList order. Bit j of word
+                        w holds the input value for pattern (64*w + j)
+        '''
+        if self.evaluateWords is None:
+            raise RuntimeError(f'Python oracle "{self.name}" has no bit-parallel evaluator, since it is not purely Boolean.')
+        outWords = self.evaluateWords(*inWords)
+        return np.array([np.broadcast_to(word,inWords.shape[1:]) for word in outWords],dtype=np.uint64).reshape(len(self.outList),-1)
+
+
+    def close(self) -> None:
+        logging.info(f'Python oracle "{self.name}" closed after {self.queries} queries.')
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def buildPyOracle(plCircuit:PLCircuit,inList:list,outList:list) -> PyOracle:
+    '''
+    Create a PyOracle, logging why the circuit could not be compiled if it is not a functional
+    description.
+
+    plCircuit   - Parsed PL circuit of the unencrypted (functional) design
+    inList      - List of oracle input names
+    outList     - List of oracle output names
+    '''
+    try:
+        return PyOracle(plCircuit,inList,outList)
+    except ValueError as err:
+        logging.error(f'Unable to compile "{plCircuit.name}" as a Python oracle: {err}')
+        raise RuntimeError(f'Unable to compile Python oracle "{plCircuit.name}". See log for details.')
+
+
+def buildStreamingTestbench(tb:str,inList:list,outList:list,topLevelMod='top'):
+    '''
+    Create a Verilog testbench that reads one binary input vector per line from stdin, applies it to
+    the oracle, and displays the resulting output vector. Loops until stdin is closed.
+
+    tb          - Desired filename and path for HDL testbench to be created
+    inList      - List of oracle input names. The first input is the most significant vector bit
+    outList     - List of oracle output names. The first output is the most significant vector bit
+    topLevelMod - Name of the top-level module within the oracle netlist
+    '''
+    portDec = ','.join([f'.{var}({var})' for var in (inList + outList)])
+    ins = ','.join(inList)
+    outs = ','.join(outList)
+
+    tbTemplate = f'''// Streaming testbench for iVerilog oracle. Automatically generated by TRANSAT.
+`timescale 10ms/1ms
+
+module tb();
+    reg {ins};
+    wire {outs};
+    reg [{len(inList)-1}:0] tbVec;
+    integer tbRead;
+
+    {topLevelMod} dut({portDec});
+
+    initial begin
+        tbRead = $fscanf(32'h8000_0000,"%b",tbVec);
+        while (tbRead == 1) begin
+            {{{ins}}} = tbVec;
+            #1
+            $display("{respPrefix}%b",{{{outs}}});
+            $fflush;
+            tbRead = $fscanf(32'h8000_0000,"%b",tbVec);
+        end
+        $finish;
+    end
+
+endmodule'''
+
+    with open(tb,'w') as f:
+        f.write(tbTemplate)
+
+
+def checkOutVector(outVec:str,outList:list,netlist:str,inVec:str) -> None:
+    '''
+    Check that a binary output vector read back from the simulator only holds 0 and 1 bits. Unknown (x)
+    and high-impedance (z) outputs have no Boolean value to constrain the key with, so they are an error
+    rather than being read as either value.
+
+    outVec      - Output vector, one character per output in outList order
+    outList     - List of oracle output names
+    netlist     - Path to the Verilog netlist of the oracle, for error reporting
+    inVec       - Binary input vector the outputs belong to, for error reporting
+    '''
+    badOuts = [f'{var}={bit}' for var,bit in zip(outList,outVec) if bit not in '01']
+    if badOuts:
+        logging.error(f'Oracle "{netlist}" drove outputs that are not 0 or 1 for input vector {inVec}: {", ".join(badOuts)}. Oracle outputs must be fully driven, since x and z values cannot constrain the key.')
+        raise RuntimeError('Oracle returned x or z output values. See log for details.')
+
+
+def packPatterns(patterns,inList:list) -> np.ndarray:
+    '''
+    Convert input patterns into a 2D NumPy bool array with one row per pattern and one column per
+    input, in inList order.
+
+    patterns    - List of input dicts, or 2D array-like of bools with columns in inList order
+    inList      - List of input names
+    '''
+    if isinstance(patterns,np.ndarray):
+        inArr = patterns.astype(bool).reshape(-1,len(inList))
+    else:
+        inArr = np.array([[pat[var] for var in inList] if isinstance(pat,dict) else pat for pat in patterns],dtype=bool).reshape(-1,len(inList))
+    return inArr
+
+
+def buildBatchTestbench(tb:str,vecFile:str,outFile:str,numVecs:int,inList:list,outList:list,topLevelMod='top'):
+    '''
+    Create a Verilog testbench that loads every input vector from a file with $readmemb, applies each
+    one to the oracle in turn, and writes one output vector per line to a file.
+
+    tb          - Desired filename and path for HDL testbench to be created
+    vecFile     - File of binary input vectors, one per line
+    outFile     - File the output vectors are written to
+    numVecs     - Number of input vectors in vecFile
+    inList      - List of oracle input names. The first input is the most significant vector bit
+    outList     - List of oracle output names. The first output is the most significant vector bit
+    topLevelMod - Name of the top-level module within the oracle netlist
+    '''
+    portDec = ','.join([f'.{var}({var})' for var in (inList + outList)])
+    ins = ','.join(inList)
+    outs = ','.join(outList)
+
+    tbTemplate = f'''// Batch testbench for iVerilog oracle. Automatically generated by TRANSAT.
+`timescale 10ms/1ms
+
+module tb();
+    reg {ins};
+    wire {outs};
+    reg [{len(inList)-1}:0] tbVecs [0:{numVecs-1}];
+    integer tbIdx;
+    integer f;
+
+    {topLevelMod} dut({portDec});
+
+    initial begin
+        $readmemb("{vecFile}",tbVecs);
+        f = $fopen("{outFile}","w");
+        for (tbIdx = 0; tbIdx < {numVecs}; tbIdx = tbIdx + 1) begin
+            {{{ins}}} = tbVecs[tbIdx];
+            #1
+            $fwrite(f,"%b\\n",{{{outs}}});
+        end
+        $fclose(f);
+        $finish;
+    end
+
+endmodule'''
+
+    with open(tb,'w') as f:
+        f.write(tbTemplate)
+
+
+def runiVerilogBatch(patterns,netlist:str,topLevelMod:str,inList:list,outList:list,runDir:str) -> np.ndarray:
+    '''
+    Evaluate many input patterns on an oracle netlist with a single iVerilog simulation. Returns a 2D
+    NumPy bool array with one row per pattern and one column per output, in outList order.
+
+    patterns    - List of input dicts, or 2D array-like of bools with columns in inList order
+    netlist     - Path to the Verilog netlist of the oracle
+    topLevelMod - Name of the top-level module within the netlist
+    inList      - List of oracle input names
+    outList     - List of oracle output names
+    runDir      - Directory where the testbench, vector files, and compiled simulator are written
+    '''
+    inArr = packPatterns(patterns,inList)
+    if len(inArr) == 0:
+        return np.zeros((0,len(outList)),dtype=bool)
+
+    tbFile = os.path.join(runDir,batchTbName)
+    simFile = os.path.join(runDir,batchSimName)
+    vecFile = os.path.join(runDir,batchInName)
+    outFile = os.path.join(runDir,batchOutName)
+
+    # Write input vectors, one binary string per line
+    with open(vecFile,'w') as f:
+        f.writelines([''.join(row)+'\n' for row in np.where(inArr,'1','0')])
+
+    buildBatchTestbench(tbFile,vecFile,outFile,len(inArr),inList,outList,topLevelMod)
+    compiled = subprocess.run(['iverilog','-s','tb','-o',simFile,netlist,tbFile],capture_output=True,text=True)
+    if compiled.returncode != 0:
+        logging.error(f'iVerilog was unable to compile oracle netlist "{netlist}":\n{compiled.stderr}')
+        raise RuntimeError('Oracle netlist failed to compile. See log for details.')
+    simulated = subprocess.run(['vvp','-n',simFile],capture_output=True,text=True)
+    if simulated.returncode != 0:
+        logging.error(f'Batch oracle simulation of "{netlist}" failed:\n{simulated.stdout}{simulated.stderr}')
+        raise RuntimeError('Batch oracle simulation failed. See log for details.')
+
+    with open(outFile,'r') as f:
+        lines = [line.strip() for line in f if line.strip() != '']
+    if len(lines) != len(inArr) or any(len(line) != len(outList) for line in lines):
+        logging.error(f'Batch oracle simulation of "{netlist}" returned {len(lines)} output vectors for {len(inArr)} input vectors, or a vector of the wrong width.')
+        raise RuntimeError('Unable to parse batch oracle simulation output. See log for details.')
+    for line,row in zip(lines,np.where(inArr,'1','0')):
+        checkOutVector(line,outList,netlist,''.join(row))
+    outArr = np.array([[bit == '1' for bit in line] for line in lines],dtype=bool).reshape(-1,len(outList))
+
+    # Delete extraneous files: compiled simulator, testbench, vector files
+    for fn in (simFile,tbFile,vecFile,outFile):
+        os.remove(fn)
+
+    return outArr
+
+
+def findDefinitions(plCircuit:PLCircuit,inList:list) -> dict:
+    '''
+    Find the clause that defines each net of a functional PL circuit. Returns a dict mapping symbol
+    numbers to the expression tree that defines them.
+
+    Clauses that define a net with a logic expression (e.g. "n1 == Not(a)") are matched first, then
+    clauses that tie two nets together (e.g. "n1 == o"), so each net is defined exactly once.
+
+    plCircuit   - Parsed PL circuit
+    inList      - List of input names. Inputs are never defined by a clause
+    '''
+    inSyms = {plCircuit.index[var] for var in inList if var in plCircuit.index}
+    defs = {}
+    remaining = []
+    for clause in plCircuit.clauses:
+        if clause[0] == '==' and clause[1][0] == VAR and clause[2][0] != VAR and clause[1][1] not in inSyms|defs.keys():
+            defs[clause[1][1]] = clause[2]
+        elif clause[0] == '==' and clause[2][0] == VAR and clause[1][0] != VAR and clause[2][1] not in inSyms|defs.keys():
+            defs[clause[2][1]] = clause[1]
+        else:
+            remaining.append(clause)
+
+    for clause in remaining:
+        if clause[0] == '==' and clause[1][0] == VAR and clause[1][1] not in inSyms|defs.keys():
+            defs[clause[1][1]] = clause[2]
+        elif clause[0] == '==' and clause[2][0] == VAR and clause[2][1] not in inSyms|defs.keys():
+            defs[clause[2][1]] = clause[1]
+        else:
+            raise ValueError(f'clause "{renderNode(clause,plCircuit.symbols)}" does not define a net. Python oracles must be purely functional')
+
+    return defs
+
+
+def orderDefinitions(plCircuit:PLCircuit,defs:dict,inList:list,outList:list) -> list:
+    '''
+    Topologically order the definitions needed to compute every output. Returns a list of symbol
+    numbers in evaluation order. Nets that do not affect an output are left out.
+
+    plCircuit   - Parsed PL circuit
+    defs        - Dict of net definitions, as returned by findDefinitions
+    inList      - List of input names
+    outList     - List of output names
+    '''
+    inSyms = {plCircuit.index[var] for var in inList if var in plCircuit.index}
+    order = []
+    state = {}      # Symbol number -> 1 while its fan-in is being visited, 2 once it is ordered
+    for out in outList:
+        if out not in plCircuit.index:
+            raise ValueError(f'output "{out}" is not declared')
+        stack = [(plCircuit.index[out],False)]
+        while stack:
+            sym,expanded = stack.pop()
+            if sym in inSyms or state.get(sym) == 2:
+                continue
+            if expanded:
+                state[sym] = 2
+                order.append(sym)
+                continue
+            if state.get(sym) == 1:
+                raise ValueError(f'combinational loop through net "{plCircuit.symbols[sym]}". Python oracles must be acyclic')
+            if sym not in defs:
+                raise ValueError(f'net "{plCircuit.symbols[sym]}" is never defined by a clause')
+            state[sym] = 1
+            stack.append((sym,True))
+            stack.extend([(dep,False) for dep in nodeSymbols(defs[sym])])
+
+    return order
+
+
+def compileEvaluator(plCircuit:PLCircuit,defs:dict,order:list,inList:list,outList:list,fnName='evaluate',exprFn=None) -> str:
+    '''
+    Write the Python source of a straight-line evaluator function that takes input values in inList
+    order and returns a tuple of output values in outList order.
+
+    plCircuit   - Parsed PL circuit
+    defs        - Dict of net definitions, as returned by findDefinitions
+    order       - Evaluation order, as returned by orderDefinitions
+    inList      - List of input names
+    outList     - List of output names
+    fnName      - Name of the evaluator function
+    exprFn      - Function converting an expression tree into a Python expression. Defaults to pyExpr
+    '''
+    if exprFn is None:
+        exprFn = pyExpr
+    names = [f'v{i}' for i in range(len(plCircuit.symbols))]
+    params = [names[plCircuit.index[var]] if var in plCircuit.index else f'_{i}' for i,var in enumerate(inList)]
+    lines = [f'def {fnName}({",".join(params)}):']
+    for sym in order:
+        lines.append(f'    {names[sym]} = {exprFn(defs[sym],names,plCircuit)}   # {plCircuit.symbols[sym]}')
+    lines.append(f'    return ({"".join([names[plCircuit.index[var]]+"," for var in outList])})')
+    return '\n'.join(lines) + '\n'
+
+
+def pyExpr(node:tuple,names:list,plCircuit:PLCircuit) -> str:
+    '''
+    Convert an expression tree into a Python expression string.
+
+    node        - Expression tree
+    names       - List of Python identifiers indexed by symbol number
+    plCircuit   - Parsed PL circuit the node belongs to, used for error reporting
+    '''
+    op = node[0]
+    if op == VAR:
+        return names[node[1]]
+    elif op == CONST:
+        return repr(node[1])
+    elif op == NEG:
+        return f'(-{pyExpr(node[1],names,plCircuit)})'
+    elif op in pyInfixOps:
+        return f'({pyExpr(node[1],names,plCircuit)} {op} {pyExpr(node[2],names,plCircuit)})'
+    elif op in pyOps:
+        return pyOps[op]([pyExpr(arg,names,plCircuit) for arg in node[1:]])
+    raise ValueError(f'"{node[1] if op == NAME else op}" cannot be compiled. Supported functions: {", ".join(pyOps)}')
+
+
+def wordExpr(node:tuple,names:list,plCircuit:PLCircuit) -> str:
+    '''
+    Convert a Boolean expression tree into a bit-parallel Python expression over uint64 words.
+
+    node        - Expression tree
+    names       - List of Python identifiers indexed by symbol number
+    plCircuit   - Parsed PL circuit the node belongs to
+    '''
+    op = node[0]
+    if op == VAR:
+        return names[node[1]]
+    elif op == CONST and node[1] is True:
+        return 'wordOnes'
+    elif op == CONST and node[1] is False:
+        return 'wordZero'
+    elif op in wordOps:
+        return wordOps[op]([wordExpr(arg,names,plCircuit) for arg in node[1:]])
+    raise ValueError(f'"{node[1] if op in (NAME,CONST) else op}" has no bit-parallel equivalent')
+
+
+def packWords(inArr:np.ndarray) -> np.ndarray:
+    '''
+    Pack a 2D bool array of patterns (one row per pattern) into a 2D uint64 array with one row of
+    words per column. Bit j of word w holds the value for pattern (64*w + j). Unused bits are 0.
+
+    inArr   - 2D bool array, as returned by packPatterns
+    '''
+    numWords = -(-len(inArr) // wordBits)
+    padded = np.zeros((inArr.shape[1],numWords*wordBits),dtype=bool)
+    padded[:,:len(inArr)] = inArr.T
+    return np.ascontiguousarray(np.packbits(padded,axis=1,bitorder='little')).view('<u8').astype(np.uint64)
+
+
+def unpackWords(words:np.ndarray,numPatterns:int) -> np.ndarray:
+    '''
+    Unpack a 2D uint64 array with one row of words per signal into a 2D bool array with one row per
+    pattern and one column per signal. Inverse of packWords.
+
+    words       - 2D uint64 array, as returned by packWords or PyOracle.simulate
+    numPatterns - Number of patterns packed into the words
+    '''
+    bits = np.unpackbits(np.ascontiguousarray(words.astype('<u8')).view(np.uint8),axis=1,bitorder='little')
+    return bits[:,:numPatterns].T.astype(bool)
+
+
+def exhaustivePatterns(numIns:int) -> np.ndarray:
+    '''
+    Return every input pattern as a 2D bool array, in counting order. The first input is the most
+    significant bit.
+
+    numIns  - Number of inputs
+    '''
+    counts = np.arange(2**numIns,dtype=np.uint64)[:,None]
+    shifts = np.arange(numIns-1,-1,-1,dtype=np.uint64)
+    return ((counts >> shifts) & np.uint64(1)).astype(bool)
+
+
+def randomWords(numIns:int,numWords:int,seed=None) -> np.ndarray:
+    '''
+    Return uniformly random input words, i.e. 64 random patterns per word, as a 2D uint64 array with
+    one row per input.
+
+    numIns      - Number of inputs
+    numWords    - Number of words per input
+    seed        - Seed for the random number generator
+    '''
+    rng = np.random.default_rng(seed)
+    return rng.integers(0,np.iinfo(np.uint64).max,size=(numIns,numWords),dtype=np.uint64,endpoint=True)
+
+
+def gatesToPL(varsDict:dict,gates:list) -> tuple:
+    '''
+    Convert a structural Verilog gate list, as returned by abcAttack.readVerilog, into PL variables
+    and equality clauses that can be compiled into a PyOracle. Returns a dict of variables and a
+    list of clause strings, in the same formats as readZ3pl.
+
+    varsDict    - Dict of Verilog net names and their declared types (input, key, output, wire)
+    gates       - List of gate primitive strings, e.g. "nand(n1,a,b)". The first port is the output
+    '''
+    plVars = {var: ('Bool',None) for var in varsDict}
+    plClauses = []
+    for gate in gates:
+        prim = gate[:gate.index('(')].strip().lower()
+        ports = [port.strip() for port in gate[gate.index('(')+1:gate.rindex(')')].split(',')]
+        out,ins = ports[0],ports[1:]
+        for var in ports:
+            plVars.setdefault(var,('Bool',None))
+        if prim in ('and','nand'):
+            expr = f'And({",".join(ins)})'
+        elif prim in ('or','nor'):
+            expr = f'Or({",".join(ins)})'
+        elif prim in ('xor','xnor'):
+            expr = ins[0]
+            for var in ins[1:]:
+                expr = f'Xor({expr},{var})'
+        elif prim in ('not','buf'):
+            expr = ins[0]
+        else:
+            raise ValueError(f'unsupported gate primitive "{prim}"')
+        if prim in ('nand','nor','xnor','not'):
+            expr = f'Not({expr})'
+        plClauses.append(f'{out} == {expr}')
+
+    return plVars,plClauses
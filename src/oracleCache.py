@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+'''
+On-disk cache of oracle responses, shared between runs. Responses are stored in a SQLite database
+keyed by a hash of the oracle file, its top-level module, its I/O names, and the input vector, so
+repeated attacks on the same oracle (parameter sweeps, different locked fabrics mapping the same
+function, recovery runs) skip simulation for every input pattern seen before. The least recently
+used responses are evicted once the cache grows past its size bound. Lookups never write to the
+database: the last use times of cache hits are kept in memory, and written out along with the next size
+check or when the cache is closed. The attack tools keep the cache in
+their work/ directory by default, and only use the per-user cache directory shared by every run on request.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import numpy as np
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+cacheName = 'oracleCache.sqlite'
+cacheHome = os.environ.get('XDG_CACHE_HOME',os.path.join(os.path.expanduser('~'),'.cache'))
+sharedCacheFile = os.path.join(cacheHome,'transat',cacheName)     # Per-user cache shared by every run
+defCacheEntries = 1000000       # Size bound, in cached responses, across all oracles
+trimInterval = 4096             # Number of new responses between size checks
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class OracleCache:
+    '''
+    Cached responses of a single oracle.
+
+    oracleID    - Hash identifying the oracle: file contents, top-level module, and I/O names
+    inList      - List of oracle input names, in the order input vectors are written
+    outList     - List of oracle output names, in the order output vectors are written
+    hits        - Number of queries answered by the cache
+    misses      - Number of queries not found in the cache
+    '''
+    def __init__(self,oracleFile:str,topLevelMod:str,inList:list,outList:list,cacheFile=sharedCacheFile,maxEntries=defCacheEntries):
+        '''
+        Constructor for OracleCache. Opens (or creates) the cache database.
+
+        oracleFile  - Path to the oracle netlist (or Python oracle) file
+        topLevelMod - Name of the top-level module within the oracle file
+        inList      - List of oracle input names
+        outList     - List of oracle output names
+        cacheFile   - Path to the SQLite cache database
+        maxEntries  - Maximum number of responses kept in the database, across all oracles
+        '''
+        self.inList = list(inList)
+        self.outList = list(outList)
+        self.cacheFile = cacheFile
+        self.maxEntries = maxEntries
+        self.hits = 0
+        self.misses = 0
+        self.newEntries = 0
+        self.used = {}              # Input vectors of cache hits and their last use times, not yet written out
+
+        digest = hashlib.sha256()
+        with open(oracleFile,'rb') as f:
+            digest.update(f.read())
+        digest.update('\0'.join([str(topLevelMod),','.join(self.inList),','.join(self.outList)]).encode())
+        self.oracleID = digest.hexdigest()
+
+        os.makedirs(os.path.dirname(os.path.abspath(cacheFile)),exist_ok=True)
+        self.db = sqlite3.connect(cacheFile,timeout=30)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS responses (oracle TEXT, inVec TEXT, outVec TEXT, lastUsed REAL, PRIMARY KEY (oracle,inVec))')
+        self.db.execute('CREATE INDEX IF NOT EXISTS responsesLastUsed ON responses (lastUsed)')
+        self.db.commit()
+        self.trim()
+
+
+    def lookup(self,oracleIns:dict):
+        '''
+        Return the cached oracle outputs as a dict for one input pattern, or None if not cached.
+
+        oracleIns   - Dict of input names and their boolean values
+        '''
+        outVecs = self._fetch([vecOf([oracleIns[var] for var in self.inList])])
+        if not outVecs:
+            self.misses += 1
+            return None
+        self.hits += 1
+        outVec = next(iter(outVecs.values()))
+        return {var: bit == '1' for var,bit in zip(self.outList,outVec)}
+
+
+    def store(self,oracleIns:dict,oracleOut:dict) -> None:
+        '''
+        Cache the oracle outputs for one input pattern.
+
+        oracleIns   - Dict of input names and their boolean values
+        oracleOut   - Dict of output names and their boolean values
+        '''
+        self._insert([(vecOf([oracleIns[var] for var in self.inList]),vecOf([oracleOut[var] for var in self.outList]))])
+
+
+    def lookupBatch(self,inArr:np.ndarray):
+        '''
+        Look up many input patterns at once. Returns a 2D bool array of outputs (one row per pattern,
+        columns in outList order) and a 1D bool array marking which patterns were cached.
+
+        inArr   - 2D bool array with one row per pattern and columns in inList order
+        '''
+        inVecs = [vecOf(row) for row in inArr.tolist()]
+        outVecs = self._fetch(inVecs)
+        outArr = np.zeros((len(inVecs),len(self.outList)),dtype=bool)
+        hitMask = np.zeros(len(inVecs),dtype=bool)
+        for i,inVec in enumerate(inVecs):
+            if inVec in outVecs:
+                outArr[i] = [bit == '1' for bit in outVecs[inVec]]
+                hitMask[i] = True
+        self.hits += int(hitMask.sum())
+        self.misses += int(len(inVecs) - hitMask.sum())
+        return outArr,hitMask
+
+
+    def storeBatch(self,inArr:np.ndarray,outArr:np.ndarray) -> None:
+        '''
+        Cache the oracle outputs for many input patterns.
+
+        inArr   - 2D bool array with one row per pattern and columns in inList order
+        outArr  - 2D bool array with one row per pattern and columns in outList order
+        '''
+        self._insert([(vecOf(inRow),vecOf(outRow)) for inRow,outRow in zip(inArr.tolist(),outArr.tolist())])
+
+
+    def trim(self) -> None:
+        '''
+        Evict the least recently used responses once the cache holds more than maxEntries. Pending last
+        use times are written out first.
+        '''
+        self.flushUsed()
+        numEntries = self.db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        if numEntries > self.maxEntries:
+            self.db.execute('DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses ORDER BY lastUsed LIMIT ?)',(numEntries-self.maxEntries,))
+            self.db.commit()
+            logging.info(f'Oracle cache "{self.cacheFile}" trimmed by {numEntries-self.maxEntries} least recently used responses.')
+
+
+    def close(self) -> None:
+        self.trim()
+        self.db.close()
+        logging.info(f'Oracle cache: {self.hits} hits, {self.misses} misses.')
+
+
+    def flushUsed(self) -> None:
+        '''
+        Write the last use times of cache hits kept in memory to the database, in one transaction.
+        '''
+        if self.used:
+            self.db.executemany('UPDATE responses SET lastUsed = ? WHERE oracle = ? AND inVec = ?',[(lastUsed,self.oracleID,inVec) for inVec,lastUsed in self.used.items()])
+            self.db.commit()
+            self.used = {}
+
+
+    def _fetch(self,inVecs:list) -> dict:
+        '''
+        Return a dict of cached output vectors for the given input vectors, refreshing their last
+        use time in memory.
+        '''
+        outVecs = {}
+        for i in range(0,len(inVecs),500):      # Stay below SQLite's limit on query parameters
+            chunk = inVecs[i:i+500]
+            rows = self.db.execute(f'SELECT inVec,outVec FROM responses WHERE oracle = ? AND inVec IN ({",".join("?"*len(chunk))})',[self.oracleID]+chunk).fetchall()
+            outVecs.update(rows)
+        now = time.time()
+        self.used.update({inVec: now for inVec in outVecs})
+        return outVecs
+
+
+    def _insert(self,vecPairs:list) -> None:
+        now = time.time()
+        self.db.executemany('INSERT OR REPLACE INTO responses VALUES (?,?,?,?)',[(self.oracleID,inVec,outVec,now) for inVec,outVec in vecPairs])
+        self.db.commit()
+        self.newEntries += len(vecPairs)
+        if self.newEntries >= trimInterval:
+            self.newEntries = 0
+            self.trim()
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def vecOf(vals) -> str:
+    '''
+    Convert a sequence of boolean values into a binary string.
+    '''
+    return ''.join(['1' if val else '0' for val in vals])
+
+
+def openOracleCache(oracleFile:str,topLevelMod:str,inList:list,outList:list,cacheFile=sharedCacheFile,maxEntries=defCacheEntries):
+    '''
+    Open the oracle cache, or return None (with a logged warning) if the cache database cannot be
+    used, so that an attack can still proceed without it.
+
+    See OracleCache for a description of arguments.
+    '''
+    try:
+        cache = OracleCache(oracleFile,topLevelMod,inList,outList,cacheFile,maxEntries)
+    except (OSError,sqlite3.Error) as err:
+        logging.warning(f'Unable to open oracle cache "{cacheFile}", continuing without it: {err}')
+        return None
+    logging.info(f'Oracle cache opened at: {cacheFile}')
+    return cache
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+'''
+Per-phase timing and counters for iterative tools. A PhaseStats collector accumulates the time spent
+in named phases (solving, oracle queries, circuit copies, file I/O, ...) and arbitrary counters during
+a round, then writes the round as one JSON line to a file next to the tool's log. Phases can be timed
+from anywhere in a tool through the module-level phase() context manager, which does nothing when no
+collector is active. Phases may nest: an enclosing phase includes the time of the phases within it.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import json
+import time
+import logging
+from contextlib import contextmanager
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+activeStats = None      # PhaseStats collector that phase() records into, if any
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class PhaseStats:
+    '''
+    Collector of per-round phase times and counters, written out as JSON lines.
+
+    jsonlFile   - Path to the JSON lines file. Each record is appended as one line
+    phases      - Dict of phase names and their accumulated time in seconds, for the current round
+    counts      - Dict of counter names and values, for the current round
+    '''
+    def __init__(self,jsonlFile:str):
+        '''
+        Constructor for PhaseStats. Makes this collector the active one.
+
+        jsonlFile   - Path to the JSON lines file. It is created if it does not exist
+        '''
+        global activeStats
+        self.jsonlFile = jsonlFile
+        self.startTime = time.time()
+        self.phases = {}
+        self.counts = {}
+        activeStats = self
+
+
+    def add(self,phaseName:str,seconds:float) -> None:
+        self.phases[phaseName] = self.phases.get(phaseName,0.0) + seconds
+
+
+    def count(self,countName:str,value) -> None:
+        '''
+        Set a counter (or any JSON-serializable value) for the current round.
+        '''
+        self.counts[countName] = value
+
+
+    def endRound(self,roundName,**extra) -> None:
+        '''
+        Write the current round as a JSON line and start a new round.
+
+        roundName   - Round number or name, recorded as "round"
+        extra       - Additional JSON-serializable fields, e.g. solver statistics
+        '''
+        record = {'round':roundName,'elapsed':round(time.time()-self.startTime,6),
+                  'phases':{name: round(seconds,6) for name,seconds in self.phases.items()},'counts':self.counts} | extra
+        try:
+            with open(self.jsonlFile,'a') as f:
+                f.write(json.dumps(record,default=str) + '\n')
+        except OSError as err:
+            logging.warning(f'Unable to write phase statistics to "{self.jsonlFile}": {err}')
+        self.phases = {}
+        self.counts = {}
+
+
+    def close(self) -> None:
+        global activeStats
+        if activeStats is self:
+            activeStats = None
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+@contextmanager
+def phase(phaseName:str):
+    '''
+    Time the enclosed block as the named phase of the active collector. Does nothing if no collector
+    is active.
+
+    phaseName   - Name of the phase
+    '''
+    if activeStats is None:
+        yield
+        return
+    startTime = time.perf_counter()
+    try:
+        yield
+    finally:
+        if activeStats is not None:
+            activeStats.add(phaseName,time.perf_counter()-startTime)
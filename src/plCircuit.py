@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+'''
+Parsed representation of propositional logic (PL) clauses written with the Z3 Python API. Clause
+strings are parsed once into expression trees whose variables are interned as symbol numbers, so a
+circuit copy only needs a new list of symbol names rather than a textual rewrite of every clause.
+Copies whose inputs and outputs are fixed to constants can also be reduced to their key-dependent
+residue before they are handed to a solver. Copies added to a Z3 session are not evaluated from their
+clause strings either: each clause is built into a Z3 expression over the circuit's own variables once,
+and copies are instantiated from it by substitution, so they share the base expressions' structure.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import ast
+import logging
+import z3
+from collections import defaultdict,deque
+from typing import Tuple
+from .solverSession import SolverSession,z3Namespace
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+# Expression tree node tags. Every node is a tuple whose first element is either one of these tags,
+# an operator string, or the name of the Z3 function being called (e.g. 'And', 'Implies').
+VAR = '$var'        # (VAR, symbolNum)
+CONST = '$const'    # (CONST, pythonValue)
+NAME = '$name'      # (NAME, identifier) - identifier that is not a declared variable
+NEG = '$neg'        # (NEG, operand)
+
+cmpOps = {ast.Eq:'==',ast.NotEq:'!=',ast.Lt:'<',ast.LtE:'<=',ast.Gt:'>',ast.GtE:'>='}
+binOps = {ast.Add:'+',ast.Sub:'-',ast.Mult:'*'}
+infixOps = set(cmpOps.values()) | set(binOps.values())
+commutativeOps = {'And','Or','Xor','==','!=','Distinct','+','*'}
+TRUE = (CONST,True)
+FALSE = (CONST,False)
+maxZ3Exprs = 1 << 16        # Number of clause expressions kept per circuit for instantiating Z3 copies
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class PLCircuit:
+    '''
+    PL circuit description parsed into expression trees.
+
+    plVars      - Dict of variables and their (varType,varArgs) tuples, as returned by readZ3pl
+    symbols     - List of variable names. A variable's position in this list is its symbol number
+    index       - Dict mapping each variable name to its symbol number
+    clauses     - List of clause expression trees
+    isBool      - List of whether each variable is a Bool, indexed by symbol number
+    occurs      - Dict mapping each symbol number to the indices of the clauses it appears in
+    '''
+    def __init__(self,plVars:dict,plClauses:list,name=''):
+        '''
+        Constructor for PLCircuit. Parses clause strings into expression trees.
+
+        plVars      - Dict of variables and their (varType,varArgs) tuples, as returned by readZ3pl
+        plClauses   - List of clause strings, as returned by readZ3pl
+        name        - Name of the source file, used for error reporting
+        '''
+        self.name = name
+        self.plVars = dict(plVars)
+        self.symbols = list(self.plVars.keys())
+        self.index = {var: i for i,var in enumerate(self.symbols)}
+        self.isBool = [varAtts[0] == 'Bool' for varAtts in self.plVars.values()]
+        self.keylessChecks = {}     # Satisfiability of keyless clause sets already checked by reducedCopy
+        self.z3Base = None          # Session declaring the circuit's own variables, for z3Copy
+        self.z3Exprs = {}           # Clause expression tree -> Z3 expression over the circuit's own variables
+        self.clauses = []
+        for clause in plClauses:
+            try:
+                self.clauses.append(parseNode(ast.parse(clause.strip(),mode='eval').body,self.index))
+            except (SyntaxError,ValueError) as err:
+                logging.error(f'Unable to parse clause "{clause}" in "{name}": {err}')
+                raise RuntimeError(f'Unable to parse a clause in "{name}". See log for details.')
+        self.occurs = defaultdict(list)     # Clauses each variable appears in, by symbol number
+        for i,clause in enumerate(self.clauses):
+            for sym in nodeSymbols(clause):
+                self.occurs[sym].append(i)
+
+
+    def __getstate__(self) -> dict:
+        '''
+        Pickle the circuit (e.g. to send it to a portfolio worker) without its Z3 caches, which hold C
+        pointers. They are rebuilt on demand.
+        '''
+        return self.__dict__ | {'z3Base':None,'z3Exprs':{}}
+
+
+    def renameMap(self,inList:list,keyList:list,outList:list,inSuff='',keySuff='',outSuff='',netSuff='') -> list:
+        '''
+        Return a list of new variable names, indexed by symbol number, where each variable has the
+        suffix for its category appended. Any variable not listed as an input, key, or output is a net.
+
+        inList      - List containing names of each input variable
+        keyList     - List containing names of each key input variable
+        outList     - List containing names of each output variable
+        inSuff      - Suffix appended to input variables
+        keySuff     - Suffix appended to key variables
+        outSuff     - Suffix appended to output variables
+        netSuff     - Suffix appended to all remaining variables
+        '''
+        inSet,keySet,outSet = set(inList),set(keyList),set(outList)
+        names = []
+        for var in self.symbols:
+            if var in inSet:
+                names.append(var+inSuff)
+            elif var in outSet:
+                names.append(var+outSuff)
+            elif var in keySet:
+                names.append(var+keySuff)
+            else:
+                names.append(var+netSuff)
+        return names
+
+
+    def render(self,names=None) -> list:
+        '''
+        Write every clause back out as a Z3 Python string, using the provided variable names.
+
+        names   - List of variable names indexed by symbol number. Defaults to the original names
+        '''
+        if names is None:
+            names = self.symbols
+        return [renderNode(clause,names) for clause in self.clauses]
+
+
+    def copy(self,inList:list,keyList:list,outList:list,inSuff='',keySuff='',outSuff='',netSuff='',session=None) -> Tuple[list,dict]:
+        '''
+        Create a copy of the circuit with the suffix for each variable category appended to its
+        variables. Returns a list of clause strings and a dict of all variables in the copy.
+
+        session - Solving session the copy is also declared and added to, from its expression trees
+        See renameMap for a description of the remaining arguments.
+        '''
+        names = self.renameMap(inList,keyList,outList,inSuff,keySuff,outSuff,netSuff)
+        copyVars = {new: self.plVars[old] for old,new in zip(self.symbols,names)}
+        copyClauses = self.render(names)
+        if session is not None:
+            session.declare(copyVars)
+            session.addCopy(self,self.clauses,names,copyClauses)
+        return copyClauses,copyVars
+
+
+    def reducedCopy(self,inList:list,keyList:list,outList:list,consts:dict,inSuff='',keySuff='',outSuff='',netSuff='',session=None) -> Tuple[list,dict]:
+        '''
+        Create a copy of the circuit with some variables fixed to constants (e.g. the DIP and oracle
+        outputs of an attack round), reduced to the logic that still constrains the remaining shared
+        variables. Returns a list of clause strings and a dict of the variables they use, like copy. Every
+        key variable is declared in the copy, even one the reduced clauses no longer use, so a key solve
+        over the copies still assigns it. See reduce for how the copy is reduced.
+
+        consts  - Dict of original Bool variable names and the values they are fixed to
+        session - Solving session the copy is also declared and added to, from its expression trees
+        See renameMap for a description of the remaining arguments.
+        '''
+        kept = self.reduce(inList,keyList,outList,consts)
+        names = self.renameMap(inList,keyList,outList,inSuff,keySuff,outSuff,netSuff)
+        usedSyms = sorted({sym for clause in kept for sym in nodeSymbols(clause)} | {self.index[var] for var in keyList if var in self.index})
+        copyVars = {names[sym]: self.plVars[self.symbols[sym]] for sym in usedSyms}
+        copyClauses = [renderNode(clause,names) for clause in kept]
+        if session is not None:
+            session.declare(copyVars)
+            session.addCopy(self,kept,names,copyClauses)
+        return copyClauses,copyVars
+
+
+    def reduce(self,inList:list,keyList:list,outList:list,consts:dict) -> list:
+        '''
+        Reduce the circuit with some variables fixed to constants to the logic that still constrains the
+        remaining shared variables. Returns a list of clause expression trees, in original symbol numbers.
+
+        The constants are propagated through the clauses until nothing changes, Boolean nets defined by
+        structurally identical expressions are merged, and clauses that become True are dropped. Any
+        group of remaining clauses that shares no variable with the keys (or with unfixed inputs and
+        outputs) is checked for satisfiability once and then dropped, since it cannot constrain the key.
+        If the constants contradict the circuit, the result is the single clause False.
+
+        inList      - List containing names of each input variable
+        keyList     - List containing names of each key input variable
+        outList     - List containing names of each output variable
+        consts      - Dict of original Bool variable names and the values they are fixed to
+        '''
+        numSyms = len(self.symbols)
+        shared = {self.index[var] for var in keyList if var in self.index}
+        shared |= {self.index[var] for var in list(inList)+list(outList) if var in self.index and var not in consts}
+        parent = list(range(numSyms))
+        members = {}
+        values = {}
+        clauses = list(self.clauses)
+        queue = deque(range(len(clauses)))
+        queued = [True]*len(clauses)
+        hashed = {}
+        conflict = False
+
+        def find(sym):
+            while parent[sym] != sym:
+                parent[sym] = parent[parent[sym]]
+                sym = parent[sym]
+            return sym
+
+        def subst(sym):
+            rep = find(sym)
+            return (CONST,values[rep]) if rep in values else (VAR,rep)
+
+        def touch(rep):
+            for sym in members.get(rep,[rep]):
+                for i in self.occurs[sym]:
+                    if clauses[i] is not None and not queued[i]:
+                        queue.append(i)
+                        queued[i] = True
+
+        def assign(sym,val):
+            nonlocal conflict
+            rep = find(sym)
+            if rep in values:
+                conflict |= values[rep] != val
+                return
+            values[rep] = val
+            touch(rep)
+
+        def union(symA,symB):
+            nonlocal conflict
+            repA,repB = find(symA),find(symB)
+            if repA == repB:
+                return
+            if (repB in shared and repA not in shared) or ((repB in shared) == (repA in shared) and repB < repA):
+                repA,repB = repB,repA
+            parent[repB] = repA
+            members[repA] = members.pop(repA,[repA]) + members.pop(repB,[repB])
+            if repB in values:
+                val = values.pop(repB)
+                if repA in values:
+                    conflict |= values[repA] != val
+                else:
+                    values[repA] = val
+            touch(repA)
+
+        for var,val in consts.items():
+            if var in self.index:
+                assign(self.index[var],bool(val))
+
+        # Propagate constants and merge equivalent nets until no clause changes
+        while queue and not conflict:
+            i = queue.popleft()
+            queued[i] = False
+            if clauses[i] is None:
+                continue
+            node = simplifyNode(clauses[i],subst)
+            clauses[i] = node
+            if isBoolConst(node) and node[1]:
+                clauses[i] = None
+                continue
+            elif isBoolConst(node):
+                conflict = True
+                break
+            for arg in (node[1:] if node[0] == 'And' else (node,)):
+                if arg[0] == VAR and self.isBool[arg[1]]:
+                    assign(arg[1],True)
+                elif arg[0] == 'Not' and arg[1][0] == VAR:
+                    assign(arg[1][1],False)
+                elif arg[0] == '==' and arg[1][0] == VAR and arg[2][0] == VAR and self.isBool[arg[1][1]] and self.isBool[arg[2][1]]:
+                    union(arg[1][1],arg[2][1])
+            if node[0] == '==':     # Structural hashing of net definitions
+                for lhs,rhs in ((node[1],node[2]),(node[2],node[1])):
+                    if lhs[0] != VAR or not self.isBool[lhs[1]] or rhs[0] in (VAR,CONST):
+                        continue
+                    hashKey = canonicalNode(rhs)
+                    if hashKey not in hashed:
+                        hashed[hashKey] = lhs[1]
+                    elif find(hashed[hashKey]) != find(lhs[1]):
+                        union(hashed[hashKey],lhs[1])
+                        clauses[i] = None
+                    break
+
+        if conflict:
+            logging.warning(f'Constants fixed in a copy of "{self.name}" contradict the circuit. The copy is unsatisfiable.')
+            return [FALSE]
+
+        # Shared variables that were fixed or merged keep that as an explicit clause
+        residue = [simplifyNode(clause,subst) for clause in clauses if clause is not None]
+        for sym in shared:
+            rep = find(sym)
+            if rep in values:
+                residue.append(('==',(VAR,sym),(CONST,values[rep])))
+            elif rep != sym:
+                residue.append(('==',(VAR,sym),(VAR,rep)))
+        residue = [clause for clause in residue if clause != TRUE]
+
+        # Split the residue into groups of clauses connected by variables, and drop groups with no shared variable
+        group = list(range(numSyms))
+        def findGroup(sym):
+            while group[sym] != sym:
+                group[sym] = group[group[sym]]
+                sym = group[sym]
+            return sym
+        clauseSyms = [nodeSymbols(clause) for clause in residue]
+        for syms in clauseSyms:
+            for sym in syms[1:]:
+                group[findGroup(sym)] = findGroup(syms[0])
+        sharedGroups = {findGroup(sym) for sym in shared}
+        kept,keyless = [],[]
+        for clause,syms in zip(residue,clauseSyms):
+            if syms and findGroup(syms[0]) in sharedGroups:
+                kept.append(clause)
+            else:
+                keyless.append(clause)
+        if keyless and not self.checkKeyless(keyless):
+            logging.warning(f'Logic without key dependence in a copy of "{self.name}" is unsatisfiable. The copy is unsatisfiable.')
+            return [FALSE]
+
+        logging.debug(f'Copy of "{self.name}" reduced from {len(self.clauses)} to {len(kept)} clauses ({len(keyless)} keyless clauses dropped).')
+        return kept
+
+
+    def z3Copy(self,nodes:list,names:list,z3Vars:dict) -> z3.BoolRef:
+        '''
+        Instantiate clause expression trees of the circuit as one Z3 expression (their conjunction) over
+        renamed variables. Each tree is evaluated into a Z3 expression over the circuit's own variables
+        only the first time it is seen, and every copy is made from those by a single substitution. The
+        Z3 C API is called directly, since the Python wrappers' per-argument checks cost more than the
+        substitution itself.
+
+        nodes   - List of clause expression trees, in the circuit's symbol numbers
+        names   - List of variable names indexed by symbol number
+        z3Vars  - Dict of the renamed variables' Z3 objects, e.g. SolverSession.z3Vars. Every variable the
+                    trees use must be in it
+        '''
+        if self.z3Base is None:
+            self.z3Base = SolverSession(f'{self.name} base')
+            self.z3Base.declare(self.plVars)
+        baseVars = self.z3Base.z3Vars
+        ctx = z3.main_ctx()
+        exprs = []
+        for node in nodes:
+            if node not in self.z3Exprs:
+                if len(self.z3Exprs) >= maxZ3Exprs:
+                    self.z3Exprs.clear()
+                expr = eval(renderNode(node,self.symbols),z3Namespace,baseVars)
+                self.z3Exprs[node] = z3.BoolVal(expr) if isinstance(expr,bool) else expr
+            exprs.append(self.z3Exprs[node].as_ast())
+        conj = z3.BoolRef(z3.Z3_mk_and(ctx.ref(),len(exprs),(z3.Ast*len(exprs))(*exprs)),ctx)
+
+        pairs = [(baseVars[old].as_ast(),z3Vars[new].as_ast()) for old,new in zip(self.symbols,names) if old != new and new in z3Vars]
+        if not pairs:
+            return conj
+        srcs = (z3.Ast*len(pairs))(*[src for src,_ in pairs])
+        dsts = (z3.Ast*len(pairs))(*[dst for _,dst in pairs])
+        return z3.BoolRef(z3.Z3_substitute(ctx.ref(),conj.as_ast(),len(pairs),srcs,dsts),ctx)
+
+
+    def checkKeyless(self,keyless:list) -> bool:
+        '''
+        Return whether a set of clauses (in original symbol numbers) is satisfiable. Results are
+        remembered, since the same keyless logic tends to recur in every copy.
+
+        keyless - List of clause expression trees
+        '''
+        checkKey = frozenset(keyless)
+        if checkKey not in self.keylessChecks:
+            session = SolverSession(f'{self.name} keyless logic')
+            session.declare({self.symbols[sym]: self.plVars[self.symbols[sym]] for clause in keyless for sym in nodeSymbols(clause)})
+            session.add([renderNode(clause,self.symbols) for clause in keyless])
+            self.keylessChecks[checkKey] = session.check([])[0]
+        return self.keylessChecks[checkKey]
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def parseNode(node:ast.AST,index:dict) -> tuple:
+    '''
+    Convert a Python AST node from a clause into an expression tree.
+
+    node    - Python AST expression node
+    index   - Dict mapping declared variable names to symbol numbers
+    '''
+    if isinstance(node,ast.Name):
+        if node.id in index:
+            return (VAR,index[node.id])
+        return (NAME,node.id)
+    elif isinstance(node,ast.Constant):
+        return (CONST,node.value)
+    elif isinstance(node,ast.Call) and isinstance(node.func,ast.Name) and not node.keywords:
+        return (node.func.id,) + tuple(parseNode(arg,index) for arg in node.args)
+    elif isinstance(node,ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in cmpOps:
+        return (cmpOps[type(node.ops[0])],parseNode(node.left,index),parseNode(node.comparators[0],index))
+    elif isinstance(node,ast.BinOp) and type(node.op) in binOps:
+        return (binOps[type(node.op)],parseNode(node.left,index),parseNode(node.right,index))
+    elif isinstance(node,ast.UnaryOp) and isinstance(node.op,ast.USub):
+        return (NEG,parseNode(node.operand,index))
+    raise ValueError(f'unsupported expression "{ast.unparse(node)}"')
+
+
+def renderNode(node:tuple,names:list) -> str:
+    '''
+    Convert an expression tree back into a Z3 Python string.
+
+    node    - Expression tree
+    names   - List of variable names indexed by symbol number
+    '''
+    op = node[0]
+    if op == VAR:
+        return names[node[1]]
+    elif op == CONST:
+        return repr(node[1])
+    elif op == NAME:
+        return node[1]
+    elif op == NEG:
+        return f'(-{renderNode(node[1],names)})'
+    elif op in infixOps:
+        return f'({renderNode(node[1],names)} {op} {renderNode(node[2],names)})'
+    return f'{op}({",".join([renderNode(arg,names) for arg in node[1:]])})'
+
+
+def nodeSymbols(node:tuple) -> list:
+    '''
+    Return the symbol numbers of the variables appearing in an expression tree, without repeats.
+
+    node    - Expression tree
+    '''
+    syms = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node[0] == VAR:
+            if node[1] not in syms:
+                syms.append(node[1])
+        elif node[0] not in (CONST,NAME):
+            stack.extend(node[1:])
+    return syms
+
+
+def canonicalNode(node:tuple) -> tuple:
+    '''
+    Return an expression tree with the arguments of commutative operators sorted, so structurally
+    identical expressions compare equal regardless of argument order.
+
+    node    - Expression tree
+    '''
+    if node[0] in (VAR,CONST,NAME):
+        return node
+    args = [canonicalNode(arg) for arg in node[1:]]
+    if node[0] in commutativeOps:
+        args.sort(key=repr)
+    return (node[0],) + tuple(args)
+
+
+def isBoolConst(node:tuple) -> bool:
+    return node[0] == CONST and isinstance(node[1],bool)
+
+
+def negateNode(node:tuple) -> tuple:
+    '''
+    Return the Boolean negation of an expression tree, folding constants and double negation.
+    '''
+    if isBoolConst(node):
+        return (CONST,not node[1])
+    elif node[0] == 'Not':
+        return node[1]
+    return ('Not',node)
+
+
+def simplifyNode(node:tuple,subst) -> tuple:
+    '''
+    Substitute variables within an expression tree and fold Boolean constants through it.
+
+    node    - Expression tree
+    subst   - Function taking a symbol number and returning the node replacing that variable
+    '''
+    op = node[0]
+    if op == VAR:
+        return subst(node[1])
+    elif op in (CONST,NAME):
+        return node
+    args = [simplifyNode(arg,subst) for arg in node[1:]]
+
+    if op == 'Not' and len(args) == 1:
+        return negateNode(args[0])
+    elif op in ('And','Or'):
+        unit = (op == 'And')    # Identity value of the operator. Its negation absorbs everything
+        kept = []
+        for arg in args:
+            if isBoolConst(arg):
+                if arg[1] != unit:
+                    return (CONST,not unit)
+                continue
+            if arg not in kept:
+                kept.append(arg)
+        if not kept:
+            return (CONST,unit)
+        elif len(kept) == 1:
+            return kept[0]
+        return (op,) + tuple(kept)
+    elif op == 'Xor' and len(args) == 2:
+        a,b = args
+        if isBoolConst(b):
+            a,b = b,a
+        if isBoolConst(a):
+            return negateNode(b) if a[1] else b
+        elif a == b:
+            return FALSE
+    elif op == 'Implies' and len(args) == 2:
+        a,b = args
+        if isBoolConst(a):
+            return b if a[1] else TRUE
+        elif isBoolConst(b):
+            return TRUE if b[1] else negateNode(a)
+        elif a == b:
+            return TRUE
+    elif op == 'If' and len(args) == 3:
+        c,t,e = args
+        if isBoolConst(c):
+            return t if c[1] else e
+        elif t == e:
+            return t
+        elif isBoolConst(t) and isBoolConst(e):
+            return c if t[1] else negateNode(c)
+    elif op in ('==','!='):
+        a,b = args
+        if a[0] == CONST and b[0] == CONST and type(a[1]) == type(b[1]):
+            return (CONST,(a[1] == b[1]) == (op == '=='))
+        elif a == b and a[0] != CONST:
+            return (CONST,op == '==')
+        if isBoolConst(b):
+            a,b = b,a
+        if isBoolConst(a):
+            res = b if a[1] else negateNode(b)
+            return res if op == '==' else negateNode(res)
+    return (op,) + tuple(args)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+'''
+Reader of Z3 Python PL scripts, shared by every TRANSAT tool. A script is parsed in a single pass over
+its lines: variable declarations (Bool, Int, BitVec) and clause assignments are told apart by the
+first characters of their right-hand sides, and only declaration lines go through a regular
+expression. Parse results are memoized per process, keyed by file path and checked against the file's
+modification time, size and contents hash, so each PL file is parsed once however many times it is
+read (e.g. the locked circuit and oracle within satAttack, then again within satVerify).
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import re
+import hashlib
+import logging
+from typing import Tuple
+from .phaseStats import phase
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+varTypes = ('Bool(','Int(','BitVec(')
+varDeclRE = re.compile(r'^(?P<varType>Bool|Int|BitVec)\([\'\"](?P<varName>\w+)[\'\"](?P<varArgs>\s*,.*)?\)$')
+maxCachedFiles = 64         # Number of parsed files kept in the memo cache
+parseCache = {}             # Absolute path -> (mtime_ns, size, digest, varsDict, funList)
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def parseZ3pl(lines:list,trgtZ3='') -> Tuple[dict,list]:
+    '''
+    Parse the lines of a Python Z3 script into its variable declarations and clauses. A line is a
+    clause if it assigns an expression without strings to a single name, other than a Solver. Trailing
+    comments are dropped.
+
+    lines   - List of lines of the script
+    trgtZ3  - Name of the script, for error messages
+    '''
+    varsDict = {}
+    funList = []
+    for line in lines:
+        lhs,eq,rhs = line.partition('=')
+        if not eq or rhs.startswith('='):       # Not an assignment (e.g. "a == b")
+            continue
+        varID = lhs.strip()
+        if not varID.isidentifier():
+            continue
+        rhs = rhs.partition('#')[0].strip()     # Variable names and clauses never hold a "#"
+        if rhs.startswith(varTypes):            # Variable declaration
+            mtchObj = varDeclRE.match(rhs)
+            if mtchObj is None:
+                continue
+            if varID != mtchObj.group('varName'):
+                logging.error(f'Variable {mtchObj.group("varName")} is given a different identifier ("{varID}") in the source Z3 Python script "{trgtZ3}". Change this so they are identical.')
+                raise RuntimeError(f'Variable mismatch name in "{trgtZ3}". See log file for details.')
+            varsDict[varID] = (mtchObj.group('varType'),mtchObj.group('varArgs'))
+        elif "'" in rhs or '"' in rhs or 'Solver(' in rhs:
+            continue
+        elif rhs:                               # Clause
+            funList.append(rhs)
+    return varsDict,funList
+
+
+def readZ3pl(trgtZ3:str) -> Tuple[dict,list]:
+    '''
+    Read a Python Z3 script and parse the variable and function declarations, leaving out any
+    comment lines or Z3 Solver information. Returns dict of variables and their corresponding
+    arguments, and a string of functions. Files that have not changed since they were last read are
+    not parsed again.
+
+    varsDict values are a tuple. varsDict[key][0] = varType, varsDict[key][1] = varArgs
+    '''
+    path = os.path.abspath(trgtZ3)
+    stat = os.stat(path)
+    cached = parseCache.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns,stat.st_size):
+        return dict(cached[3]),list(cached[4])
+
+    with phase('fileRead'), open(path,'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).digest()
+    if cached is not None and cached[2] == digest:          # Touched, but unchanged
+        varsDict,funList = cached[3],cached[4]
+    else:
+        varsDict,funList = parseZ3pl(data.decode().splitlines(),trgtZ3)
+
+    parseCache.pop(path,None)
+    parseCache[path] = (stat.st_mtime_ns,stat.st_size,digest,varsDict,funList)
+    while len(parseCache) > maxCachedFiles:                 # Evict the least recently parsed file
+        parseCache.pop(next(iter(parseCache)))
+    return dict(varsDict),list(funList)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+'''
+Append-only PL stream files, for constraint sets that grow every round such as the running miter and
+DIP circuits of a SAT attack. Rewriting a Z3 Python script to add clauses to it costs a full read and
+write of everything written before, so the disk traffic of an attack grows quadratically with its
+rounds. A PL stream is instead extended by writing only the new variables and clauses, as one segment.
+
+File format (text):
+    # TRANSAT PL stream v1                                  <- header
+    # segment <name> <numVars> <numClauses>                 <- segment header
+    <var> = Bool('<var>')                                   <- one line per variable
+    c<i> = <clause>                                         <- one line per clause
+    # segment ...
+The lines of a segment are in the same format as a Z3 Python script, so a stream can still be read
+whole by readZ3pl. A small index of segment offsets is kept next to the stream (<stream>.idx), one JSON
+line per segment, so segments can be loaded lazily, one at a time. If the index is missing or does not
+cover the stream (e.g. after an interruption between writing a segment and its index entry), it is
+rebuilt by scanning the segment headers. A segment left incomplete by an interruption is ignored.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import json
+import logging
+from typing import Tuple
+from .phaseStats import phase
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+streamHeader = '# TRANSAT PL stream v1\n'
+segmentTag = '# segment '
+indexExt = '.idx'
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class PLStream:
+    '''
+    Writer of an append-only PL stream file.
+
+    streamFile  - Path to the stream file
+    segments    - List of index entries (dicts of name, offset, length, vars, clauses), one per segment
+    '''
+    def __init__(self,streamFile:str,append=False):
+        '''
+        Constructor for PLStream. Creates the stream file, or opens it for appending.
+
+        streamFile  - Path to the stream file
+        append      - If true and the stream file exists, new segments are added after the existing ones.
+                        Otherwise any existing file is replaced
+        '''
+        self.streamFile = streamFile
+        if append and os.path.exists(streamFile):
+            self.segments = readIndex(streamFile)
+            end = self.segments[-1]['offset'] + self.segments[-1]['length'] if self.segments else len(streamHeader)
+            with open(streamFile,'r+b') as f:      # Drop any incomplete segment left by an interruption
+                f.truncate(end)
+            with open(streamFile+indexExt,'w') as f:
+                f.writelines(json.dumps(entry) + '\n' for entry in self.segments)
+        else:
+            self.segments = []
+            with open(streamFile,'w') as f:
+                f.write(streamHeader)
+            with open(streamFile+indexExt,'w'):
+                pass
+        self.numClauses = sum(entry['clauses'] for entry in self.segments)
+
+
+    def append(self,plVars:dict,plClauses:list,name='') -> None:
+        '''
+        Append variables and clauses to the stream, as one segment.
+
+        plVars      - Dict of variables and their (varType,varArgs) tuples, as returned by readZ3pl
+        plClauses   - List of clause strings, as returned by readZ3pl
+        name        - Name of the segment, e.g. the suffix of a circuit copy. Must not contain whitespace
+        '''
+        lines = [f'{segmentTag}{name or "-"} {len(plVars)} {len(plClauses)}\n']
+        for var,varAtts in plVars.items():
+            lines.append(f"{var} = {varAtts[0]}('{var}'{varAtts[1] or ''})\n")
+        for i,clause in enumerate(plClauses):
+            lines.append(f'c{self.numClauses+i} = {clause}\n')
+        data = ''.join(lines).encode()
+
+        with phase('fileWrite'):
+            with open(self.streamFile,'ab') as f:
+                offset = f.tell()
+                f.write(data)
+            entry = {'name':name,'offset':offset,'length':len(data),'vars':len(plVars),'clauses':len(plClauses)}
+            with open(self.streamFile+indexExt,'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        self.segments.append(entry)
+        self.numClauses += len(plClauses)
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def isPLStream(fileName:str) -> bool:
+    '''
+    Return True if the file is a PL stream, rather than e.g. a Z3 Python script.
+    '''
+    with open(fileName,'r') as f:
+        return f.readline() == streamHeader
+
+
+def readIndex(streamFile:str) -> list:
+    '''
+    Return the index of a PL stream, as a list of dicts (name, offset, length, vars, clauses) with one
+    entry per complete segment. The index is rebuilt from the stream itself if it is missing or stale.
+
+    streamFile  - Path to the stream file
+    '''
+    size = os.path.getsize(streamFile)
+    segments = []
+    if os.path.exists(streamFile+indexExt):
+        with open(streamFile+indexExt,'r') as f:
+            try:
+                segments = [json.loads(line) for line in f if line.strip()]
+            except json.JSONDecodeError:
+                segments = []
+    if segments and segments[-1]['offset'] + segments[-1]['length'] == size:
+        return segments
+
+    # Scan the segment headers, counting the lines of each segment
+    logging.info(f'Rebuilding the index of PL stream "{streamFile}".')
+    segments = []
+    with open(streamFile,'rb') as f:
+        if f.readline().decode() != streamHeader:
+            logging.error(f'File "{streamFile}" is not a PL stream.')
+            raise RuntimeError('Unrecognized PL stream file. See log for details.')
+        line = f.readline()
+        while line:
+            offset = f.tell() - len(line)
+            fields = line.decode().split()
+            if not line.decode().startswith(segmentTag) or len(fields) != 5:
+                break
+            numVars,numClauses = int(fields[3]),int(fields[4])
+            complete = True
+            for _ in range(numVars + numClauses):
+                segLine = f.readline()
+                if not segLine.endswith(b'\n'):
+                    complete = False
+                    break
+            if not complete:
+                break
+            segments.append({'name':'' if fields[2] == '-' else fields[2],'offset':offset,'length':f.tell()-offset,'vars':numVars,'clauses':numClauses})
+            line = f.readline()
+    return segments
+
+
+def readSegment(streamFile:str,entry:dict) -> Tuple[dict,list]:
+    '''
+    Read one segment of a PL stream. Returns a dict of variables and a list of clause strings, in the
+    same formats as readZ3pl.
+
+    streamFile  - Path to the stream file
+    entry       - Index entry of the segment, as returned by readIndex
+    '''
+    with phase('fileRead'), open(streamFile,'rb') as f:
+        f.seek(entry['offset'])
+        lines = f.read(entry['length']).decode().splitlines()[1:]
+
+    plVars = {}
+    for line in lines[:entry['vars']]:
+        var,decl = line.split(' = ',1)
+        varType,varArgs = decl.split('(',1)
+        varArgs = varArgs[len(var)+2:-1]
+        plVars[var] = (varType,varArgs or None)
+    plClauses = [line.split(' = ',1)[1] for line in lines[entry['vars']:]]
+    return plVars,plClauses
+
+
+def iterSegments(streamFile:str,start=0):
+    '''
+    Lazily read the segments of a PL stream, yielding a (vars dict, clause list) tuple per segment.
+
+    streamFile  - Path to the stream file
+    start       - Index of the first segment to read
+    '''
+    for entry in readIndex(streamFile)[start:]:
+        yield readSegment(streamFile,entry)
+
+
+def readPLStream(streamFile:str) -> Tuple[dict,list]:
+    '''
+    Read a whole PL stream. Returns a dict of variables and a list of clause strings, in the same
+    formats as readZ3pl.
+
+    streamFile  - Path to the stream file
+    '''
+    plVars = {}
+    plClauses = []
+    for segVars,segClauses in iterSegments(streamFile):
+        plVars = plVars | segVars
+        plClauses.extend(segClauses)
+    return plVars,plClauses
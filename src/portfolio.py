@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+'''
+Parallel solving in forked worker processes.
+
+Portfolio solving: a portfolio session wraps an ordinary solving session (SolverSession or
+CNFSession), and forks one long-lived worker process per solver configuration (Z3 random seeds,
+phase selection and restart strategies, or different pysat solvers). On every check, the workers are
+sent the clauses added since the previous check, and race on the same problem with their own
+configuration. The first answer is taken, and the remaining workers are interrupted, keeping their
+solver state (and the clauses they learned) for the next check. The configuration that answered first
+is logged on every check. Solvers that cannot be interrupted (CaDiCaL, Lingeling) are stopped when they
+lose a race instead, and forked anew from the wrapped session for the next check.
+
+Cube-and-conquer: the problem is split into 2^D cubes by fixing D selected variables to every
+combination of values, and the cubes are solved in parallel workers. The problem is SAT as soon as
+one cube is SAT, and UNSAT once every cube is UNSAT. The runtime of every cube is logged.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import time
+import logging
+import itertools
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+from typing import Tuple
+from .solverSession import SolverSession
+from .cnf import CNFSession,openSession
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+z3PhaseSelections = [3,0,1,5,2,4]           # Z3 smt.phase_selection values, default first
+z3RestartStrategies = [1,0,2,3,4]           # Z3 smt.restart_strategy values, default first
+pysatPortfolio = ['cadical153','glucose4','maplechrono','lingeling','minisat22','cadical195','glucose3','maplecm']
+stopTimeout = 5                             # Seconds an interrupted worker is given to stop, before it is terminated
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class PortfolioSession:
+    '''
+    Solving session that races several solver configurations on the same problem. Mirrors the
+    interface of SolverSession: clauses are added to the wrapped session, and queued for the workers,
+    which receive them at the next check. Every worker keeps its own solver across checks, so an
+    incremental sequence of checks (e.g. the rounds of an attack) keeps the clauses each solver learned.
+
+    session     - Wrapped SolverSession or CNFSession holding the problem
+    configs     - List of solver configurations, one per worker. See portfolioConfigs
+    wins        - Dict counting how many checks each configuration answered first
+    workers     - Dict of running workers by configuration number. See startWorker
+    ops         - List of operations (declare, add, addCopy) not yet sent to the workers
+    circuits    - Dict of the PLCircuits copies were added from, by id
+    '''
+    def __init__(self,session,configs:list):
+        '''
+        Constructor for PortfolioSession. Workers are started by the first check.
+
+        session - SolverSession or CNFSession to wrap
+        configs - List of solver configurations, one per worker. See portfolioConfigs
+        '''
+        self.session = session
+        self.name = session.name
+        self.configs = configs
+        self.wins = {configLabel(config): 0 for config in configs}
+        self.workers = {}
+        self.ops = []
+        self.circuits = {}
+
+
+    @property
+    def plVars(self) -> dict:
+        return self.session.plVars
+
+
+    @property
+    def plClauses(self) -> list:
+        return self.session.plClauses
+
+
+    def declare(self,plVars:dict) -> None:
+        self.session.declare(plVars)
+        self.ops.append(('declare',plVars))
+
+
+    def add(self,plClauses:list) -> None:
+        self.session.add(plClauses)
+        self.ops.append(('add',plClauses))
+
+
+    def addCopy(self,plCircuit,nodes:list,names:list,plClauses:list) -> None:
+        self.session.addCopy(plCircuit,nodes,names,plClauses)
+        self.circuits[id(plCircuit)] = plCircuit
+        self.ops.append(('addCopy',id(plCircuit),nodes,names,plClauses))
+
+
+    def startWorker(self,configNum:int) -> None:
+        '''
+        Fork a worker for one configuration. The worker starts from a copy of the wrapped session, so it
+        is given no queued operations. A worker is a dict of its process, the sending end of a pipe to it
+        and the receiving end of a pipe from it, the ids of the circuits it knows of, and whether it still
+        owes an answer for an interrupted check.
+
+        configNum   - Index of the configuration in configs
+        '''
+        ctx = multiprocessing.get_context('fork')
+        cmdRecv,cmdSend = ctx.Pipe(duplex=False)
+        replyRecv,replySend = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=portfolioWorker,args=(self.session,self.configs[configNum],self.circuits,cmdRecv,replySend),daemon=True)
+        proc.start()
+        cmdRecv.close()
+        replySend.close()
+        self.workers[configNum] = {'proc':proc,'send':cmdSend,'recv':replyRecv,'circuits':set(self.circuits),'busy':False}
+
+
+    def stopWorker(self,configNum:int) -> None:
+        worker = self.workers.pop(configNum)
+        worker['proc'].terminate()
+        worker['proc'].join()
+        worker['send'].close()
+        worker['recv'].close()
+
+
+    def collect(self) -> None:
+        '''
+        Wait for the workers interrupted at the previous check to answer. Workers that stopped, or do not
+        answer within stopTimeout seconds, are stopped, and forked anew by the next check.
+        '''
+        for configNum,worker in list(self.workers.items()):
+            if not worker['busy']:
+                continue
+            try:
+                if not worker['recv'].poll(stopTimeout):
+                    raise EOFError
+                worker['recv'].recv()
+                worker['busy'] = False
+            except EOFError:
+                self.stopWorker(configNum)
+
+
+    def check(self,voi=[]) -> Tuple[bool,dict]:
+        '''
+        Solve the problem with every configuration at once, and return the first answer. Returns
+        values the same way as SolverSession.check.
+
+        voi     - "Variables of interest": a list of all variable names you desire to be returned
+        '''
+        startTime = time.time()
+        self.collect()
+        for configNum,worker in list(self.workers.items()):
+            ops = []
+            for op in self.ops:
+                if op[0] == 'addCopy' and op[1] not in worker['circuits']:
+                    ops.append(('circuit',op[1],self.circuits[op[1]]))
+                    worker['circuits'].add(op[1])
+                ops.append(op)
+            try:
+                worker['send'].send(('check',ops,voi))
+            except OSError:     # Worker died since the previous check. It is forked anew below
+                self.stopWorker(configNum)
+        self.ops = []
+        for configNum in range(len(self.configs)):
+            if configNum not in self.workers:
+                self.startWorker(configNum)
+                self.workers[configNum]['send'].send(('check',[],voi))
+
+        racing = {worker['recv']: configNum for configNum,worker in self.workers.items()}
+        result = None
+        while result is None and racing:
+            for conn in wait(list(racing.keys())):
+                configNum = racing.pop(conn)
+                config = self.configs[configNum]
+                try:
+                    reply = conn.recv()
+                except EOFError:    # Worker died without answering
+                    self.workers[configNum]['proc'].join()
+                    reply = ('error',f'worker exited with code {self.workers[configNum]["proc"].exitcode}')
+                if reply[0] == 'error':
+                    logging.warning(f'Portfolio worker "{configLabel(config)}" of solver session "{self.name}" failed: {reply[1]}')
+                    self.stopWorker(configNum)
+                    continue
+                result = (reply,config)
+                break
+
+        # Every worker is told the check is over: the losers interrupt their solver, and answer later
+        for configNum in racing.values():
+            self.workers[configNum]['busy'] = True
+        for configNum,worker in list(self.workers.items()):
+            try:
+                worker['send'].send(('stop',))
+            except OSError:
+                self.stopWorker(configNum)
+
+        if result is None:
+            logging.error(f'Every portfolio worker of solver session "{self.name}" failed.')
+            raise RuntimeError('Portfolio solving failed. See log for details.')
+        (status,sat,voiVals),config = result
+        self.wins[configLabel(config)] += 1
+        logging.info(f'Solver session "{self.name}": portfolio configuration "{configLabel(config)}" answered first ({"SAT" if sat else "UNSAT"}) after {time.time()-startTime:.3f} s.')
+        return sat,voiVals
+
+
+    def statistics(self) -> dict:
+        '''
+        Return the statistics of the wrapped session, along with the number of checks each configuration
+        answered first. Solver statistics of the workers are not collected.
+        '''
+        return self.session.statistics() | {'portfolioWins':dict(self.wins)}
+
+
+    def close(self) -> None:
+        '''
+        Stop every worker.
+        '''
+        for configNum in list(self.workers.keys()):
+            self.stopWorker(configNum)
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def portfolioConfigs(session,numWorkers:int) -> list:
+    '''
+    Generate diverse solver configurations for a session. Z3 sessions vary the random seed, phase
+    selection and restart strategy. pysat sessions use a different solver in each worker.
+    Configurations are dicts, and the first one is always the session's default.
+
+    session     - SolverSession or CNFSession that will be wrapped
+    numWorkers  - Number of configurations to generate
+    '''
+    configs = []
+    for i in range(numWorkers):
+        if isinstance(session,SolverSession):
+            configs.append({'random_seed':i,'phase_selection':z3PhaseSelections[i%len(z3PhaseSelections)],
+                            'restart_strategy':z3RestartStrategies[(i//len(z3PhaseSelections))%len(z3RestartStrategies)]})
+        else:
+            configs.append({'solver':pysatPortfolio[i%len(pysatPortfolio)]})
+    return configs
+
+
+def configLabel(config:dict) -> str:
+    return ','.join([f'{param}={val}' for param,val in config.items()])
+
+
+def portfolioWorker(session,config:dict,circuits:dict,cmdConn,replyConn) -> None:
+    '''
+    Solve a session under one configuration, for every check of a portfolio session, until the parent
+    process closes the pipe. Runs in a forked process, so the session is this worker's private copy. A
+    check message carries the operations queued since the previous check and the variables of interest,
+    and is answered through replyConn. Every check is followed by a stop message, which interrupts the
+    solver if it is still running.
+
+    session     - SolverSession or CNFSession holding the problem
+    config      - Solver configuration. See portfolioConfigs
+    circuits    - Dict of the PLCircuits copies were added from, by id
+    cmdConn     - Receiving end of a pipe from the parent process
+    replyConn   - Sending end of a pipe to the parent process
+    '''
+    try:
+        if isinstance(session,SolverSession):
+            session.solver.set(**config)
+            interruptible = True
+        else:
+            if config['solver'] != session.backend.partition(':')[2]:
+                from pysat.solvers import Solver
+                session.solver = Solver(name=config['solver'],bootstrap_with=session.encoder.clauses[:session.numSent])
+            try:
+                session.solver.clear_interrupt()
+                interruptible = session.interruptible = True
+            except NotImplementedError:
+                interruptible = False
+        circuits = dict(circuits)
+        lock = threading.Lock()
+        solving = threading.Event()
+
+        while True:
+            cmd,ops,voi = cmdConn.recv()
+            for op in ops:
+                if op[0] == 'circuit':
+                    circuits[op[1]] = op[2]
+                elif op[0] == 'declare':
+                    session.declare(op[1])
+                elif op[0] == 'add':
+                    session.add(op[1])
+                else:
+                    session.addCopy(circuits[op[1]],*op[2:])
+            solving.set()
+            watcher = threading.Thread(target=stopWatcher,args=(session,cmdConn,lock,solving,interruptible),daemon=True)
+            watcher.start()
+            sat,voiVals = session.check(voi)
+            with lock:
+                solving.clear()
+            replyConn.send(('ok',sat,voiVals))
+            watcher.join()
+            if interruptible and not isinstance(session,SolverSession):
+                session.solver.clear_interrupt()
+    except EOFError:    # The parent closed the pipe
+        pass
+    except Exception as err:
+        replyConn.send(('error',str(err)))
+    finally:
+        os._exit(0)     # Skip interpreter cleanup of state inherited from the parent
+
+
+def stopWatcher(session,cmdConn,lock,solving:threading.Event,interruptible:bool) -> None:
+    '''
+    Wait for the stop message that ends a check of a portfolio worker. If the solver is still running,
+    interrupt it, or exit the worker if the solver cannot be interrupted. An interrupted check answers
+    UNSAT, which the parent process discards.
+
+    session         - SolverSession or CNFSession being solved
+    cmdConn         - Receiving end of the pipe from the parent process
+    lock            - Lock held while the solving flag is read or cleared
+    solving         - Event set while the solver is running
+    interruptible   - Whether the solver can be interrupted
+    '''
+    try:
+        cmdConn.recv()
+    except EOFError:
+        os._exit(0)
+    with lock:
+        if not solving.is_set():
+            return
+        if not interruptible:
+            os._exit(0)
+        if isinstance(session,SolverSession):
+            session.solver.ctx.interrupt()
+        else:
+            session.solver.interrupt()
+
+
+def openPortfolioSession(name:str,backend:str,plVars:dict,numWorkers:int):
+    '''
+    Create a solving session for the requested backend, racing numWorkers solver configurations when
+    numWorkers is above 1. Portfolio solving needs the "fork" start method, cannot run in a daemonic
+    process, and is not available for external DIMACS solver binaries. In those cases an ordinary session is returned, with a logged
+    warning.
+
+    name        - Name used when logging information about the session
+    backend     - Backend string. See the cnf module docstring
+    plVars      - Dict of the variables of the problem
+    numWorkers  - Number of worker processes (solver configurations) per check
+    '''
+    session = openSession(name,backend,plVars)
+    if numWorkers <= 1:
+        return session
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        logging.warning(f'Portfolio solving requires the "fork" start method, which is not available on this platform. Solver session "{name}" will use a single solver.')
+        return session
+    if multiprocessing.current_process().daemon:
+        logging.warning(f'Portfolio solving cannot start workers from a daemonic process (e.g. a batchRun pool worker). Solver session "{name}" will use a single solver.')
+        return session
+    if isinstance(session,CNFSession) and session.solver is None:
+        logging.warning(f'Portfolio solving is not available for external DIMACS solver binaries. Solver session "{name}" will use a single solver.')
+        return session
+    configs = portfolioConfigs(session,numWorkers)
+    logging.info(f'Solver session "{name}" racing {numWorkers} solver configurations: {"; ".join([configLabel(config) for config in configs])}')
+    return PortfolioSession(session,configs)
+
+
+def splitVariables(plCircuit,session,candidates:list,depth:int) -> list:
+    '''
+    Select the variables to split a problem into cubes on: the depth candidates that appear in the
+    most clauses of the circuit the problem was built from. Only variables declared in the session are
+    selected, since a cube can only fix variables the problem knows about.
+
+    plCircuit   - PLCircuit the problem was built from
+    session     - SolverSession, CNFSession or PortfolioSession holding the problem
+    candidates  - List of variable names to choose from (e.g. key or input variables)
+    depth       - Number of variables to select
+    '''
+    candidates = [var for var in candidates if var in session.plVars and var in plCircuit.index and plCircuit.isBool[plCircuit.index[var]]]
+    candidates.sort(key=lambda var: len(plCircuit.occurs[plCircuit.index[var]]),reverse=True)
+    return candidates[:depth]
+
+
+def cubeCheck(session,splitVars:list,voi=[],numWorkers=None) -> Tuple[bool,dict]:
+    '''
+    Solve a session by cube-and-conquer. Every combination of values of the split variables is solved
+    as a separate cube in a forked worker, with up to numWorkers cubes running at once. Returns the
+    result of the first SAT cube, or UNSAT once every cube is UNSAT, the same way as
+    SolverSession.check. Falls back to an ordinary check where fork is unavailable, or in a daemonic
+    process (e.g. a batchRun pool worker), which cannot start workers of its own.
+
+    session     - SolverSession or CNFSession holding the problem
+    splitVars   - List of Bool variable names to split on. 2^len(splitVars) cubes are solved
+    voi         - "Variables of interest": a list of all variable names you desire to be returned
+    numWorkers  - Maximum number of cubes solved at once. Defaults to the number of CPUs
+    '''
+    if 'fork' not in multiprocessing.get_all_start_methods() or multiprocessing.current_process().daemon or not splitVars:
+        logging.warning(f'Cube-and-conquer is not available for solver session "{session.name}". Using a single solver.')
+        return session.check(voi)
+    numWorkers = numWorkers or os.cpu_count() or 1
+    cubes = [dict(zip(splitVars,vals)) for vals in itertools.product([False,True],repeat=len(splitVars))]
+    logging.info(f'Solver session "{session.name}" split into {len(cubes)} cubes on {splitVars}, solved by up to {numWorkers} workers.')
+
+    startTime = time.time()
+    ctx = multiprocessing.get_context('fork')
+    pending = list(enumerate(cubes))
+    workers = {}
+    result = None
+    try:
+        while result is None and (pending or workers):
+            while pending and len(workers) < numWorkers:
+                cubeNum,cube = pending.pop(0)
+                recvConn,sendConn = ctx.Pipe(duplex=False)
+                proc = ctx.Process(target=cubeWorker,args=(session,cube,voi,sendConn),daemon=True)
+                proc.start()
+                sendConn.close()
+                workers[recvConn] = (proc,cubeNum,cube)
+            for conn in wait(list(workers.keys())):
+                proc,cubeNum,cube = workers.pop(conn)
+                try:
+                    reply = conn.recv()
+                except EOFError:    # Worker died without answering
+                    reply = ('error',f'worker exited with code {proc.exitcode}')
+                conn.close()
+                proc.join()
+                if reply[0] == 'error':
+                    logging.error(f'Cube #{cubeNum} {cube} of solver session "{session.name}" failed: {reply[1]}')
+                    raise RuntimeError('Cube-and-conquer solving failed. See log for details.')
+                status,sat,voiVals,cubeTime = reply
+                logging.info(f'Cube #{cubeNum} {cube} of solver session "{session.name}": {"SAT" if sat else "UNSAT"} in {cubeTime:.3f} s.')
+                if sat:
+                    result = (sat,voiVals)
+                    break
+    finally:
+        for conn,(proc,cubeNum,cube) in workers.items():
+            proc.terminate()
+            conn.close()
+        for proc,cubeNum,cube in workers.values():
+            proc.join()
+
+    if result is None:
+        result = (False,None)
+    logging.info(f'Solver session "{session.name}" cube-and-conquer {"SAT" if result[0] else "UNSAT"} after {time.time()-startTime:.3f} s.')
+    return result
+
+
+def cubeWorker(session,cube:dict,voi:list,conn) -> None:
+    '''
+    Solve one cube of a session and send the result, with its runtime, through a pipe. Runs in a
+    forked process, so the session is this worker's private copy.
+
+    session - SolverSession or CNFSession holding the problem
+    cube    - Dict of split variable names and their values in this cube
+    voi     - "Variables of interest" returned with a SAT result
+    conn    - Sending end of a pipe to the parent process
+    '''
+    try:
+        startTime = time.time()
+        session.add([f'{var} == {val}' for var,val in cube.items()])
+        sat,voiVals = session.check(voi)
+        conn.send(('ok',sat,voiVals,time.time()-startTime))
+    except Exception as err:
+        conn.send(('error',str(err)))
+    finally:
+        conn.close()
+        os._exit(0)     # Skip interpreter cleanup of state inherited from the parent
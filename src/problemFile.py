@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+'''
+Persistence of SAT problems in standard formats, as an alternative to Z3 Python scripts. A Z3 Python
+script has to be imported (or its clauses evaluated one by one) to rebuild the problem, which is slow
+for large miters. Problems can instead be written as:
+    SMT-LIB2 (.smt2)    - Any PL problem. Loaded into a Z3 session with z3.parse_smt2_file
+    AIGER (.aag)        - Purely Boolean problems, as an ASCII and-inverter graph with one input per
+                            variable and one output that is true when every clause holds. Loaded into
+                            a Z3 or CNF session by a native reader, and readable by ABC and other tools
+Variable names are kept: as declarations in SMT-LIB2 files, and in the symbol table of AIGER files.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import re
+import ast
+import logging
+import z3
+from .plCircuit import VAR,CONST,NAME,parseNode
+from .solverSession import SolverSession
+from .cnf import CNFSession
+from .phaseStats import phase
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+problemFormats = ['smt2','aag']
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class AIGEncoder:
+    '''
+    Encoder from PL expression trees into an and-inverter graph. Literals follow the AIGER convention:
+    variable v has literal 2v, its negation is 2v+1, and literals 0 and 1 are the constants False and
+    True. Identical gates share one variable (structural hashing).
+
+    inputs  - List of input variable names, in order (AIGER variables 1 to len(inputs))
+    ands    - List of (lhs,rhs0,rhs1) AND gates, in order of creation
+    '''
+    def __init__(self,inputs:list):
+        '''
+        Constructor for AIGEncoder.
+
+        inputs  - List of input variable names
+        '''
+        self.inputs = list(inputs)
+        self.inLits = {var: 2*(i+1) for i,var in enumerate(self.inputs)}
+        self.ands = []
+        self.gates = {}                     # (rhs0,rhs1) -> lhs
+
+
+    def andGate(self,a:int,b:int) -> int:
+        '''
+        Return the literal of the AND of two literals, creating the gate if it does not exist.
+        '''
+        if a == 0 or b == 0 or a == b^1:
+            return 0
+        if a == 1 or a == b:
+            return b
+        if b == 1:
+            return a
+        a,b = max(a,b),min(a,b)
+        if (a,b) not in self.gates:
+            lhs = 2*(len(self.inputs) + len(self.ands) + 1)
+            self.ands.append((lhs,a,b))
+            self.gates[(a,b)] = lhs
+        return self.gates[(a,b)]
+
+
+    def encode(self,node:tuple,names:list) -> int:
+        '''
+        Return the literal of an expression tree, adding the gates that define it.
+
+        node    - Expression tree, as created by plCircuit.parseNode
+        names   - List of variable names indexed by the symbol numbers used in node
+        '''
+        op = node[0]
+        if op == VAR:
+            return self.inLits[names[node[1]]]
+        elif op == CONST and node[1] is True:
+            return 1
+        elif op == CONST and node[1] is False:
+            return 0
+        elif op == 'Not':
+            return self.encode(node[1],names) ^ 1
+        elif op == 'And':
+            lit = 1
+            for arg in node[1:]:
+                lit = self.andGate(lit,self.encode(arg,names))
+            return lit
+        elif op == 'Or':
+            lit = 1
+            for arg in node[1:]:
+                lit = self.andGate(lit,self.encode(arg,names) ^ 1)
+            return lit ^ 1
+        elif op == 'Implies':
+            return self.andGate(self.encode(node[1],names),self.encode(node[2],names) ^ 1) ^ 1
+        elif op in ('Xor','!='):
+            lit = self.encode(node[1],names)
+            for arg in node[2:]:
+                lit = self.xorGate(lit,self.encode(arg,names))
+            return lit
+        elif op == '==':
+            return self.xorGate(self.encode(node[1],names),self.encode(node[2],names)) ^ 1
+        elif op == 'If':
+            c,a,b = [self.encode(arg,names) for arg in node[1:]]
+            return self.andGate(self.andGate(c,a) ^ 1,self.andGate(c^1,b) ^ 1) ^ 1
+        raise ValueError(f'"{node[1] if op in (NAME,CONST) else op}" has no and-inverter graph encoding')
+
+
+    def xorGate(self,a:int,b:int) -> int:
+        return self.andGate(self.andGate(a,b^1) ^ 1,self.andGate(a^1,b) ^ 1) ^ 1
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def writeSMT2(plVars:dict,plClauses:list,smtFile:str) -> None:
+    '''
+    Write a PL problem to an SMT-LIB2 file.
+
+    plVars      - Dict of variables and their (varType,varArgs) tuples, as returned by readZ3pl
+    plClauses   - List of clause strings, as returned by readZ3pl
+    smtFile     - Desired path and filename of the SMT-LIB2 file
+    '''
+    session = SolverSession(smtFile)
+    session.declare(plVars)
+    session.add(plClauses)
+    with phase('fileWrite'), open(smtFile,'w') as f:
+        f.write(session.solver.to_smt2())
+
+
+def writeAiger(plVars:dict,plClauses:list,aagFile:str) -> None:
+    '''
+    Write a purely Boolean PL problem to an ASCII AIGER file. The single output is the conjunction of
+    every clause, so the problem is satisfiable if and only if the output can be true.
+
+    plVars      - Dict of variables and their (varType,varArgs) tuples, as returned by readZ3pl
+    plClauses   - List of clause strings, as returned by readZ3pl
+    aagFile     - Desired path and filename of the AIGER file
+    '''
+    names = list(plVars.keys())
+    index = {var: i for i,var in enumerate(names)}
+    for var,varAtts in plVars.items():
+        if varAtts[0] != 'Bool':
+            raise ValueError(f'variable "{var}" has type {varAtts[0]}, which cannot be encoded in an and-inverter graph')
+    encoder = AIGEncoder(names)
+    out = 1
+    for clause in plClauses:
+        out = encoder.andGate(out,encoder.encode(parseNode(ast.parse(clause.strip(),mode='eval').body,index),names))
+
+    with phase('fileWrite'), open(aagFile,'w') as f:
+        f.write(f'aag {len(names)+len(encoder.ands)} {len(names)} 0 1 {len(encoder.ands)}\n')
+        f.writelines(f'{encoder.inLits[var]}\n' for var in names)
+        f.write(f'{out}\n')
+        f.writelines(f'{lhs} {rhs0} {rhs1}\n' for lhs,rhs0,rhs1 in encoder.ands)
+        f.writelines(f'i{i} {var}\n' for i,var in enumerate(names))
+        f.write('o0 constraints\n')
+
+
+def writeProblem(plVars:dict,plClauses:list,problemFile:str) -> None:
+    '''
+    Write a PL problem in the format given by the file's extension (.smt2 or .aag).
+    '''
+    if problemFile.endswith('.smt2'):
+        writeSMT2(plVars,plClauses,problemFile)
+    elif problemFile.endswith('.aag'):
+        writeAiger(plVars,plClauses,problemFile)
+    else:
+        raise ValueError(f'unrecognized problem file format "{problemFile}". Expected one of: {", ".join(problemFormats)}')
+
+
+def readAiger(aagFile:str) -> tuple:
+    '''
+    Read an ASCII AIGER file. Returns the list of input names (symbol table names, or "i<n>" for inputs
+    without one), the list of input literals, the list of output literals, and the list of AND gates
+    as (lhs,rhs0,rhs1) tuples. Latches are not supported.
+
+    aagFile     - Path to the AIGER file
+    '''
+    with phase('fileRead'), open(aagFile,'r') as f:
+        lines = f.read().splitlines()
+    header = lines[0].split()
+    if header[0] != 'aag':
+        raise ValueError(f'"{aagFile}" is not an ASCII AIGER file')
+    numIns,numLatches,numOuts,numAnds = [int(field) for field in header[2:6]]
+    if numLatches != 0:
+        raise ValueError(f'"{aagFile}" has latches, which are not supported')
+    inLits = [int(line) for line in lines[1:1+numIns]]
+    outLits = [int(line) for line in lines[1+numIns:1+numIns+numOuts]]
+    ands = [tuple(int(field) for field in line.split()) for line in lines[1+numIns+numOuts:1+numIns+numOuts+numAnds]]
+    names = [f'i{i}' for i in range(numIns)]
+    for line in lines[1+numIns+numOuts+numAnds:]:
+        mtchObj = re.match(r'^i(?P<pos>\d+) (?P<name>.+)$',line)
+        if mtchObj:
+            names[int(mtchObj.group('pos'))] = mtchObj.group('name')
+        elif line.startswith('c'):
+            break
+    return names,inLits,outLits,ands
+
+
+def loadProblem(session,problemFile:str) -> None:
+    '''
+    Load a problem file (.smt2 or .aag) into a solving session: its variables are declared and its
+    constraints added. SMT-LIB2 problems can only be loaded into Z3 sessions. The PL clause list of the
+    session is not extended, since the constraints are not available as clause strings.
+
+    session     - SolverSession, CNFSession, or a PortfolioSession wrapping one
+    problemFile - Path to the problem file
+    '''
+    session = getattr(session,'session',session)       # Unwrap portfolio sessions
+    if problemFile.endswith('.smt2'):
+        if not isinstance(session,SolverSession):
+            logging.error(f'SMT-LIB2 problem "{problemFile}" can only be loaded into a Z3 solver session, not "{session.name}".')
+            raise RuntimeError('SMT-LIB2 problems require the z3 backend. See log for details.')
+        with open(problemFile,'r') as f:
+            session.declare({mtchObj.group('var'): (mtchObj.group('varType'),None) for mtchObj in
+                             re.finditer(r'^\(declare-fun (?P<var>\S+) \(\) (?P<varType>Bool|Int)\)$',f.read(),re.MULTILINE)})
+        with phase('fileRead'):
+            session.solver.add(z3.parse_smt2_file(problemFile))
+        return
+    elif not problemFile.endswith('.aag'):
+        raise ValueError(f'unrecognized problem file format "{problemFile}". Expected one of: {", ".join(problemFormats)}')
+
+    names,inLits,outLits,ands = readAiger(problemFile)
+    session.declare({var: ('Bool',None) for var in names})
+    if isinstance(session,CNFSession):
+        lits = {0: -session.encoder.trueLit}
+        for var,inLit in zip(names,inLits):
+            lits[inLit] = session.encoder.declare(var)
+        litOf = lambda aigLit: lits[aigLit & ~1] * (-1 if aigLit & 1 else 1)
+        for lhs,rhs0,rhs1 in ands:
+            lits[lhs] = session.encoder.gate('And',[litOf(rhs0),litOf(rhs1)])
+        session.encoder.clauses.extend([[litOf(outLit)] for outLit in outLits])
+        session.sendClauses()
+    else:
+        exprs = {0: z3.BoolVal(False)}
+        for var,inLit in zip(names,inLits):
+            exprs[inLit] = session.z3Vars[var]
+        exprOf = lambda aigLit: z3.Not(exprs[aigLit & ~1]) if aigLit & 1 else exprs[aigLit]
+        for lhs,rhs0,rhs1 in ands:
+            exprs[lhs] = z3.And(exprOf(rhs0),exprOf(rhs1))
+        session.solver.add([exprOf(outLit) for outLit in outLits])
@@ -19,6 +19,19 @@ import datetime
 import importlib
 from typing import Tuple
 from z3 import *
+from .solverSession import SolverSession
+from .cnf import CNFSession,openSession,defBackend
+from .plCircuit import PLCircuit
+from .oracle import VerilogOracle,buildPyOracle,runiVerilogBatch,packPatterns
+from .oracleCache import openOracleCache,cacheName,sharedCacheFile
+from .portfolio import PortfolioSession,openPortfolioSession,splitVariables,cubeCheck
+from .phaseStats import PhaseStats,phase
+from .checkpoint import writeCheckpoint,readCheckpoint,fileHash
+from .dipSet import DIPSet,bitmapInputs
+from .plStream import PLStream,isPLStream,iterSegments,readPLStream,readIndex
+from .problemFile import writeProblem,problemFormats
+from .keyPrune import findPrunableKeys,pruneClauses,defSeed as defPruneSeed
+from .plReader import readZ3pl
 
 # -------------------------------------------------------------------------------------------------
 # Globals
@@ -31,10 +44,11 @@ dipCircuitsName = 'dipCircuits'
 tbName = 'tb.v'
 tbOutputFile = 'vOut'
 
-defMiterFile = os.path.join(here,workDir) + miterName + '.py'
-dipCircuitsFile = os.path.join(here,workDir) + dipCircuitsName + '.py'
+defMiterFile = os.path.join(here,workDir) + miterName + '.pls'
+dipCircuitsFile = os.path.join(here,workDir) + dipCircuitsName + '.pls'
 tb = os.path.join(here,workDir) + tbName
 extractedKeyCSV = os.path.join(here,workDir) + 'extracted_key.csv'
+checkpointFile = os.path.join(here,workDir) + 'checkpoint.npz'
 
 
 # -------------------------------------------------------------------------------------------------
@@ -160,40 +174,6 @@ def setup(plLogicFile,fresh,pythonOracle,quiet,debug):
                 print('iVerilog was installed correctly. Proceeding with SAT attack...\n')
 
 
-def readZ3pl(trgtZ3:str) -> Tuple[dict,list]:
-    '''
-    Read a Python Z3 script and parse the variable and function declarations, leaving out any 
-    comment lines or Z3 Solver information. Returns dict of variables and their corresponding
-    arguments, and a string of functions.
-
-    varsDict values are a tuple. varsDict[key][0] = varType, varsDict[key][1] = varArgs
-    '''
-    varsDict = {}
-    funList = []
-    with open(trgtZ3,'r') as f:
-        f.seek(0)
-        lines = f.readlines()
-
-    # Search for variables
-    for line in lines:
-        mtchObj = re.match(r'^\s*(?P<varID>\w+)\s*=\s*(?P<varType>(Bool)|(Int)|(BitVec))\([\',\"](?P<varName>\w+)[\',\"](?P<varArgs>\s*,.*)?\).*$',line)
-        if mtchObj:
-            if (mtchObj.group('varID') != mtchObj.group('varName')):
-                logging.error(f'Variable {mtchObj.group("varName")} is given a different identifier ("{mtchObj.group("varID")}") in the source Z3 Python script "{trgtZ3}". Change this so they are identical.')
-                raise RuntimeError(f'Variable mismatch name in "{trgtZ3}". See log file for details.')
-            else:
-                varsDict[mtchObj.group('varID')] = (mtchObj.group('varType'),mtchObj.group('varArgs'))
-
-    # Search for functions (logic clauses)
-    for line in lines:
-        mtchObj = re.match(r'^\s*(?P<funID>\w+)\s*=\s*(?P<fun>[^\'\"]*)\n$',line)     # Future work: there's gotta be a better RE to exclude "Solver"
-        if mtchObj:
-            if mtchObj.group('fun') != 'Solver()':
-                funList.append(mtchObj.group('fun'))
-
-    return varsDict,funList
-
-
 def writeZ3pl(z3Vars:dict,z3Lines:list,z3Fn:str,append=False,prnt=False) -> int:
     '''
     Writes or appends a Python Z3 script from a provided list of lines. If append is true, then
@@ -215,7 +195,7 @@ def writeZ3pl(z3Vars:dict,z3Lines:list,z3Fn:str,append=False,prnt=False) -> int:
     varList = varList | z3Vars
     clauseList.extend(z3Lines)
 
-    with open(z3Fn,'w') as f:
+    with phase('fileWrite'), open(z3Fn,'w') as f:
         f.write('from z3 import *\n')
         if prnt:
             f.write("set_param('verbose',10)\n")
@@ -250,65 +230,25 @@ def m2dict(model:z3.Model) -> dict:
     return z3Dict
 
 
-def copyCircuit(plClauses:list,allVars:dict,inList:list,keyList:list,outList:list,suffix='',modIns=True,modKeys=True,modOuts=True,modNets=True) -> Tuple[list,dict]:
+def buildMiter(plCircuit:PLCircuit,inVars:list,keyVars:list,outVars:list,miterStream:PLStream,mSuff='_m',hiZVars={},hiZOracle=True,debug=False) -> Tuple[dict,list]:
     '''
-    Create a copy of some lines of PL clauses, and modify the end suffixes of variables. If using
-    this function multiple times on the same plClauses, be sure that you modify the nets in the 
-    FIRST copy step, then set modNets=False for the rest of the calls. Returns modified list of 
-    clauses and a new dictionary of all variables in the copy.
+    Create miter circuit for a given input Z3Py file. Returns a dict of all miter variables and a list of miter clauses,
+    for loading into a solver session.
 
-    plClauses       - List containing lines of a PL file
-    allVars         - Dict of all variables in plClauses and their corresponding Z3 type (e.g., 'Bool', etc.)
-    inList          - List containing names of each input variable
-    keyList         - List containing names of each key input variable
-    outList         - List containing names of each output variable
-    suffix          - String containing suffix to be appended to 
-    '''
-    # Compile list of variables to be copied with new names
-    changeList = {}
-    if modIns:
-        changeList = changeList | {k: allVars[k] for k in set(inList).intersection(allVars.keys())}
-    if modOuts:
-        changeList = changeList | {k: allVars[k] for k in set(outList).intersection(allVars.keys())}
-    if modKeys:
-        changeList = changeList | {k: allVars[k] for k in set(keyList).intersection(allVars.keys())}
-    if modNets:
-        netsList = [x for x in allVars if x not in (inList+outList+keyList)]
-        changeList = changeList | {k: allVars[k] for k in set(netsList).intersection(allVars.keys())}
-
-    # Create variable and clause copies
-    clauses = plClauses
-    clauseVars = {k:v for k,v in allVars.items() if k not in changeList}
-    for var in changeList.keys():
-        newVar = var+suffix
-        clauses = [re.sub(r'\b{}\b'.format(var),newVar,i) for i in clauses]
-        clauseVars = clauseVars | {newVar: allVars[var]}
-
-    return clauses,clauseVars
-
-
-def buildMiter(trgtPL:str,inVars:list,keyVars:list,outVars:list,miterFile:str,mSuff='_m',hiZVars={},hiZOracle=True,debug=False):
-    '''
-    Create miter circuit for a given input Z3Py file. Returns a list of input variable names and a list key variable names for convenience.
-
-    trgtPL      - Path to Z3 Python file containing PL clauses to create a miter circuit out of
+    plCircuit   - Parsed PL circuit to create a miter circuit out of
     inVars      - List of variables designated as inputs in targetPL
     keyVars     - List of variables designated as key inputs in targetPL
     outVars     - List of variables designated as outputs in targetPL
-    miterFile   - Desired path, filename, and extension for output Z3 file
+    miterStream - PL stream the miter is written to, as its first segment. If None, no file is written
     mSuff       - Desired suffix to be added to net names for each miter circuit (do not include copy number)
     hiZVars     - List of variables designates as outputs in targetPL
     '''
-    # Read in PL
-    plVars,plClauses = readZ3pl(trgtPL)
-
-    # Create two copies of one circuit with identical inputs
+    # Create two copies of one circuit with identical inputs, each with unique keys
     miterVars = {}
     miterClauses = []
     for i in range(1,3):
-        copy,copyVars = copyCircuit(plClauses,plVars,inVars,keyVars,outVars,suffix=f'{mSuff}{i}',modIns=False,modKeys=False)
-        copy,copyVars = copyCircuit(copy,copyVars,inVars,keyVars,outVars,suffix=f'_{i}',modIns=False,modOuts=False,modNets=False)  # This "recopy" step creates unique keys
-        miterVars = miterVars | {k:v for k,v in copyVars.items() if k not in miterClauses}
+        copy,copyVars = plCircuit.copy(inVars,keyVars,outVars,keySuff=f'_{i}',outSuff=f'{mSuff}{i}',netSuff=f'{mSuff}{i}')
+        miterVars = miterVars | copyVars
         miterClauses.extend(copy)
 
     # Make the miter comparator
@@ -335,7 +275,10 @@ def buildMiter(trgtPL:str,inVars:list,keyVars:list,outVars:list,miterFile:str,mS
             outSubclauses.append(f'Not(And(Not(Xor({outVar+mSuff+"1"},{outVar+mSuff+"2"})),{hiZVar+mSuff+"1"},{hiZVar+mSuff+"2"}))')
     miterClauses.append(f'Or({",".join(outSubclauses)})     # Miter comparator')
 
-    writeZ3pl(miterVars,miterClauses,miterFile,prnt=debug)
+    if miterStream is not None:
+        miterStream.append(miterVars,miterClauses,name=miterName)
+
+    return miterVars,miterClauses
 
 
 def runZ3(trgtZ3:str,voi=[]) -> Tuple[bool,dict]:
@@ -350,13 +293,15 @@ def runZ3(trgtZ3:str,voi=[]) -> Tuple[bool,dict]:
     '''
 
     # Import trgtZ3
-    if trgtZ3 in sys.modules:
-        importlib.reload(sys.modules[trgtZ3])
-    else:
-        importlib.import_module(trgtZ3)
+    with phase('moduleImport'):
+        if trgtZ3 in sys.modules:
+            importlib.reload(sys.modules[trgtZ3])
+        else:
+            importlib.import_module(trgtZ3)
     
     # Run trgtZ3
-    decision, model = sys.modules[trgtZ3].main()
+    with phase('solve'):
+        decision, model = sys.modules[trgtZ3].main()
 
     # Extract Z3 result
     if re.match(r'\bsat\b',str(decision)):
@@ -516,16 +461,23 @@ def runiVerilog(cktIn:list,trgtNetlist:str,topLevelMod:str,inList:list,outList:l
     return cktOut
 
 
-def runPyOracle(oracleIns:dict,oracleFile:io.TextIOWrapper) -> dict:
+def runPyOracle(oracleIns:dict,oracleFile:str,inList:list,outList:list) -> dict:
     '''
-    Run Python oracle script.
+    Run Python oracle script. The oracle file must describe the unencrypted circuit functionally in
+    Z3-PL, with every net defined by an equality clause. Returns oracle outputs as a dict.
 
-    There's nothing here yet!
+    For many queries, build a PyOracle once instead, so the circuit is only compiled one time.
+
+    oracleIns   - Values for inputs to query oracle with.
+    oracleFile  - Path to the Z3-PL file describing the oracle
+    inList      - List of oracle input names.
+    outList     - List of oracle output names.
     '''
-    raise RuntimeError('Whoops, using a Python oracle is not currently supported. Use a Verilog one instead.')
+    oracle = buildPyOracle(PLCircuit(*readZ3pl(oracleFile),name=oracleFile),inList,outList)
+    return oracle.query(oracleIns)
 
 
-def queryOracle(oracleIns:dict,oracleFile:io.TextIOWrapper,inList:list,outList:list,topLevelMod='',trgtTb='',simOutFile='',oracleSel=False) -> dict:
+def queryOracle(oracleIns:dict,oracleFile:io.TextIOWrapper,inList:list,outList:list,topLevelMod='',trgtTb='',simOutFile='',oracleSel=False,oracle=None,cache=None) -> dict:
     '''
     Function for selecting desired oracle query method. Returns oracle outputs as a dict.
 
@@ -534,128 +486,182 @@ def queryOracle(oracleIns:dict,oracleFile:io.TextIOWrapper,inList:list,outList:l
     outList     - List of oracle output names. 
     topLevelMod - Name of top level mod in Verilog file. Necessary only if oracleSel = False.
     oracleSel   - If true, indicates that oracleFile is a Python file instead of a Verilog file.
+    oracle      - Running oracle object (e.g. VerilogOracle). If provided, it answers the query
+                    and all other oracle arguments are ignored.
+    cache       - OracleCache consulted before the oracle is queried. New responses are added to it
     '''
-    if not oracleSel and (topLevelMod != '' or trgtTb != '' or simOutFile != ''):
+    if cache is not None:
+        oracleOut = cache.lookup(oracleIns)
+        if oracleOut is not None:
+            return oracleOut
+
+    if oracle is not None:
+        oracleOut = oracle.query(oracleIns)
+    elif not oracleSel and (topLevelMod != '' or trgtTb != '' or simOutFile != ''):
         ivCmdFile = os.path.join(here,workDir) + 'iv_cmd_file'
         oracleOut = runiVerilog(oracleIns,oracleFile,topLevelMod,inList,outList,trgtTb,simOutFile,ivCmdFn=ivCmdFile)
     elif not oracleSel:
         raise RuntimeError('Missing arguments for using an iVerilog oracle testbench.')
     else:
-        oracleOut = runPyOracle()
+        oracleOut = runPyOracle(oracleIns,oracleFile,inList,outList)
 
+    if cache is not None:
+        cache.store(oracleIns,oracleOut)
     return oracleOut
 
 
-def appendMiter(copyTrgt:str,DIP:dict,oracleOut:dict,inVars:list,keyVars:list,outVars:list,miterFile:str,suff:str,debug=False,hiZVars={}):
+def queryOracleBatch(patterns,oracleFile:str,inList:list,outList:list,topLevelMod='',oracleSel=False,oracle=None,cache=None):
+    '''
+    Batch version of queryOracle. Evaluates many input patterns in a single oracle run and returns a
+    2D NumPy bool array with one row per pattern and one column per output, in outList order.
+
+    patterns    - List of input dicts, or 2D array-like of bools with columns in inList order
+    inList      - List of oracle input names.
+    outList     - List of oracle output names.
+    topLevelMod - Name of top level mod in Verilog file. Necessary only if oracleSel = False.
+    oracleSel   - If true, indicates that oracleFile is a Python file instead of a Verilog file.
+    oracle      - Running oracle object (e.g. VerilogOracle). If provided, it answers the queries
+                    and all other oracle arguments are ignored.
+    cache       - OracleCache consulted before the oracle is queried. Only patterns missing from the
+                    cache are sent to the oracle, and their responses are added to it
+    '''
+    inArr = packPatterns(patterns,inList)
+    if cache is not None:
+        outArr,hitMask = cache.lookupBatch(inArr)
+        if hitMask.all():
+            return outArr
+        missArr = inArr[~hitMask]
+    else:
+        outArr,hitMask = None,None
+        missArr = inArr
+
+    if oracle is not None:
+        missOut = oracle.queryBatch(missArr)
+    elif not oracleSel and topLevelMod != '':
+        missOut = runiVerilogBatch(missArr,oracleFile,topLevelMod,inList,outList,os.path.join(here,workDir))
+    elif not oracleSel:
+        raise RuntimeError('Missing arguments for using an iVerilog oracle testbench.')
+    else:
+        missOut = buildPyOracle(PLCircuit(*readZ3pl(oracleFile),name=oracleFile),inList,outList).queryBatch(missArr)
+
+    if cache is None:
+        return missOut
+    cache.storeBatch(missArr,missOut)
+    outArr[~hitMask] = missOut
+    return outArr
+
+
+def recoveredCopies(recMiterFn:str,miterVars:dict) -> int:
+    '''
+    Return the number of DIP circuit copies held by a recovered miter, from the highest copy suffix (_cpN)
+    among its segment names (PL stream) or its variable names (Z3 Python script).
+
+    recMiterFn  - Path to the recovered miter file
+    miterVars   - Dict of the variables read from the miter file. Only used for Z3 Python scripts
+    '''
+    names = [entry['name'] for entry in readIndex(recMiterFn)] if isPLStream(recMiterFn) else list(miterVars.keys())
+    copyNums = [int(mtchObj.group(1)) for mtchObj in [re.search(r'_cp(\d+)(?:_|$)',name) for name in names] if mtchObj]
+    return max(copyNums,default=0)
+
+
+def blockingClause(DIP:dict) -> str:
+    '''
+    Return a clause string that excludes one input pattern from the solutions of a solver.
+
+    DIP     - Contains input literals & their values
+    '''
+    return 'Or(' + ','.join([f'Not({var})' if val else var for var,val in DIP.items()]) + ')'
+
+
+def appendMiter(plCircuit:PLCircuit,DIP:dict,oracleOut:dict,inVars:list,keyVars:list,outVars:list,miterStream:PLStream,suff:str,debug=False,hiZVars={},session=None,fixedKeys={}) -> Tuple[dict,list]:
     '''
     Append circuit copies to a preexisting miter circuit to prevent a SAT solver from solving for the same DIP over and over.
+    Returns a dict of the new copy variables and a list of the new copy clauses.
 
-    copyTrgt    - Path to Z3 Python file describing circuit to be copied
+    plCircuit   - Parsed PL circuit to be copied
     DIP         - Contains input literals & their values
     oracleOut   - Contains output literals corresponding to input literals
     inList      - Path to file containing list of variables designated as inputs in CNF, separated by lines or spaces
     keyList     - Path to file containing list of variables designated as key inputs in CNF, separated by lines or spaces
     outList     - Path to file containing list of variables designated as outputs in CNF, separated by lines or spaces
-    miterFile   - Path to miter file to append circuit copy to
+    miterStream - PL stream of the miter, to append the circuit copies to as a segment. If None, no file is written
     suff        - Suffix appended to the end of variables to differentiate them from past entries in the miter file
     debug       - Debug mode: the previous miter circuit will be saved as a new file before modifying it, using
                     provided "suff" variable
+    session     - Miter solving session the copies are added to, instantiated from the circuit's expressions
+    fixedKeys   - Dict of don't-care keys and the values they are fixed to, propagated through the copies
     '''
     # Copy old miter circuit to new file if in troubleshoot mode
-    if debug:
-        oldVars,oldClauses = readZ3pl(miterFile)
+    if debug and miterStream is not None:
+        oldVars,oldClauses = readPLStream(miterStream.streamFile)
         writeZ3pl(oldVars,oldClauses,debugDir+miterName+suff+'.py',prnt=True)
 
-    # Read in template PL
-    plVars,plClauses = readZ3pl(copyTrgt)
-    
-    # Make circuit copy pair
+    # Fix I/O from oracle query. hiZ variables are tied to True, since oracle outputs should always be electrically driven
+    # NOTE: what if the oracle CAN exhibit a high-impedance output? Then this will need to be either changed such that the 
+    # hiZ variables are assigned to the oracle's outputs... or hiZ flag should not be used at all and hiZ variables should be 
+    # included in the outputs list
+    ioList = DIP | oracleOut
+    for var,val in ioList.items():
+        if not (val == True or val == False):
+            logging.error('Error encountered when appending constant I/O definition clauses to miter circuit')
+            raise RuntimeError('Error encountered when appending constant I/O definition clauses to miter circuit')
+    ioList = ioList | {var: True for var in hiZVars.values()} | fixedKeys
+
+    # Make circuit copy pair. Nets are copy-unique, inputs & outputs are identical, keys are consistent with the miter.
+    # The fixed I/O is propagated through each copy, so only its key-dependent logic is added to the miter
     coupleVars = {}
     coupleCopy = []
     for i in range(1,3):
-        copy,copyVars = copyCircuit(plClauses,plVars,inVars,keyVars,outVars,suffix=f'{suff}_{i}',modIns=False,modKeys=False,modOuts=False)   # Nets are copy-unique
-        copy,copyVars = copyCircuit(copy,copyVars,inVars,keyVars,outVars,suffix=suff,modKeys=False,modNets=False)                            # Inputs & outputs are identical
-        copy,copyVars = copyCircuit(copy,copyVars,inVars,keyVars,outVars,suffix=f'_{i}',modIns=False,modNets=False,modOuts=False)      # Consistent keys
-        coupleVars = coupleVars | {k:v for k,v in copyVars.items() if k not in coupleCopy}
+        copy,copyVars = plCircuit.reducedCopy(inVars,keyVars,outVars,ioList,inSuff=suff,keySuff=f'_{i}',outSuff=suff,netSuff=f'{suff}_{i}',session=session)
+        coupleVars = coupleVars | copyVars
         coupleCopy.extend(copy)
 
-    # Assign I/O from oracle query
-    ioList = DIP | oracleOut
-    for var,val in ioList.items():
-        if val == True:
-            coupleCopy.append(f'{var}{suff} == True')
-        elif val == False:
-            coupleCopy.append(f'{var}{suff} == False')
-        else:
-            logging.error('Error encountered when appending constant I/O definition clauses to miter circuit')
-            raise RuntimeError('Error encountered when appending constant I/O definition clauses to miter circuit')
-        
-    # Assign hiZ variables if applicable - they are tied to True, since oracle outputs should always be electrically driven
-    # The phrasing of the implication 
-    # NOTE: what if the oracle CAN exhibit a high-impedance output? Then this will need to be either changed such that the 
-    # hiZ variables are assigned to the oracle's outputs... or hiZ flag should not be used at all and hiZ variables should be 
-    # included in the outputs list
-    if hiZVars != {}: 
-        for var in hiZVars.values():
-            coupleCopy.append(f'{var}{suff}_1 == True')
-            coupleCopy.append(f'{var}{suff}_2 == True')
+    if miterStream is not None:
+        miterStream.append(coupleVars,coupleCopy,name=suff)
 
-    writeZ3pl(coupleVars,coupleCopy,miterFile,append=True,prnt=debug)
+    return coupleVars,coupleCopy
 
 
-def appendDIPCircuit(trgtPL:str,DIP:dict,oracleOut:list,inVars:list,keyVars:list,outVars:list,DIPCircuitFile:str,suff:str,tsVars={},debug=False):
+def appendDIPCircuit(plCircuit:PLCircuit,DIP:dict,oracleOut:list,inVars:list,keyVars:list,outVars:list,dipStream:PLStream,suff:str,tsVars={},debug=False,session=None,fixedKeys={}) -> Tuple[dict,list]:
     '''
-    Append a circuit copy with specific I/O to a running file to be solved when all DIPs have been found. If the 
-    file does not exist, it is created.
+    Make a circuit copy with specific I/O, sharing the key inputs with every other copy. Returns a dict of the
+    copy variables and a list of the copy clauses. The copy is also appended to a running PL stream if one is given.
 
-    trgtPL          - Filepath to CNF file containing clauses of a circuit to be copied
+    plCircuit       - Parsed PL circuit to be copied
     DIP             - Contains input literals
     oracleOut       - Contains output literals corresponding to input literals
-    DIPCircuitFile  - Filepath to file to append circuit copy to
+    dipStream       - PL stream of the DIP circuits, to append the circuit copy to as a segment. If None, no file is written
+    session         - Key-solve session the copy is added to, instantiated from the circuit's expressions
+    fixedKeys       - Dict of don't-care keys and the values they are fixed to, propagated through the copy
     '''
-    # Read in PL
-    plVars,plClauses = readZ3pl(trgtPL)
-    
-    # Make unique circuit copy with common key inputs
-    DIPcopy, DIPcopyVars = copyCircuit(plClauses,plVars,inVars,keyVars,outVars,suffix=suff,modKeys=False)
-
-    # Assign I/O
-    ioList = DIP | oracleOut
-    for var,val in ioList.items():
-        if val == True:
-            DIPcopy.append(f'{var}{suff} == True')
-        elif val == False:
-            DIPcopy.append(f'{var}{suff} == False')
-    if tsVars != {}:      # NOTE: these lines need to be changed if hiZ is an expected output from the oracle
-        for var in tsVars.values():
-            DIPcopy.append(f'{var}{suff} == True')
+    # Make unique circuit copy with common key inputs, reduced to its key-dependent logic under the fixed I/O
+    # NOTE: these lines need to be changed if hiZ is an expected output from the oracle
+    ioList = DIP | oracleOut | {var: True for var in tsVars.values()} | fixedKeys
+    DIPcopy, DIPcopyVars = plCircuit.reducedCopy(inVars,keyVars,outVars,ioList,inSuff=suff,outSuff=suff,netSuff=suff,session=session)
 
     # Append circuit to file
-    if os.path.exists(DIPCircuitFile):
-        writeZ3pl(DIPcopyVars,DIPcopy,DIPCircuitFile,append=True)
-    else:
-        writeZ3pl(DIPcopyVars,DIPcopy,DIPCircuitFile,prnt=debug)
+    if dipStream is not None:
+        dipStream.append(DIPcopyVars,DIPcopy,name=suff)
 
+    return DIPcopyVars,DIPcopy
 
-def createDIPCircuit(trgtPL:str,DIPs:list,oracleOuts:list,inVars:list,keyVars:list,outVars:list,DIPCircuitFile:str,tsVars={},debug=False):
+
+def createDIPCircuit(plCircuit:PLCircuit,DIPs:list,oracleOuts:list,inVars:list,keyVars:list,outVars:list,DIPCircuitFile:str,tsVars={},debug=False):
     '''
     Append a circuit copy with specific I/O to a running file to be solved when all DIPs have been found. If the 
     file does not exist, it is created.
 
-    trgtPL          - Filepath to CNF file containing clauses of a circuit to be copied
+    plCircuit       - Parsed PL circuit to be copied
     DIP             - List of DIPs from attack rounds, where DIPs are stored as dicts
     oracleOut       - List of output patterns corresponding to input literals from attack rounds, where patterns are stored as dicts
     DIPCircuitFile  - Filepath to Python file containing all circuit copies.
     '''
-    # Read in PL
-    plVars,plClauses = readZ3pl(trgtPL)
-
     copiesClauses = []
     copiesVars = {}
     for rnd,(DIP,outVec) in enumerate(zip(DIPs,oracleOuts)):
         suff=f'_cp{rnd}'
         # Make unique circuit copy with common key inputs
-        DIPcopy, DIPcopyVars = copyCircuit(plClauses,plVars,inVars,keyVars,outVars,suffix=suff,modKeys=False)
+        DIPcopy, DIPcopyVars = plCircuit.copy(inVars,keyVars,outVars,inSuff=suff,outSuff=suff,netSuff=suff)
 
         # Assign I/O
         ioList = DIP | outVec
@@ -674,16 +680,38 @@ def createDIPCircuit(trgtPL:str,DIPs:list,oracleOuts:list,inVars:list,keyVars:li
     writeZ3pl(copiesVars,copiesClauses,DIPCircuitFile,prnt=debug)
 
 
-def satAttack(plLogicFile:str,ioCSV:str,oracleNetlist:str,topModule:str,noEarlyTermination=False,fresh=False,hiZOracle=True,pythonOracle=False,debug=False,quiet=False,recMiterFn=None,highImpedance=False):
+def satAttack(plLogicFile:str,ioCSV:str,oracleNetlist:str,topModule:str,noEarlyTermination=False,fresh=False,hiZOracle=True,pythonOracle=False,debug=False,quiet=False,recMiterFn=None,highImpedance=False,writeMiter=False,recompileOracle=False,oracleCache=True,backend=defBackend,dipsPerRound=1,portfolio=1,cubeDepth=0,resumeFn=None,enumLimit=0,problemFormat=None,pruneKeys=False,sharedOracleCache=False,pruneSeed=defPruneSeed,stats=None):
+    '''
+    Run a SAT attack. Returns the extracted key as a dict, or -1 if no key satisfies the DIPs.
+
+    resumeFn    - Checkpoint file of an interrupted attack to resume, at the round after the last one it completed
+    enumLimit   - If the circuit has at most this many input patterns, the oracle's whole truth table is
+                    queried in one batch and solved for the key directly, without searching for DIPs. Capped
+                    at 2^bitmapInputs patterns, the largest input space the DIP set keeps a coverage bitmap of.
+                    Otherwise, input space coverage is only reported, and the attack ends when the miter is
+                    UNSAT or, with noEarlyTermination, once every input pattern has been explored
+    problemFormat - If "smt2" or "aag", the final miter and DIP circuits are also written to the work/ directory
+                    in SMT-LIB2 or AIGER format, for loading into other solvers and tools
+    pruneKeys   - Before the attack loop, detect don't-care keys (fixed to a constant in every circuit copy) and
+                    symmetric key pairs (ordered), shrinking the key space the attack has to search
+    pruneSeed   - Seed of the random simulation patterns of key pruning, which decide the pruned key space
+    sharedOracleCache - Keep the oracle response cache in the per-user cache directory shared by every run,
+                    instead of the work/ directory
+    stats       - Optional dict, filled with attack statistics: rounds, DIPs, input space coverage,
+                    runtimes in seconds, and the statistics of the miter and key-solve solvers
+    '''
 
     # Run argument parsing, directory creation, variable identification, and logging setup
     startTime = datetime.datetime.now()
-    if recMiterFn == None:
+    if (recMiterFn == None) and (resumeFn == None):
         setup(plLogicFile,fresh,pythonOracle,quiet,debug)
     else:   # Recovery mode
         print('Running SAT attack in recovery mode. See log for more details.')
         fresh = False
         setup(plLogicFile,fresh,pythonOracle,quiet,debug)
+    if (recMiterFn != None) and (resumeFn != None):
+        logging.error('A SAT attack can either be recovered from a miter file or resumed from a checkpoint, not both.')
+        raise RuntimeError('Both a miter file and a checkpoint were given for recovery. See log for details.')
 
     inVars = []
     keyVars = []
@@ -708,69 +736,277 @@ def satAttack(plLogicFile:str,ioCSV:str,oracleNetlist:str,topModule:str,noEarlyT
             else:
                 raise RuntimeError(f'I/O {ioNm} has unrecognized data type "{ioAtts[0]}". Please revise I/O file {ioCSV}')
     
-    if recMiterFn == None:  # Create miter circuit
-        miterFile = defMiterFile
-        buildMiter(plLogicFile,inVars,keyVars,outVars,miterFile,mSuff=miterSuffix,hiZOracle=hiZOracle,hiZVars=hiZVars,debug=debug)
-        logging.info(f'Miter logic successfully created and located at: {miterFile}')
-    else:   # Recovery mode
-        miterFile = recMiterFn
-        logging.info(f'SAT attack running in recovery mode, using the user-provided miter file at: {miterFile}')
-
-    # SAT attack loop
-    iters = 1
-    allDIPs = []
-    allOuts = []
-    while(True):
-        # If 2^N rounds exceeded, the attack has failed to terminate correctly.
-        if(iters > ((2**len(inVars))+1)):
-            logging.error(f'Attack entering round {iters}, despite only a possible {2**len(inVars)} DIPs. Attack is improperly formulated. Please review and fix input files.')
-            raise RuntimeError('All possible DIPs explored without expected attack termination. See log for details.')
-        # We've already explored every I/O combination as a DIP, then we can be done early. No need for the final round, since it should return UNSAT (nothing new learned on that round).
-        elif(iters > (2**len(inVars))) and noEarlyTermination:
-            logging.warning(f'Attack entering round {iters}. All possible input patterns have been explored as DIPs. Since all information has been learned, and this round is expected to return UNSAT, this round will be skipped.')
-            print('All possible input patterns have been explored as DIPs. Skipping ahead to key solve step...')
-            break
-
-        # Run SAT on miter & extract DIP if SAT
-        print(f'\nRunning SAT on Miter clauses, round #{iters}.')
-        sat,dip = runZ3(miterName,inVars)
-        if not sat:         # Attack loop exit condition
-            logging.info(f'Miter circuit UNSATISFIED at round #{iters}.')
-            print('UNSAT')
-            if iters == 1:  # The base Z3 model is unsatisfiable... you messed up
-                logging.error(f'The provided encrytped logic file is unsatisfiable within itself. Please review and fix {plLogicFile}')
-                raise RuntimeError('Base circuit unsatisfiable. See log for details.')
-            break           # If no more DIPs, we're done
-        logging.info(f'Miter circuit SATISFIED at round #{iters}. Extracted DIP: {dip}')
-        print('SAT\nExtracted DIP:',*dip.items(),'\n',sep=' ')
-
-        # Consult oracle
-        oracleOut = queryOracle(dip,oracleNetlist,inVars,outVars,topLevelMod=topModule,trgtTb=tb,simOutFile=tbOutputFile)
-
-        # Append circuit copies to the miter circuit file
-        appendMiter(plLogicFile,dip,oracleOut,inVars,keyVars,outVars,miterFile,suff=f'_cp{iters}',debug=debug,hiZVars=hiZVars)
-
-        # Append circuit copy to running "DIP circuits" CNF file with DIP and oracle output
-        appendDIPCircuit(plLogicFile,dip,oracleOut,inVars,keyVars,outVars,dipCircuitsFile,suff=f'_cp{iters}',tsVars=hiZVars,debug=debug)
-
-        # Compare latest DIP to past DIPs to see if there is a repeat. If so, throw & log error
-        for pastIterMin1,pastDIP in enumerate(allDIPs):
-            if ({} == {k: dip[k] for k in dip if k in pastDIP and dip[k] != pastDIP[k]}):   # If this DIP matches a previous one...
-                logging.debug(f'The attack has revisited DIP {dip} in round {iters}. This DIP was first explored in round {pastIterMin1+1}. This is the first revisited DIP. The attack has not been formulated properly, and will now terminate early. Check the miter circuit.')
+    # Truth tables are enumerated from the coverage bitmap of the DIP set, which is limited in size
+    if enumLimit > 2**bitmapInputs:
+        logging.warning(f'The enumeration limit of {enumLimit} input patterns is above the {2**bitmapInputs} patterns a coverage bitmap is kept for. It is lowered to {2**bitmapInputs}.')
+        enumLimit = 2**bitmapInputs
+
+    # Per-phase timings, counters and solver statistics of every round are written as JSON lines next to the log
+    roundStats = PhaseStats(os.path.join(here,logDir)+logName+'_'+now+'.jsonl')
+
+    # The oracle simulator, the oracle cache, the portfolio workers and the statistics collector are released however the attack ends
+    oracle = None
+    cache = None
+    miterSession = None
+    try:
+        # Parse the locked circuit once. Every circuit copy made during the attack is instantiated from it
+        plCircuit = PLCircuit(*readZ3pl(plLogicFile),name=plLogicFile)
+
+        # Key-space pruning: don't-care keys are fixed in every circuit copy, and symmetric key pairs are ordered
+        fixedKeys = {}
+        keyPairs = []
+        if pruneKeys:
+            with phase('keyPrune'):
+                fixedKeys,keyPairs = findPrunableKeys(plCircuit,inVars,keyVars,outVars,hiZVars,seed=pruneSeed)
+            roundStats.count('fixedKeys',len(fixedKeys))
+            roundStats.count('keyPairs',len(keyPairs))
+            print(f'Key pruning: {len(fixedKeys)} don\'t-care keys fixed and {len(keyPairs)} symmetric key pairs ordered, of {len(keyVars)} keys.')
+
+        # The miter lives in a persistent solver session. The miter file on disk is only kept up to date when
+        # requested (or in debug mode), as a troubleshooting and recovery artifact. It is an append-only PL
+        # stream, so each round only writes its new circuit copies
+        miterSegments = iter(())
+        if recMiterFn == None:  # Create miter circuit
+            miterStream = PLStream(defMiterFile) if (writeMiter or debug) else None
+            with phase('miterBuild'):
+                miterVars,miterClauses = buildMiter(plCircuit,inVars,keyVars,outVars,miterStream,mSuff=miterSuffix,hiZOracle=hiZOracle,hiZVars=hiZVars,debug=debug)
+            if miterStream is not None:
+                logging.info(f'Miter logic successfully created and located at: {defMiterFile}')
+            else:
+                logging.info('Miter logic successfully created.')
+        elif isPLStream(recMiterFn):    # Recovery mode: the miter stream is loaded one segment at a time
+            miterSegments = iterSegments(recMiterFn)
+            miterVars,miterClauses = next(miterSegments)
+            miterStream = PLStream(recMiterFn,append=True) if (writeMiter or debug) else None
+            logging.info(f'SAT attack running in recovery mode, using the user-provided miter file at: {recMiterFn}')
+        else:   # Recovery mode, from a miter written as a Z3 Python script
+            miterVars,miterClauses = readZ3pl(recMiterFn)
+            miterStream = PLStream(defMiterFile) if (writeMiter or debug) else None
+            if miterStream is not None:
+                miterStream.append(miterVars,miterClauses,name=miterName)
+            logging.info(f'SAT attack running in recovery mode, using the user-provided miter file at: {recMiterFn}')
+        recCopies = recoveredCopies(recMiterFn,miterVars) if recMiterFn != None else 0     # New circuit copies are numbered after these
+        miterSession = openPortfolioSession(miterName,backend,miterVars,portfolio)
+        with phase('miterAdd'):
+            miterSession.declare(miterVars)
+            miterSession.add(miterClauses)
+            for segVars,segClauses in miterSegments:
+                miterSession.declare(segVars)
+                miterSession.add(segClauses)
+            if fixedKeys or keyPairs:
+                miterSession.add(pruneClauses(fixedKeys,keyPairs,'_1') + pruneClauses(fixedKeys,keyPairs,'_2'))
+
+        # The key-solve constraints (one circuit copy per DIP, all sharing the key inputs) live in a second
+        # session alongside the miter, so a candidate key is available after every round and the final key
+        # solve is already done when the attack loop exits. Like the miter, the DIP circuits stream is only kept
+        # when requested.
+        keySession = openSession(dipCircuitsName,backend,plCircuit.plVars)
+        recoverDIPs = (recMiterFn != None) and os.path.exists(dipCircuitsFile)
+        if recoverDIPs:         # Recovery mode: pick up DIPs from the previous run
+            with phase('keyAdd'):
+                for dipVars,dipClauses in iterSegments(dipCircuitsFile):
+                    keySession.declare(dipVars)
+                    keySession.add(dipClauses)
+            logging.info(f'Key-solve constraints recovered from: {dipCircuitsFile}')
+        dipStream = PLStream(dipCircuitsFile,append=recoverDIPs) if (writeMiter or debug) else None     # A previous run's DIPs are replaced, unless recovered
+        if fixedKeys or keyPairs:
+            keySession.declare({var: plCircuit.plVars[var] for var in keyVars if var in plCircuit.plVars})
+            keySession.add(pruneClauses(fixedKeys,keyPairs))
+        candidate = None
+
+        # Compile the oracle once and keep it for the whole attack
+        with phase('oracleSetup'):
+            if pythonOracle:
+                oracle = buildPyOracle(PLCircuit(*readZ3pl(oracleNetlist),name=oracleNetlist),inVars,outVars)
+            elif not recompileOracle:
+                oracle = VerilogOracle(oracleNetlist,topModule,inVars,outVars,os.path.join(here,workDir))
+
+        # Responses from previous runs against the same oracle are reused from the on-disk cache
+        if oracleCache:
+            cache = openOracleCache(oracleNetlist,topModule,inVars,outVars,sharedCacheFile if sharedOracleCache else os.path.join(here,workDir)+cacheName)
+
+        # Every DIP adds a circuit copy to both the miter and the key-solve constraints. Copies go straight into the
+        # sessions from the parsed circuit, so appending includes instantiating them in the solver
+        def addDIP(dip,oracleOut,miter=True) -> None:
+            # A repeated DIP means the miter failed to exclude it, so the attack is improperly formulated
+            pastIndex = dipSet.add(dip)
+            if pastIndex is not None:
+                logging.debug(f'The attack has revisited DIP {dip} in round {iters}. This DIP was first explored as DIP #{pastIndex+1}. This is the first revisited DIP. The attack has not been formulated properly, and will now terminate early. Check the miter circuit.')
                 raise RuntimeError('The attack has revisited a previously-explored DIP. See log for more details.')
-
-        if debug:       # Checkpoint each round
-            miterVars,miterCls = readZ3pl(miterFile)
-            writeZ3pl(miterVars,miterCls,os.path.join(debugDir,'miter_final.py'),prnt=True)
-        
-        allDIPs.append(dip)
-        allOuts.append(oracleOut)
-        iters += 1
-
-    # Run SAT on 'DIP Circuits' file
-    #createDIPCircuit(plLogicFile,allDIPs,allOuts,inVars,keyVars,outVars,dipCircuitsFile,tsVars=hiZVars,debug=debug)
-    print('\nRunning SAT on all extracted DIPS...')
-    sat,key = runZ3(dipCircuitsName,keyVars)
+            copyNum = copyBase + len(allDIPs) + 1
+            if miter:
+                with phase('miterAppend'):
+                    copyVars,copyClauses = appendMiter(plCircuit,dip,oracleOut,inVars,keyVars,outVars,miterStream,suff=f'_cp{copyNum}',debug=debug,hiZVars=hiZVars,session=miterSession,fixedKeys=fixedKeys)
+                roundStats.count('miterCopyClauses',roundStats.counts.get('miterCopyClauses',0) + len(copyClauses))
+            with phase('dipAppend'):
+                dipVars,dipClauses = appendDIPCircuit(plCircuit,dip,oracleOut,inVars,keyVars,outVars,dipStream,suff=f'_cp{copyNum}',tsVars=hiZVars,debug=debug,session=keySession,fixedKeys=fixedKeys)
+            roundStats.count('dipCopyClauses',roundStats.counts.get('dipCopyClauses',0) + len(dipClauses))
+            allDIPs.append(dip)
+            allOuts.append(oracleOut)
+
+        def endRound(roundName) -> None:
+            roundStats.count('dips',len(dipSet))
+            roundStats.count('coverage',dipSet.coverage())
+            if cache is not None:
+                roundStats.count('cacheHits',cache.hits)
+                roundStats.count('cacheMisses',cache.misses)
+            roundStats.endRound(roundName,miterStats=miterSession.statistics(),keyStats=keySession.statistics())
+
+        # SAT attack loop
+        loopStartTime = datetime.datetime.now()
+        iters = 1
+        allDIPs = []
+        allOuts = []
+        dipSet = DIPSet(inVars)
+        # Settings that change the constraint set rebuilt from the DIPs. A checkpoint is only resumed under the same ones
+        ckptConfig = {'circuit':fileHash(plLogicFile),'highImpedance':highImpedance,'hiZOracle':hiZOracle,
+                      'pruneKeys':pruneKeys,'pruneSeed':pruneSeed if pruneKeys else None}
+        if recCopies > 0 and os.path.exists(checkpointFile):    # Recovery mode: the DIPs of the recovered copies come from the checkpoint
+            try:
+                ckpt = readCheckpoint(checkpointFile,inVars,keyVars,outVars,ckptConfig)
+            except RuntimeError:
+                ckpt = None
+            if ckpt is not None and len(ckpt['dips']) == recCopies:
+                for dip,oracleOut in zip(ckpt['dips'],ckpt['outs']):
+                    dipSet.add(dip)
+                    allDIPs.append(dip)
+                    allOuts.append(oracleOut)
+                iters = ckpt['round'] + 1
+                logging.info(f'DIPs of the {recCopies} recovered circuit copies read from checkpoint {checkpointFile}. Continuing at round #{iters}.')
+            else:
+                logging.warning(f'Checkpoint {checkpointFile} does not hold the DIPs of the {recCopies} recovered circuit copies. Revisited DIPs are only detected among new DIPs.')
+        elif recCopies > 0:
+            logging.warning(f'No checkpoint of the {recCopies} recovered circuit copies found at {checkpointFile}. Revisited DIPs are only detected among new DIPs.')
+        copyBase = recCopies - len(allDIPs)
+        if resumeFn != None:    # Resume mode: rebuild the constraints of every checkpointed DIP, without solving
+            ckpt = readCheckpoint(resumeFn,inVars,keyVars,outVars,ckptConfig)
+            with phase('resume'):
+                for dip,oracleOut in zip(ckpt['dips'],ckpt['outs']):
+                    addDIP(dip,oracleOut)
+            iters = ckpt['round'] + 1
+            logging.info(f'SAT attack resumed from checkpoint {resumeFn} at round #{iters}, with {len(allDIPs)} DIPs.')
+            print(f'Resuming SAT attack at round #{iters}, with {len(allDIPs)} DIPs from {resumeFn}')
+        if 2**len(inVars) <= enumLimit:     # Small input space: solve for the key against the whole truth table
+            tablePatterns = dipSet.unexplored()
+            logging.info(f'Input space of {2**len(inVars)} patterns is within the enumeration limit. Querying the oracle for all {len(tablePatterns)} unexplored patterns, instead of searching for DIPs.')
+            print(f'Enumerating the oracle truth table ({len(tablePatterns)} input patterns)...')
+            with phase('oracleQuery'):
+                outArr = queryOracleBatch(tablePatterns,oracleNetlist,inVars,outVars,topLevelMod=topModule,oracleSel=pythonOracle,oracle=oracle,cache=cache) if tablePatterns else []
+            for dip,outRow in zip(tablePatterns,outArr):
+                addDIP(dip,{var: bool(val) for var,val in zip(outVars,outRow)},miter=False)
+        endRound('setup')
+        while not (2**len(inVars) <= enumLimit):
+            # If 2^N DIPs exceeded, the attack has failed to terminate correctly.
+            if(len(allDIPs) > (2**len(inVars))):
+                logging.error(f'Attack entering round {iters}, despite only a possible {2**len(inVars)} DIPs. Attack is improperly formulated. Please review and fix input files.')
+                raise RuntimeError('All possible DIPs explored without expected attack termination. See log for details.')
+            # We've already explored every I/O combination as a DIP, then we can be done early. No need for the final round, since it should return UNSAT (nothing new learned on that round).
+            # Short of full coverage, the miter itself is the irrelevance check: it is UNSAT once no unexplored pattern can distinguish two keys that agree with every DIP
+            elif dipSet.complete() and noEarlyTermination:
+                logging.warning(f'Attack entering round {iters}. All possible input patterns have been explored as DIPs. Since all information has been learned, and this round is expected to return UNSAT, this round will be skipped.')
+                print('All possible input patterns have been explored as DIPs. Skipping ahead to key solve step...')
+                break
+
+            # Run SAT on miter & extract DIP if SAT
+            print(f'\nRunning SAT on Miter clauses, round #{iters}.')
+            with phase('miterSolve'):
+                sat,dip = miterSession.check(inVars)
+            if not sat:         # Attack loop exit condition
+                logging.info(f'Miter circuit UNSATISFIED at round #{iters}.')
+                print('UNSAT')
+                if iters == 1 and recCopies == 0:   # The base Z3 model is unsatisfiable... you messed up
+                    logging.error(f'The provided encrytped logic file is unsatisfiable within itself. Please review and fix {plLogicFile}')
+                    raise RuntimeError('Base circuit unsatisfiable. See log for details.')
+                endRound(iters)
+                break           # If no more DIPs, we're done
+            logging.info(f'Miter circuit SATISFIED at round #{iters}. Extracted DIP: {dip}')
+            print('SAT\nExtracted DIP:',*dip.items(),'\n',sep=' ')
+
+            # Harvest more DIPs from the same miter by blocking each one found and solving again. The blocking
+            # clauses are kept: once a DIP's circuit copies are appended, it can no longer distinguish keys anyway
+            roundDIPs = [dip]
+            while len(roundDIPs) < min(dipsPerRound,2**len(inVars)-len(allDIPs)):
+                miterSession.add([blockingClause(roundDIPs[-1])])
+                with phase('miterSolve'):
+                    sat,dip = miterSession.check(inVars)
+                if not sat:
+                    break
+                logging.info(f'Additional DIP extracted at round #{iters}: {dip}')
+                roundDIPs.append(dip)
+
+            # Consult oracle, in a single batch for multiple DIPs
+            with phase('oracleQuery'):
+                if len(roundDIPs) == 1:
+                    roundOuts = [queryOracle(dip,oracleNetlist,inVars,outVars,topLevelMod=topModule,trgtTb=tb,simOutFile=tbOutputFile,oracleSel=pythonOracle,oracle=oracle,cache=cache)]
+                else:
+                    outArr = queryOracleBatch(roundDIPs,oracleNetlist,inVars,outVars,topLevelMod=topModule,oracleSel=pythonOracle,oracle=oracle,cache=cache)
+                    roundOuts = [{var: bool(val) for var,val in zip(outVars,outRow)} for outRow in outArr]
+            roundStats.count('roundDIPs',len(roundDIPs))
+
+            for dip,oracleOut in zip(roundDIPs,roundOuts):
+                # Append circuit copies to the miter circuit, and a circuit copy with DIP and oracle output to
+                # the key-solve session. A repeated DIP ends the attack with an error
+                addDIP(dip,oracleOut)
+
+            # Checkpoint the attack, so it can be resumed from the next round
+            with phase('checkpoint'):
+                writeCheckpoint(checkpointFile,iters,allDIPs,allOuts,inVars,keyVars,outVars,ckptConfig)
+
+            # Extract a candidate key. In cube-and-conquer mode, the key is only solved for once the attack loop exits
+            if cubeDepth == 0:
+                with phase('keySolve'):
+                    candidate = keySession.check(keyVars)
+                if candidate[0]:
+                    logging.info(f'Candidate key after round #{iters}: {candidate[1]}')
+                else:
+                    logging.warning(f'No key satisfies the DIPs found by round #{iters}.')
+
+            if debug:       # Checkpoint each round
+                writeZ3pl(miterSession.plVars,miterSession.plClauses,os.path.join(debugDir,'miter_final.py'),prnt=True)
+                if isinstance(miterSession,CNFSession):
+                    miterSession.writeDimacs(os.path.join(debugDir,'miter_final.cnf'))
+
+            logging.info(f'Input space coverage after round #{iters}: {len(dipSet)} of {2**len(inVars)} patterns ({100*dipSet.coverage():.4g}%).')
+            endRound(iters)
+            iters += 1
+
+        # Persist the final problems in a standard format, for other solvers and tools
+        if problemFormat is not None:
+            for session,name in ((miterSession,miterName),(keySession,dipCircuitsName)):
+                problemFile = os.path.join(here,workDir) + name + '.' + problemFormat
+                try:
+                    writeProblem(session.plVars,session.plClauses,problemFile)
+                    logging.info(f'Final {name} problem written to: {problemFile}')
+                except ValueError as err:
+                    logging.warning(f'Unable to write the final {name} problem in {problemFormat} format: {err}')
+
+        # The key-solve session already holds every DIP circuit copy, so the last candidate key is the extracted key
+        keyStartTime = datetime.datetime.now()
+        print(f'\nInput space coverage: {len(dipSet)} of {2**len(inVars)} patterns ({100*dipSet.coverage():.4g}%)')
+        print('\nRunning SAT on all extracted DIPS...')
+        if debug and isinstance(keySession,CNFSession):
+            keySession.writeDimacs(os.path.join(debugDir,dipCircuitsName+'.cnf'))
+        with phase('keySolve'):
+            if cubeDepth > 0:
+                candidate = cubeCheck(keySession,splitVariables(plCircuit,keySession,keyVars,cubeDepth),keyVars)
+            elif candidate is None: # No new rounds in recovery mode
+                candidate = keySession.check(keyVars)
+        sat,key = candidate
+        endRound('keySolve')
+    finally:
+        if isinstance(miterSession,PortfolioSession):
+            miterSession.close()
+        if oracle is not None:
+            oracle.close()
+        if cache is not None:
+            cache.close()
+        roundStats.close()
+    if stats is not None:
+        endTime = datetime.datetime.now()
+        stats.update({'rounds':iters-1,'dips':len(dipSet),'coverage':dipSet.coverage(),'attackTime':(keyStartTime-loopStartTime).total_seconds(),
+                      'keySolveTime':(endTime-keyStartTime).total_seconds(),'runtime':(endTime-startTime).total_seconds(),
+                      'fixedKeys':len(fixedKeys),'keyPairs':len(keyPairs),
+                      'miterStats':miterSession.statistics(),'keyStats':keySession.statistics()})
     if not sat:
         logging.error('DIP Circuit UNSATISFIED - SAT ATTACK FAILED')
         print('DIP Circuit UNSATISFIED - SAT ATTACK FAILED')
@@ -802,13 +1038,26 @@ if __name__ == '__main__':
     parser.add_argument('oracleNetlist',type=str,help='Path to the HDL netlist file for the unencrypted, oracle black box. Input and output names must coincide with what is found in the inputList and outputList files')
     parser.add_argument('topModule',type=str,help='Top-level module name within "oracleNetlist"')
     parser.add_argument('-e','--disableEarlyTermination',default=True,action='store_false',help='By default, skips the final (UNSAT) round of the attack if all possible inputs are explored as DIPs. Enable flag to go through final round regardless')
+    parser.add_argument('-b','--backend',type=str,default='z3',help='SAT solver backend: "z3" (default), "pysat[:solver]" for an incremental pysat solver such as pysat:cadical153 or pysat:glucose4, or "dimacs:binary" for an external DIMACS solver binary such as dimacs:kissat. Non-z3 backends Tseitin-encode the problem into CNF, and fall back to Z3 for circuits with Int variables')
+    parser.add_argument('-c','--recompileOracle',default=False,action='store_true',help='Regenerate the testbench and recompile the Verilog oracle for every query, instead of compiling it once and streaming queries to a running simulator')
     parser.add_argument('-d','--debug',default=False,action='store_true',help='Creates intermediate scripts in a "debug" directory, for the purposes of troubleshooting when an attack goes awry')
     parser.add_argument('-f','--fresh',default=False,action='store_true',help='Create fresh directories for SAT attack. WARNING: deletes preexisting logs and outputs')
+    parser.add_argument('-F','--format',type=str,default=None,choices=problemFormats,dest='problemFormat',help='Also write the final miter and DIP circuits to the work/ directory in SMT-LIB2 (smt2) or ASCII AIGER (aag, purely Boolean circuits only) format, which load much faster than Z3 Python scripts and can be read by other solvers and tools such as ABC')
+    parser.add_argument('-j','--portfolio',type=int,default=1,help='Number of solver configurations (different seeds, phase and restart settings, or pysat solvers) raced in parallel worker processes on every miter solve. The first answer is used and the other workers are interrupted. Workers live for the whole attack and receive only the clauses added each round, so every solver keeps what it learned in previous rounds. CaDiCaL and Lingeling cannot be interrupted, and restart from the current miter after losing a solve')
+    parser.add_argument('-k','--resume',default=None,action='store',dest='resumeFn',help='Resume an interrupted attack from its checkpoint file (work/checkpoint.npz, written every round), at the round after the last one it completed. The DIPs and oracle outputs in the checkpoint are turned back into miter and key-solve constraints without solving or querying the oracle again')
+    parser.add_argument('-m','--dipsPerRound',type=int,default=1,help='Maximum number of DIPs extracted from the miter each round. Each DIP found is blocked and the miter is solved again, then the oracle is queried for all of them in one batch')
+    parser.add_argument('-n','--noOracleCache',default=True,action='store_false',dest='oracleCache',help='Disable the on-disk cache of oracle responses, so every query is simulated. By default, responses are kept in work/oracleCache.sqlite and reused by later runs in the same directory against the same oracle file')
     parser.add_argument('-o','--oracleType',default=True,action='store_false',help='In cases where a circuit can express tri-state outputs, this indicates if the oracle can express HiZ outputs. Setting the flag indicates that the oracle cannot express HiZ outputs.')
-    parser.add_argument('-p','--pythonOracle',default=False,action='store_true',help='If true, oraclenetlist points to a Python oracle file (alternative to using iVerilog). Oracle function must be declared as "main", and all input variable names must coincide with inputList')
+    parser.add_argument('-p','--pythonOracle',default=False,action='store_true',help='If true, oracleNetlist points to a functional Z3-PL oracle file (alternative to using iVerilog), which is compiled once and evaluated in-process. Every net must be defined by an equality clause, and all input/output names must coincide with ioCSV. topModule is ignored')
     parser.add_argument('-q','--quiet',default=False,action='store_true',help='Prevent printing of SAT attack progress to terminal')
-    parser.add_argument('-r','--recover',default=None,action='store',dest='recMiterFn',help='Set this flag and point to a running miter file (likely in a work/ directory)')
+    parser.add_argument('-r','--recover',default=None,action='store',dest='recMiterFn',help='Set this flag and point to a running miter file (likely work/miter.pls). Miters written as Z3 Python scripts are also accepted')
+    parser.add_argument('-w','--writeMiter',default=False,action='store_true',help='Keep the running miter and DIP circuits files (work/miter.pls, work/dipCircuits.pls) up to date each round, so that an interrupted attack can be recovered with -r. They are append-only PL streams: each round only writes its new circuit copies. Always enabled in debug mode')
+    parser.add_argument('-S','--pruneSeed',type=int,default=defPruneSeed,help=f'Seed of the random simulation patterns used by --pruneKeys. The pruned key space is the same for the same seed. Default is {defPruneSeed}')
+    parser.add_argument('-s','--sharedOracleCache',default=False,action='store_true',help='Keep the oracle response cache in $XDG_CACHE_HOME/transat/ (~/.cache/transat/ if unset) instead of the work/ directory, so it is shared by runs in every directory')
+    parser.add_argument('-t','--enumLimit',type=int,default=0,help='If the circuit has at most this many input patterns (2^inputs), query the oracle for its whole truth table in one batch and solve for the key against it directly, instead of searching for DIPs. At most 2^24 patterns. Default is 0 (never)')
+    parser.add_argument('-u','--cubeDepth',type=int,default=0,help='Solve the final key solve by cube-and-conquer: the key space is split into 2^N cubes on the N most used key variables, which are solved in parallel worker processes. Candidate keys are then not extracted every round')
+    parser.add_argument('-x','--pruneKeys',default=False,action='store_true',help='Before the attack loop, detect key bits that cannot change the circuit function (don\'t-care keys) and pairs of key bits that can be exchanged without changing it (symmetric keys), by random simulation and SAT checks. Don\'t-care keys are fixed to a constant in every circuit copy and symmetric key pairs are ordered, shrinking the key space searched by every round')
     parser.add_argument('-z','--tristate',default=False,action='store_true',help='Enables "tri-state" mode for circuit outputs. High-impedance mode considers situations where an output may exhibit tri-state behavior and its associated logic value may be invalid. The correlating tri-state variable name must be listed after the "output" type in the ioCSV file')
     clArgs = parser.parse_args()
 
-    satAttack(clArgs.plLogicFile,clArgs.ioCSV,clArgs.oracleNetlist,clArgs.topModule,clArgs.disableEarlyTermination,clArgs.fresh,clArgs.oracleType,clArgs.pythonOracle,clArgs.debug,clArgs.quiet,clArgs.recMiterFn,clArgs.tristate)
+    satAttack(clArgs.plLogicFile,clArgs.ioCSV,clArgs.oracleNetlist,clArgs.topModule,clArgs.disableEarlyTermination,clArgs.fresh,clArgs.oracleType,clArgs.pythonOracle,clArgs.debug,clArgs.quiet,clArgs.recMiterFn,clArgs.tristate,clArgs.writeMiter,clArgs.recompileOracle,clArgs.oracleCache,clArgs.backend,clArgs.dipsPerRound,clArgs.portfolio,clArgs.cubeDepth,clArgs.resumeFn,clArgs.enumLimit,clArgs.problemFormat,clArgs.pruneKeys,clArgs.sharedOracleCache,clArgs.pruneSeed)
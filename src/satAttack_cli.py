@@ -13,16 +13,29 @@ def main():
     parser.add_argument('oracleNetlist',type=str,help='Path to the HDL netlist file for the unencrypted, oracle black box. Input and output names must coincide with what is found in the inputList and outputList files')
     parser.add_argument('topModule',type=str,help='Top-level module name within "oracleNetlist"')
     parser.add_argument('-e','--disableEarlyTermination',default=True,action='store_false',help='By default, skips the final (UNSAT) round of the attack if all possible inputs are explored as DIPs. Enable flag to go through final round regardless')
+    parser.add_argument('-b','--backend',type=str,default='z3',help='SAT solver backend: "z3" (default), "pysat[:solver]" for an incremental pysat solver such as pysat:cadical153 or pysat:glucose4, or "dimacs:binary" for an external DIMACS solver binary such as dimacs:kissat. Non-z3 backends Tseitin-encode the problem into CNF, and fall back to Z3 for circuits with Int variables')
+    parser.add_argument('-c','--recompileOracle',default=False,action='store_true',help='Regenerate the testbench and recompile the Verilog oracle for every query, instead of compiling it once and streaming queries to a running simulator')
     parser.add_argument('-d','--debug',default=False,action='store_true',help='Creates intermediate scripts in a "debug" directory, for the purposes of troubleshooting when an attack goes awry')
     parser.add_argument('-f','--fresh',default=False,action='store_true',help='Create fresh directories for SAT attack. WARNING: deletes preexisting logs and outputs')
+    parser.add_argument('-F','--format',type=str,default=None,choices=['smt2','aag'],dest='problemFormat',help='Also write the final miter and DIP circuits to the work/ directory in SMT-LIB2 (smt2) or ASCII AIGER (aag, purely Boolean circuits only) format, which load much faster than Z3 Python scripts and can be read by other solvers and tools such as ABC')
+    parser.add_argument('-j','--portfolio',type=int,default=1,help='Number of solver configurations (different seeds, phase and restart settings, or pysat solvers) raced in parallel worker processes on every miter solve. The first answer is used and the other workers are interrupted. Workers live for the whole attack and receive only the clauses added each round, so every solver keeps what it learned in previous rounds. CaDiCaL and Lingeling cannot be interrupted, and restart from the current miter after losing a solve')
+    parser.add_argument('-k','--resume',default=None,action='store',dest='resumeFn',help='Resume an interrupted attack from its checkpoint file (work/checkpoint.npz, written every round), at the round after the last one it completed. The DIPs and oracle outputs in the checkpoint are turned back into miter and key-solve constraints without solving or querying the oracle again')
+    parser.add_argument('-m','--dipsPerRound',type=int,default=1,help='Maximum number of DIPs extracted from the miter each round. Each DIP found is blocked and the miter is solved again, then the oracle is queried for all of them in one batch')
+    parser.add_argument('-n','--noOracleCache',default=True,action='store_false',dest='oracleCache',help='Disable the on-disk cache of oracle responses, so every query is simulated. By default, responses are kept in work/oracleCache.sqlite and reused by later runs in the same directory against the same oracle file')
     parser.add_argument('-o','--oracleType',default=True,action='store_false',help='In cases where a circuit can express tri-state outputs, this indicates if the oracle can express HiZ outputs. Setting the flag indicates that the oracle cannot express HiZ outputs.')
-    parser.add_argument('-p','--pythonOracle',default=False,action='store_true',help='If true, oraclenetlist points to a Python oracle file (alternative to using iVerilog). Oracle function must be declared as "main", and all input variable names must coincide with inputList')
+    parser.add_argument('-p','--pythonOracle',default=False,action='store_true',help='If true, oracleNetlist points to a functional Z3-PL oracle file (alternative to using iVerilog), which is compiled once and evaluated in-process. Every net must be defined by an equality clause, and all input/output names must coincide with ioCSV. topModule is ignored')
     parser.add_argument('-q','--quiet',default=False,action='store_true',help='Prevent printing of SAT attack progress to terminal')
-    parser.add_argument('-r','--recover',default=None,action='store',dest='recMiterFn',help='Set this flag and point to a running miter file (likely in a work/ directory)')
+    parser.add_argument('-r','--recover',default=None,action='store',dest='recMiterFn',help='Set this flag and point to a running miter file (likely work/miter.pls). Miters written as Z3 Python scripts are also accepted')
+    parser.add_argument('-w','--writeMiter',default=False,action='store_true',help='Keep the running miter and DIP circuits files (work/miter.pls, work/dipCircuits.pls) up to date each round, so that an interrupted attack can be recovered with -r. They are append-only PL streams: each round only writes its new circuit copies. Always enabled in debug mode')
+    parser.add_argument('-S','--pruneSeed',type=int,default=2026,help='Seed of the random simulation patterns used by --pruneKeys. The pruned key space is the same for the same seed. Default is 2026')
+    parser.add_argument('-s','--sharedOracleCache',default=False,action='store_true',help='Keep the oracle response cache in $XDG_CACHE_HOME/transat/ (~/.cache/transat/ if unset) instead of the work/ directory, so it is shared by runs in every directory')
+    parser.add_argument('-t','--enumLimit',type=int,default=0,help='If the circuit has at most this many input patterns (2^inputs), query the oracle for its whole truth table in one batch and solve for the key against it directly, instead of searching for DIPs. At most 2^24 patterns. Default is 0 (never)')
+    parser.add_argument('-u','--cubeDepth',type=int,default=0,help='Solve the final key solve by cube-and-conquer: the key space is split into 2^N cubes on the N most used key variables, which are solved in parallel worker processes. Candidate keys are then not extracted every round')
+    parser.add_argument('-x','--pruneKeys',default=False,action='store_true',help='Before the attack loop, detect key bits that cannot change the circuit function (don\'t-care keys) and pairs of key bits that can be exchanged without changing it (symmetric keys), by random simulation and SAT checks. Don\'t-care keys are fixed to a constant in every circuit copy and symmetric key pairs are ordered, shrinking the key space searched by every round')
     parser.add_argument('-z','--tristate',default=False,action='store_true',help='Enables "tri-state" mode for circuit outputs. High-impedance mode considers situations where an output may exhibit tri-state behavior and its associated logic value may be invalid. The correlating tri-state variable name must be listed after the "output" type in the ioCSV file')
     clArgs = parser.parse_args()
 
-    satAttack(clArgs.plLogicFile,clArgs.ioCSV,clArgs.oracleNetlist,clArgs.topModule,clArgs.disableEarlyTermination,clArgs.fresh,clArgs.oracleType,clArgs.pythonOracle,clArgs.debug,clArgs.quiet,clArgs.recMiterFn,clArgs.tristate)
+    satAttack(clArgs.plLogicFile,clArgs.ioCSV,clArgs.oracleNetlist,clArgs.topModule,clArgs.disableEarlyTermination,clArgs.fresh,clArgs.oracleType,clArgs.pythonOracle,clArgs.debug,clArgs.quiet,clArgs.recMiterFn,clArgs.tristate,clArgs.writeMiter,clArgs.recompileOracle,clArgs.oracleCache,clArgs.backend,clArgs.dipsPerRound,clArgs.portfolio,clArgs.cubeDepth,clArgs.resumeFn,clArgs.enumLimit,clArgs.problemFormat,clArgs.pruneKeys,clArgs.sharedOracleCache,clArgs.pruneSeed)
 
 if __name__ == '__main__':
     exit(main())
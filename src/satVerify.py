@@ -19,6 +19,13 @@ import datetime
 import importlib
 from typing import Tuple
 from z3 import *
+import numpy as np
+from .plCircuit import PLCircuit
+from .cnf import solvePL,openSession,defBackend
+from .portfolio import PortfolioSession,openPortfolioSession,splitVariables,cubeCheck
+from .problemFile import writeProblem,loadProblem,problemFormats
+from .plReader import readZ3pl
+from .oracle import PyOracle,exhaustivePatterns,packWords,randomWords,wordBits,wordOnes,wordZero
 
 # -------------------------------------------------------------------------------------------------
 # Globals
@@ -68,40 +75,6 @@ def initDirs(outDir:str,logDir:str,outDirName='',freshDirs=False):
             os.makedirs(logDir)
 
 
-def readZ3pl(trgtZ3:str) -> Tuple[dict,dict,list]:
-    '''
-    Read a Python Z3 script and parse the variable and function declarations, leaving out any 
-    comment lines or Z3 Solver information. Returns dict of variables and their corresponding
-    arguments, and a string of functions.
-
-    varsDict values are a tuple. varsDict[key][0] = varType, varsDict[key][1] = varArgs
-    '''
-    varsDict = {}
-    funList = []
-    with open(trgtZ3,'r') as f:
-        f.seek(0)
-        lines = f.readlines()
-
-    # Search for variables
-    for line in lines:
-        mtchObj = re.match(r'^\s*(?P<varID>\w+)\s*=\s*(?P<varType>(Bool)|(Int)|(BitVec))\([\',\"](?P<varName>\w+)[\',\"](?P<varArgs>\s*,.*)?\).*$',line)
-        if mtchObj:
-            if (mtchObj.group('varID') != mtchObj.group('varName')):
-                logging.error(f'Variable {mtchObj.group("varName")} is given a different identifier ("{mtchObj.group("varID")}") in the source Z3 Python script "{trgtZ3}". Change this so they are identical.')
-                raise RuntimeError(f'Variable mismatch name in "{trgtZ3}". See log file for details.')
-            else:
-                varsDict[mtchObj.group('varID')] = (mtchObj.group('varType'),mtchObj.group('varArgs'))
-
-    # Search for functions (logic clauses)
-    for line in lines:
-        mtchObj = re.match(r'^\s*(?P<funID>\w+)\s*=\s*(?P<fun>[^\'\"]*)\n$',line)     # Future work: there's gotta be a better RE to exclude "Solver"
-        if mtchObj:
-            if mtchObj.group('fun') != 'Solver()':
-                funList.append(mtchObj.group('fun'))
-
-    return varsDict,funList
-
-
 def writeZ3pl(z3Vars:dict,z3Lines:list,z3Fn:str,append=False,prnt=False) -> int:
     '''
     Writes or appends a Python Z3 script from a provided list of lines. If append is true, then
@@ -184,43 +157,6 @@ def setup(plLogicFile,fresh,quiet):
     logging.warning('Code does not currently support cross-checking I/O names found in text lists against netlist files. Please check manually.')
 
 
-def copyCircuit(plClauses:list,allVars:dict,inList:list,keyList:list,outList:list,suffix='',modIns=True,modKeys=True,modOuts=True,modNets=True) -> Tuple[dict,list]:
-    '''
-    Create a copy of some lines of PL clauses, and modify the end suffixes of variables. If using
-    this function multiple times on the same plClauses, be sure that you modify the nets in the 
-    FIRST copy step, then set modNets=False for the rest of the calls. Returns modified list of 
-    clauses and a new dictionary of all variables in the copy.
-
-    plClauses       - List containing lines of a PL file
-    allVars         - Dict of all variables in plClauses and their corresponding Z3 type (e.g., 'Bool', etc.)
-    inList          - List containing names of each input variable
-    keyList         - List containing names of each key input variable
-    outList         - List containing names of each output variable
-    suffix          - String containing suffix to be appended to 
-    '''
-    # Compile list of variables to be copied with new names
-    changeList = {}
-    if modIns:
-        changeList = changeList | {k: allVars[k] for k in set(inList).intersection(allVars.keys())}
-    if modOuts:
-        changeList = changeList | {k: allVars[k] for k in set(outList).intersection(allVars.keys())}
-    if modKeys:
-        changeList = changeList | {k: allVars[k] for k in set(keyList).intersection(allVars.keys())}
-    if modNets:
-        netsList = [x for x in allVars if x not in (inList+outList+keyList)]
-        changeList = changeList | {k: allVars[k] for k in set(netsList).intersection(allVars.keys())}
-
-    # Create variable and clause copies
-    clauses = plClauses
-    clauseVars = {k:v for k,v in allVars.items() if k not in changeList}
-    for var in changeList.keys():
-        newVar = var+suffix
-        clauses = [re.sub(r'\b{}\b'.format(var),newVar,i) for i in clauses]
-        clauseVars = clauseVars | {newVar: allVars[var]}
-
-    return clauses,clauseVars
-
-
 def buildVerMiter(trgtEncPL:str,trgtFunPL:str,inVars:list,keyVars:dict,outVars:list,miterFile:str,mSuff='_m',hiZVars={}):
     '''
     Create verification miter circuit for two given input CNF files. Returns a list of input variable names and a list key variable 
@@ -231,25 +167,26 @@ def buildVerMiter(trgtEncPL:str,trgtFunPL:str,inVars:list,keyVars:dict,outVars:l
     inVars      - List of variables designated as inputs in targetPL
     keyVars     - List of variables designated as key inputs in targetPL
     outVars     - List of variables designated as outputs in targetPL
-    miterFile   - Desired path, filename, and extension for output Z3 file
+    miterFile   - Desired path, filename, and extension for output file. A .smt2 or .aag extension writes the miter
+                    in SMT-LIB2 or AIGER format, and any other extension as a Z3 Python script
     mSuff       - Desired suffix to be added to net names for each miter circuit (do not include copy number)
     hiZVars     - List of variables designates as outputs in targetPL
     '''
     # Read in encrypted & functional PL
-    funPLVars,funPLClauses = readZ3pl(trgtFunPL)
-    encPLVars,encPLClauses = readZ3pl(trgtEncPL)
+    funPL = PLCircuit(*readZ3pl(trgtFunPL),name=trgtFunPL)
+    encPL = PLCircuit(*readZ3pl(trgtEncPL),name=trgtEncPL)
 
     miterVars = {}
     miterClauses = []
 
     # Create copy of functional netlist
-    copy,copyVars = copyCircuit(funPLClauses,funPLVars,inVars,[],outVars,suffix=f'{mSuff}1',modIns=False,modKeys=False)
-    miterVars = miterVars | {k:v for k,v in copyVars.items() if k not in miterClauses}
+    copy,copyVars = funPL.copy(inVars,[],outVars,outSuff=f'{mSuff}1',netSuff=f'{mSuff}1')
+    miterVars = miterVars | copyVars
     miterClauses.extend(copy)
 
     # Create copy of encypted netlist & hard-code keys
-    copy,copyVars = copyCircuit(encPLClauses,encPLVars,inVars,list(keyVars.keys()),outVars,suffix=f'{mSuff}2',modIns=False)
-    miterVars = miterVars | {k:v for k,v in copyVars.items() if k not in miterClauses}
+    copy,copyVars = encPL.copy(inVars,list(keyVars.keys()),outVars,keySuff=f'{mSuff}2',outSuff=f'{mSuff}2',netSuff=f'{mSuff}2')
+    miterVars = miterVars | copyVars
     miterClauses.extend(copy)
     for var,val in keyVars.items():
         miterClauses.append(f'{var}{mSuff}2 == {val}')
@@ -260,7 +197,7 @@ def buildVerMiter(trgtEncPL:str,trgtFunPL:str,inVars:list,keyVars:dict,outVars:l
     outSubclauses = []
     if hiZVars != {}:
         for outVar, hiZVar in hiZVars.items():
-            if hiZVar in funPLVars:
+            if hiZVar in funPL.plVars:
                 outSubclauses.append(f'Xor({outVar+mSuff+"1"},{outVar+mSuff+"2"})')
                 miterClauses.append(f'({hiZVar}{mSuff}2 == {hiZVar}{mSuff}1)')
             else:
@@ -271,7 +208,56 @@ def buildVerMiter(trgtEncPL:str,trgtFunPL:str,inVars:list,keyVars:dict,outVars:l
             outSubclauses.append(f'Xor({var+mSuff+"1"},{var+mSuff+"2"})')
     miterClauses.append(f'Or({",".join(outSubclauses)})     # Miter circuit')
 
-    writeZ3pl(miterVars,miterClauses,miterFile)
+    if os.path.splitext(miterFile)[1][1:] in problemFormats:
+        writeProblem(miterVars,miterClauses,miterFile)
+    else:
+        writeZ3pl(miterVars,miterClauses,miterFile)
+
+
+def simulationCheck(trgtEncPL:str,trgtFunPL:str,inVars:list,keyVars:dict,outVars:list,numPatterns:int,seed=None) -> Tuple[bool,bool,dict]:
+    '''
+    Bit-parallel simulation prefilter for verification. If both circuits are functional, purely
+    Boolean descriptions, they are simulated on random input patterns (or on every input pattern, if
+    there are no more than numPatterns of them). Returns whether the check reached a decision, the
+    decision (True if the circuits differ, as with runSAT), and the differing input pattern.
+
+    trgtEncPL   - Path to Z3 Python file containing the encrypted circuit
+    trgtFunPL   - Path to Z3 Python file containing the functional circuit
+    inVars      - List of input variables
+    keyVars     - Dict of key variables and their values
+    outVars     - List of output variables
+    numPatterns - Number of random input patterns to simulate
+    seed        - Seed for the random pattern generator
+    '''
+    keyList = list(keyVars.keys())
+    try:
+        funOracle = PyOracle(PLCircuit(*readZ3pl(trgtFunPL),name=trgtFunPL),inVars,outVars)
+        encOracle = PyOracle(PLCircuit(*readZ3pl(trgtEncPL),name=trgtEncPL),inVars+keyList,outVars)
+    except ValueError as err:
+        logging.info(f'Simulation prefilter skipped, since a circuit is not a functional description: {err}')
+        return False,None,None
+    if funOracle.evaluateWords is None or encOracle.evaluateWords is None:
+        logging.info('Simulation prefilter skipped, since a circuit is not purely Boolean.')
+        return False,None,None
+
+    exhaustive = 2**len(inVars) <= numPatterns
+    if exhaustive:
+        inWords = packWords(exhaustivePatterns(len(inVars)))
+    else:
+        inWords = randomWords(len(inVars),-(-numPatterns // wordBits),seed)
+    keyWords = np.array([[wordOnes if str(val).strip().lower() in ('true','1') else wordZero]*inWords.shape[1] for val in keyVars.values()],dtype=np.uint64).reshape(len(keyList),-1)
+
+    diffWords = np.bitwise_or.reduce(funOracle.simulate(inWords) ^ encOracle.simulate(np.vstack([inWords,keyWords])),axis=0)
+    if diffWords.any():
+        word = int(np.flatnonzero(diffWords)[0])
+        bit = (int(diffWords[word]) & -int(diffWords[word])).bit_length() - 1     # Lowest differing pattern
+        pattern = {var: bool((int(inWords[i,word]) >> bit) & 1) for i,var in enumerate(inVars)}
+        return True,True,dict(sorted(pattern.items()))
+    elif exhaustive:
+        logging.info(f'Simulation prefilter checked all {2**len(inVars)} input patterns.')
+        return True,False,None
+    logging.info(f'Simulation prefilter found no differences over {inWords.shape[1]*wordBits} random input patterns.')
+    return False,None,None
 
 
 def runSAT(trgtZ3:str,voi=[]) -> Tuple[bool,list]:
@@ -308,7 +294,7 @@ def runSAT(trgtZ3:str,voi=[]) -> Tuple[bool,list]:
     return satisfied,voiVals
 
 
-def satVerify(plEncryptedFile:str,plFunctionFile:str,ioCSV:str,keyValueCSV:str,fresh=False,quiet=False,highImpedance=None):
+def satVerify(plEncryptedFile:str,plFunctionFile:str,ioCSV:str,keyValueCSV:str,fresh=False,quiet=False,highImpedance=None,simPatterns=65536,backend=defBackend,portfolio=1,cubeDepth=0,problemFormat='py'):
 
     # Run argument parsing, directory creation, and logging setup
     startTime = datetime.datetime.now()
@@ -343,13 +329,54 @@ def satVerify(plEncryptedFile:str,plFunctionFile:str,ioCSV:str,keyValueCSV:str,f
         for row in reader:
             keyVals[row[0]] = row[1]
 
-    # Build verification Z3 clauses
-    logging.info(f'Creating SAT verification script, here: {miterFile}')
-    buildVerMiter(plEncryptedFile,plFunctionFile,inVars,keyVals,outVars,miterFile,hiZVars=hiZVars)
+    # Simulation prefilter - a differing pattern (or an exhaustive match) makes the SAT step unnecessary
+    decided = False
+    if simPatterns > 0 and hiZVars == {}:
+        decided,decision,voiVals = simulationCheck(plEncryptedFile,plFunctionFile,inVars,keyVals,outVars,simPatterns)
 
-    # Run SAT verification script
-    logging.info('Running SAT verification script...')
-    decision,voiVals = runSAT(miterName,inVars)
+    if not decided:
+        # Build verification Z3 clauses
+        verFile = os.path.splitext(miterFile)[0] + '.' + problemFormat
+        logging.info(f'Creating SAT verification script, here: {verFile}')
+        try:
+            buildVerMiter(plEncryptedFile,plFunctionFile,inVars,keyVals,outVars,verFile,hiZVars=hiZVars)
+        except ValueError as err:
+            logging.error(f'Unable to write the verification miter in {problemFormat} format: {err}')
+            raise RuntimeError(f'Verification miter cannot be written in {problemFormat} format. See log for details.')
+
+        # Run SAT verification script
+        logging.info('Running SAT verification script...')
+        if problemFormat in problemFormats:     # Problem files are loaded straight into a solver session
+            if problemFormat == 'smt2' and backend != defBackend:
+                logging.warning(f'SMT-LIB2 problems can only be solved by Z3, so the "{backend}" backend is not used.')
+            session = openPortfolioSession(miterName,backend if problemFormat == 'aag' else defBackend,{},portfolio)
+            loadProblem(session,verFile)
+            if cubeDepth > 0:
+                encPL = PLCircuit(*readZ3pl(plEncryptedFile),name=plEncryptedFile)
+                decision,voiVals = cubeCheck(session,splitVariables(encPL,session,inVars,cubeDepth),inVars)
+            else:
+                decision,voiVals = session.check(inVars)
+            if isinstance(session,PortfolioSession):
+                session.close()
+        elif cubeDepth > 0:
+            verVars,verClauses = readZ3pl(miterFile)
+            session = openSession(miterName,backend,verVars)
+            session.declare(verVars)
+            session.add(verClauses)
+            encPL = PLCircuit(*readZ3pl(plEncryptedFile),name=plEncryptedFile)
+            decision,voiVals = cubeCheck(session,splitVariables(encPL,session,inVars,cubeDepth),inVars)
+        elif portfolio > 1:
+            verVars,verClauses = readZ3pl(miterFile)
+            session = openPortfolioSession(miterName,backend,verVars,portfolio)
+            session.declare(verVars)
+            session.add(verClauses)
+            decision,voiVals = session.check(inVars)
+            if isinstance(session,PortfolioSession):
+                session.close()
+        elif backend == defBackend:
+            decision,voiVals = runSAT(miterName,inVars)
+        else:
+            decision,voiVals = solvePL(miterName,backend,*readZ3pl(miterFile),inVars)
     if decision:
         logging.info(f'Verification failed! Programmed circuit working improperly for the input pattern: {voiVals}')
         print('\nSAT VERIFICATION FAILED! See log for details.')
@@ -370,9 +397,14 @@ if __name__ == '__main__':
     parser.add_argument('plFunctionFile',type=str,help='Path to a Python file containing the counterpart non-encrypted functionality to plEncryptedFile. Clauses must be written in the Z3 Python format. For help writing Z3 Python, see: https://www.cs.toronto.edu/~victorn/tutorials/sat20/index.html#installation')
     parser.add_argument('ioCSV',type=str,help='Path to the comma-delimited CSV file containing a list of input/output/key names, their corresponding type (input/output/key), and a corresponding HiZ variable, if applicable.')
     parser.add_argument('keyValueCSV',type=str,help='Path to the CSV file containing a list of key input names and values to the plEncryptedFile')
+    parser.add_argument('-b','--backend',type=str,default='z3',help='SAT solver backend: "z3" (default), "pysat[:solver]" for a pysat solver such as pysat:cadical153, or "dimacs:binary" for an external DIMACS solver binary such as dimacs:kissat. Non-z3 backends Tseitin-encode the problem into CNF, and fall back to Z3 for circuits with Int variables')
     parser.add_argument('-f','--fresh',default=False,action='store_true',help='Create fresh directories for SAT attack. WARNING: deletes preexisting logs and outputs')
+    parser.add_argument('-F','--format',type=str,default='py',choices=['py']+problemFormats,dest='problemFormat',help='File format of the verification miter written to the work/ directory: a Z3 Python script (py, default), SMT-LIB2 (smt2), or ASCII AIGER (aag, purely Boolean circuits only). SMT-LIB2 and AIGER miters are loaded straight into the solver, which is much faster than importing a large script, and can be read by other tools')
+    parser.add_argument('-j','--portfolio',type=int,default=1,help='Number of solver configurations (different seeds, phase and restart settings, or pysat solvers) raced in parallel worker processes on the verification miter. The first answer is used and the other workers are stopped')
+    parser.add_argument('-s','--simPatterns',type=int,default=65536,help='Number of random input patterns to simulate before running SAT, when both circuits are functional and purely Boolean. Circuits with no more input patterns than this are checked exhaustively by simulation alone. Set to 0 to disable')
     parser.add_argument('-q','--quiet',default=False,action='store_true',help='Prevent printing of SAT attack progress to terminal')
+    parser.add_argument('-u','--cubeDepth',type=int,default=0,help='Solve the verification miter by cube-and-conquer: the input space is split into 2^N cubes on the N most used input variables, which are solved in parallel worker processes')
     parser.add_argument('-z','--tristate',default=False,action='store_true',help='Enables "tri-state" mode for circuit outputs. High-impedance mode considers situations where an output may exhibit tri-state behavior and its associated logic value may be invalid. The correlating tri-state variable name must be listed after the "output" type in the ioCSV file')
     clArgs = parser.parse_args()
 
-    satVerify(clArgs.plEncryptedFile,clArgs.plFunctionFile,clArgs.ioCSV,clArgs.keyValueCSV,clArgs.fresh,clArgs.quiet,clArgs.tristate)
+    satVerify(clArgs.plEncryptedFile,clArgs.plFunctionFile,clArgs.ioCSV,clArgs.keyValueCSV,clArgs.fresh,clArgs.quiet,clArgs.tristate,clArgs.simPatterns,clArgs.backend,clArgs.portfolio,clArgs.cubeDepth,clArgs.problemFormat)
@@ -12,12 +12,17 @@ def main():
     parser.add_argument('plFunctionFile',type=str,help='Path to a Python file containing the counterpart non-encrypted functionality to plEncryptedFile. Clauses must be written in the Z3 Python format. For help writing Z3 Python, see: https://www.cs.toronto.edu/~victorn/tutorials/sat20/index.html#installation')
     parser.add_argument('ioCSV',type=str,help='Path to the comma-delimited CSV file containing a list of input/output/key names, their corresponding type (input/output/key), and a corresponding HiZ variable, if applicable.')
     parser.add_argument('keyValueCSV',type=str,help='Path to the CSV file containing a list of key input names and values to the plEncryptedFile')
+    parser.add_argument('-b','--backend',type=str,default='z3',help='SAT solver backend: "z3" (default), "pysat[:solver]" for a pysat solver such as pysat:cadical153, or "dimacs:binary" for an external DIMACS solver binary such as dimacs:kissat. Non-z3 backends Tseitin-encode the problem into CNF, and fall back to Z3 for circuits with Int variables')
     parser.add_argument('-f','--fresh',default=False,action='store_true',help='Create fresh directories for SAT attack. WARNING: deletes preexisting logs and outputs')
+    parser.add_argument('-F','--format',type=str,default='py',choices=['py','smt2','aag'],dest='problemFormat',help='File format of the verification miter written to the work/ directory: a Z3 Python script (py, default), SMT-LIB2 (smt2), or ASCII AIGER (aag, purely Boolean circuits only). SMT-LIB2 and AIGER miters are loaded straight into the solver, which is much faster than importing a large script, and can be read by other tools')
+    parser.add_argument('-j','--portfolio',type=int,default=1,help='Number of solver configurations (different seeds, phase and restart settings, or pysat solvers) raced in parallel worker processes on the verification miter. The first answer is used and the other workers are stopped')
+    parser.add_argument('-s','--simPatterns',type=int,default=65536,help='Number of random input patterns to simulate before running SAT, when both circuits are functional and purely Boolean. Circuits with no more input patterns than this are checked exhaustively by simulation alone. Set to 0 to disable')
     parser.add_argument('-q','--quiet',default=False,action='store_true',help='Prevent printing of SAT attack progress to terminal')
+    parser.add_argument('-u','--cubeDepth',type=int,default=0,help='Solve the verification miter by cube-and-conquer: the input space is split into 2^N cubes on the N most used input variables, which are solved in parallel worker processes')
     parser.add_argument('-z','--tristate',default=False,action='store_true',help='Enables "tri-state" mode for circuit outputs. High-impedance mode considers situations where an output may exhibit tri-state behavior and its associated logic value may be invalid. The correlating tri-state variable name must be listed after the "output" type in the ioCSV file')
     clArgs = parser.parse_args()
 
-    satVerify(clArgs.plEncryptedFile,clArgs.plFunctionFile,clArgs.ioCSV,clArgs.keyValueCSV,clArgs.fresh,clArgs.quiet,clArgs.tristate)
+    satVerify(clArgs.plEncryptedFile,clArgs.plFunctionFile,clArgs.ioCSV,clArgs.keyValueCSV,clArgs.fresh,clArgs.quiet,clArgs.tristate,clArgs.simPatterns,clArgs.backend,clArgs.portfolio,clArgs.cubeDepth,clArgs.problemFormat)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+'''
+Persistent Z3 solver session for iterative SAT tools. Rather than regenerating and re-importing a
+Z3 Python script every round, a session keeps one Z3 Solver alive and only adds the clauses that
+are new since the last check. Learned clauses are retained between rounds.
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import logging
+from typing import Tuple
+import z3
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+z3Namespace = vars(z3)          # Clause strings are evaluated against the Z3 Python API
+z3Constructors = {'Bool':z3.Bool,'Int':z3.Int}
+
+
+# -------------------------------------------------------------------------------------------------
+# Classes
+# -------------------------------------------------------------------------------------------------
+class SolverSession:
+    '''
+    Incremental Z3 solving session built from PL variable declarations and clause strings, using
+    the same formats returned by readZ3pl.
+
+    z3Vars      - Dict of variable names and their Z3 objects declared so far
+    plVars      - Dict of variable names and their (varType,varArgs) tuples declared so far
+    plClauses   - List of every clause string added to the session, in order
+    '''
+    def __init__(self,name=''):
+        '''
+        Constructor for SolverSession. Creates an empty Z3 Solver.
+
+        name    - Name used when logging information about this session
+        '''
+        self.name = name
+        self.solver = z3.Solver()
+        self.z3Vars = {}
+        self.plVars = {}
+        self.plClauses = []
+
+
+    def declare(self,plVars:dict) -> None:
+        '''
+        Declare PL variables within the session. Variables that were already declared are skipped.
+
+        plVars  - Dict of variables and their (varType,varArgs) tuples, as returned by readZ3pl
+        '''
+        for var,varAtts in plVars.items():
+            if var in self.z3Vars:
+                continue
+            if varAtts[1] is None and varAtts[0] in z3Constructors:
+                self.z3Vars[var] = z3Constructors[varAtts[0]](var)
+            elif varAtts[1] is None:
+                self.z3Vars[var] = eval(f"{varAtts[0]}('{var}')",z3Namespace)
+            else:
+                self.z3Vars[var] = eval(f"{varAtts[0]}('{var}'{varAtts[1]})",z3Namespace)
+            self.plVars[var] = varAtts
+
+
+    def add(self,plClauses:list) -> None:
+        '''
+        Add PL clause strings to the solver. All variables within the clauses must be declared first.
+
+        plClauses   - List of clause strings written with the Z3 Python API
+        '''
+        for clause in plClauses:
+            try:
+                self.solver.add(eval(clause,z3Namespace,self.z3Vars))
+            except NameError as err:
+                logging.error(f'Clause "{clause}" added to solver session "{self.name}" uses an undeclared variable: {err}')
+                raise RuntimeError(f'Undeclared variable in solver session "{self.name}". See log for details.')
+        self.plClauses.extend(plClauses)
+
+
+    def addCopy(self,plCircuit,nodes:list,names:list,plClauses:list) -> None:
+        '''
+        Add a copy of a parsed PL circuit to the solver, as one conjunction of its clauses. The copy is
+        instantiated from the circuit's Z3 expressions by substitution (see PLCircuit.z3Copy) rather than
+        evaluated from its clause strings. All variables of the copy must be declared first.
+
+        plCircuit   - PLCircuit the copy is made from
+        nodes       - List of the copy's clause expression trees, in plCircuit's symbol numbers
+        names       - List of the copy's variable names, indexed by symbol number
+        plClauses   - List of the copy's clause strings, kept in plClauses
+        '''
+        self.solver.add(plCircuit.z3Copy(nodes,names,self.z3Vars))
+        self.plClauses.extend(plClauses)
+
+
+    def push(self) -> None:
+        self.solver.push()
+
+
+    def pop(self) -> None:
+        self.solver.pop()
+
+
+    def check(self,voi=[]) -> Tuple[bool,dict]:
+        '''
+        Run the solver on all clauses added so far. Returns True if the solver returns SAT, along with
+        a dict of values for the variables of interest. Mirrors the return values of runZ3.
+
+        voi     - "Variables of interest": a list of all variable names you desire to be returned. If
+                    left blank, all variables in the model are returned
+        '''
+        if self.solver.check() != z3.sat:
+            return False,None
+
+        model = self.solver.model()
+        if voi != []:
+            voiVals = {}
+            for var in sorted(set(voi).intersection(self.z3Vars.keys())):
+                voiVals[var] = valueOf(model.eval(self.z3Vars[var],model_completion=True))
+        else:
+            voiVals = dict(sorted({str(d): valueOf(model[d]) for d in model}.items()))
+
+        return True,voiVals
+
+
+    def statistics(self) -> dict:
+        '''
+        Return the size of the session and the statistics of the last Z3 check (conflicts, decisions,
+        memory, ...) as a dict.
+        '''
+        stats = self.solver.statistics()
+        return {'vars':len(self.z3Vars),'clauses':len(self.plClauses)} | {key: stats.get_key_value(key) for key in stats.keys()}
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def valueOf(z3Val):
+    '''
+    Convert an interpreted Z3 value to a Python bool or int.
+    '''
+    try:
+        return bool(z3Val)
+    except:
+        return z3Val.as_long()
@@ -11,6 +11,8 @@ import logging
 import copy
 from typing import Tuple
 from collections import deque
+from .plCircuit import PLCircuit
+from .plReader import readZ3pl
 
 # -------------------------------------------------------------------------------------------------
 # Globals
@@ -183,7 +185,7 @@ class NetlistGraph:
                 if (y not in visited.keys()) and (y in subGraph):                                   # If net 'y' has not been visited...
                     visited[y] = trail+[y]
                     queue.append(y)                 # Insert on right of FIFO
-                elif (y in visited.keys()) and (y in subGraph) and (y not in prohibitedRevisits):   # Revisited net 'y' indicates a cycle
+                elif (y in trail) and (y in subGraph) and (y not in prohibitedRevisits):            # Revisited net 'y' on the trail to 'x' indicates a cycle (a net visited from another branch does not)
                     prohibitedRevisits.extend([x for x in trail if x not in prohibitedRevisits])
                     cycle = [y]                     # Initialize cycle
                     stack = trail                   # Initialize stack
@@ -261,40 +263,6 @@ def setup(plLogicFile,fresh=False,debug=False):
     logging.warning('Code does not currently support cross-checking I/O names found in text lists against netlist files. Please check manually.')
 
 
-def readZ3pl(trgtZ3:str) -> Tuple[dict,list]:
-    '''
-    Read a Python Z3 script and parse the variable and function declarations, leaving out any 
-    comment lines or Z3 Solver information. Returns dict of variables and their corresponding
-    arguments, and a string of functions.
-
-    varsDict values are a tuple. varsDict[key][0] = varType, varsDict[key][1] = varArgs
-    '''
-    varsDict = {}
-    funList = []
-    with open(trgtZ3,'r') as f:
-        f.seek(0)
-        lines = f.readlines()
-
-    # Search for variables
-    for line in lines:
-        mtchObj = re.match(r'^\s*(?P<varID>\w+)\s*=\s*(?P<varType>(Bool)|(Int)|(BitVec))\([\',\"](?P<varName>\w+)[\',\"](?P<varArgs>\s*,.*)?\).*$',line)
-        if mtchObj:
-            if (mtchObj.group('varID') != mtchObj.group('varName')):
-                logging.error(f'Variable {mtchObj.group("varName")} is given a different identifier ("{mtchObj.group("varID")}") in the source Z3 Python script "{trgtZ3}". Change this so they are identical.')
-                raise RuntimeError(f'Variable mismatch name in "{trgtZ3}". See log file for details.')
-            else:
-                varsDict[mtchObj.group('varID')] = (mtchObj.group('varType'),mtchObj.group('varArgs'))
-
-    # Search for functions (logic clauses)
-    for line in lines:
-        mtchObj = re.match(r'^\s*(?P<funID>\w+)\s*=\s*(?P<fun>[^\'\"]+\)).*',line)     # Future work: there's gotta be a better RE to exclude "Solver"
-        if mtchObj:
-            if mtchObj.group('fun') != 'Solver()':
-                funList.append(mtchObj.group('fun'))
-
-    return varsDict,funList
-
-
 def writeZ3pl(z3Vars:dict,z3Lines:list,z3Fn:str,append=False,prnt=False) -> int:
     '''
     Writes or appends a Python Z3 script from a provided list of lines. If append is true, then
@@ -351,43 +319,6 @@ def m2dict(model:z3.Model) -> dict:
     return z3Dict
 
 
-def copyCircuit(plClauses:list,allVars:dict,inList:list,keyList:list,outList:list,suffix='',modIns=True,modKeys=True,modOuts=True,modNets=True) -> Tuple[dict,list]:
-    '''
-    Create a copy of some lines of PL clauses, and modify the end suffixes of variables. If using
-    this function multiple times on the same plClauses, be sure that you modify the nets in the 
-    FIRST copy step, then set modNets=False for the rest of the calls. Returns modified list of 
-    clauses and a new dictionary of all variables in the copy.
-
-    plClauses       - List containing lines of a PL file
-    allVars         - Dict of all variables in plClauses and their corresponding Z3 type (e.g., 'Bool', etc.)
-    inList          - List containing names of each input variable
-    keyList         - List containing names of each key input variable
-    outList         - List containing names of each output variable
-    suffix          - String containing suffix to be appended to 
-    '''
-    # Compile list of variables to be copied with new names
-    changeList = {}
-    if modIns:
-        changeList = changeList | {k: allVars[k] for k in set(inList).intersection(allVars.keys())}
-    if modOuts:
-        changeList = changeList | {k: allVars[k] for k in set(outList).intersection(allVars.keys())}
-    if modKeys:
-        changeList = changeList | {k: allVars[k] for k in set(keyList).intersection(allVars.keys())}
-    if modNets:
-        netsList = [x for x in allVars if x not in (inList+outList+keyList)]
-        changeList = changeList | {k: allVars[k] for k in set(netsList).intersection(allVars.keys())}
-
-    # Create variable and clause copies
-    clauses = plClauses
-    clauseVars = {k:v for k,v in allVars.items() if k not in changeList}
-    for var in changeList.keys():
-        newVar = var+suffix
-        clauses = [re.sub(r'\b{}\b'.format(var),newVar,i) for i in clauses]
-        clauseVars = clauseVars | {newVar: allVars[var]}
-
-    return clauses,clauseVars
-
-
 def parseIO(ioCSV,plLogicFile,hiZ=False) -> Tuple[list,list,list,dict]:
     '''
     Extract I/O from CSV file
@@ -436,14 +367,14 @@ def buildStateFinder(trgtPL:str,inVars:list,keyVars:list,outVars:list,miterFile:
     '''
     # Read in PL
     plVars,plClauses = readZ3pl(trgtPL)
+    plCircuit = PLCircuit(plVars,plClauses,name=trgtPL)
 
     # Create two copies of one circuit with identical inputs
     miterVars = {}
     miterClauses = []
     for i in range(1,3):
-        copy,copyVars = copyCircuit(plClauses,plVars,inVars,keyVars,outVars,suffix=f'{mSuff}{i}',modIns=False,modKeys=False)
-        #copy,copyVars = copyCircuit(copy,copyVars,inVars,keyVars,outVars,suffix=f'_{i}',modIns=False,modOuts=False,modNets=False)  # This "recopy" step creates unique keys
-        miterVars = miterVars | {k:v for k,v in copyVars.items() if k not in miterClauses}
+        copy,copyVars = plCircuit.copy(inVars,keyVars,outVars,outSuff=f'{mSuff}{i}',netSuff=f'{mSuff}{i}')
+        miterVars = miterVars | copyVars
         miterClauses.extend(copy)
 
     # Make the miter comparator
@@ -521,6 +452,7 @@ def stateLocate(plLogicFile:str,ioCSV:str,fresh=False,debug=False,highImpedance=
     # Run miter file, extract variable results
     sat,varAssigns = runZ3(miterName)
     stateNets = []
+    minCycles = graph.minimalCycles()
 
     while(sat):
 
@@ -533,9 +465,12 @@ def stateLocate(plLogicFile:str,ioCSV:str,fresh=False,debug=False,highImpedance=
 
         # Trace variables from diff List - tee-up and then DFS along nets that received conflicting assignments
         roundStateNets = []
-        for cycle in graph.minimalCycles().values():
+        for cycle in minCycles.values():
             if set(cycle).issubset(diffList):
                 roundStateNets.extend(cycle)
+        if len(roundStateNets) == 0:    # Freezing no net would leave the miter SAT forever
+            logging.warning(f'{len(diffList)} nets differ between the miter copies, but they contain no minimal cycle. The remaining discrepancy is not attributed to state-holding nets.')
+            break
 
         # Tie those outputs together - they must have the same value to prevent a discrepancy
         for net in roundStateNets:
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+'''
+Generator of synthetic benchmark circuits, for measuring how the attack tools scale with circuit size.
+Three kinds of circuits are generated, each with an I/O CSV and an oracle:
+    locked  - Random combinational circuit of 2-input gates, locked with XOR/XNOR key gates inserted
+              on randomly chosen nets. The locked circuit is written in Z3-PL and in structural Verilog
+              (for abcAttack), along with the correct key
+    trap    - TRAP fabric of a given number of rows and columns, from trapFabricBuilder, with a NAND2
+              gate pinned onto it
+    lut     - Island of LUTs from lutCRFabricBuilder, chained so that every LUT after the first takes
+              the previous LUT's output and one more primary input, computing the XOR of every input
+For every circuit, the oracle is written as a functional Z3-PL file (for pythonOracle and satVerify)
+and as a Verilog module (for iVerilog). Generated file names, for a circuit called <name>:
+    <name>.py, <name>_io.csv                    - Circuit to attack and its I/O CSV
+    <name>_fun.py, <name>_fun.v                 - Oracle, with top-level module <name>_fun
+    <name>Locked.v, <name>_key.csv              - Locked circuits only: Verilog and correct key
+
+Author:     Aric Fowler
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+import os
+import csv
+import random
+import argparse
+import importlib
+from .solverSession import SolverSession
+
+# -------------------------------------------------------------------------------------------------
+# Globals
+# -------------------------------------------------------------------------------------------------
+synthKinds = ['locked','trap','lut']
+defSynthDir = 'synth/'
+defKeyFraction = 0.1            # Key gates inserted per gate of a locked circuit
+maxDraws = 20                   # Random circuits drawn before giving up on one whose keys matter
+gateOps = ['and','or','nand','nor']*3 + ['xor','xnor']     # XOR-rich logic makes equivalence checking needlessly hard
+plGateTmplts = {'and':'And({0},{1})','or':'Or({0},{1})','nand':'Not(And({0},{1}))','nor':'Not(Or({0},{1}))',
+                'xor':'Xor({0},{1})','xnor':'Not(Xor({0},{1}))'}
+trapPinRows = [['a','L32_0_0','input'],['b','L41_0_0','input'],['o','L49_0_0','output']]    # NAND2 pins of the TRAP NAND2 test
+
+
+# -------------------------------------------------------------------------------------------------
+# Functions
+# -------------------------------------------------------------------------------------------------
+def writePL(plFile:str,title:str,sections:list,clauses:list) -> None:
+    '''
+    Write a Z3-PL file in the layout of the hand-written test circuits.
+
+    plFile      - Desired path and filename of the PL file
+    title       - Description placed in the file's docstring
+    sections    - List of (sectionName,varList) tuples of Bool variable declarations
+    clauses     - List of clause strings
+    '''
+    with open(plFile,'w') as f:
+        f.write(f"#!/usr/bin/env python3\n'''\n{title}\n\nGenerated by synthGen\n'''\nfrom z3 import *\n")
+        for sectionName,varList in sections:
+            f.write(f'\n# {sectionName}\n')
+            for var in varList:
+                f.write(f"{var} = Bool('{var}')\n")
+        f.write('\n# Circuit description (PL clauses)\n')
+        for i,clause in enumerate(clauses):
+            f.write(f'c{i+1} = {clause}\n')
+        f.write(f"\n# Add model to solver\ns = Solver()\ns.add({','.join([f'c{i+1}' for i in range(len(clauses))])})\n\nprint(s.check())\nprint(s.model())\n")
+
+
+def writeVerilog(vFile:str,modName:str,inList:list,outList:list,netList:list,gates:list,keyList=[]) -> None:
+    '''
+    Write a structural Verilog module of unnamed gate primitives, in the format read by abcAttack.
+
+    vFile       - Desired path and filename of the Verilog file
+    modName     - Name of the module
+    inList      - List of primary input names
+    outList     - List of output names
+    netList     - List of internal net names
+    gates       - List of (op,outNet,inNets) tuples
+    keyList     - List of key input names, declared on their own commented input line
+    '''
+    with open(vFile,'w') as f:
+        f.write(f'module {modName} ({",".join(inList+keyList+outList)});\n')
+        f.write(f'    input {",".join(inList)};\n')
+        if keyList:
+            f.write(f'    input {",".join(keyList)};      // Key inputs\n')
+        f.write(f'    output {",".join(outList)};\n\n')
+        if netList:
+            f.write(f'    wire {",".join(netList)};\n\n')
+        for op,outNet,inNets in gates:
+            f.write(f'    {op}({outNet},{",".join(inNets)});\n')
+        f.write('\nendmodule\n')
+
+
+def writeIO(ioCSV:str,inList:list,keyList:list,outList:list) -> None:
+    with open(ioCSV,'w',newline='') as f:
+        writer = csv.writer(f)
+        writer.writerows([[var,'input'] for var in inList] + [[var,'key'] for var in keyList] + [[var,'output'] for var in outList])
+
+
+def randomCircuit(rng:random.Random,numGates:int,numInputs:int,numOutputs:int) -> tuple:
+    '''
+    Generate a random combinational circuit of 2-input gates, in topological order. Every gate takes its
+    first input from the nets nothing reads yet, so all logic reaches an output; the remaining unread
+    nets are then combined pairwise until numOutputs are left. Returns the lists of inputs and outputs,
+    and the list of (op,outNet,inNets) gates.
+
+    rng         - Random generator
+    numGates    - Number of gates (a few more are added to merge unread nets)
+    numInputs   - Number of primary inputs
+    numOutputs  - Maximum number of outputs
+    '''
+    inList = [f'pi{i}' for i in range(numInputs)]
+    gates = []
+    unread = list(inList)
+    allNets = list(inList)
+    for i in range(numGates):
+        first = unread.pop(0) if unread else rng.choice(allNets)
+        second = first
+        while second == first:
+            second = rng.choice(allNets)
+        gates.append((rng.choice(gateOps),f'n{i}',[first,second]))
+        unread = [net for net in unread if net != second] + [f'n{i}']
+        allNets.append(f'n{i}')
+    while len(unread) > numOutputs:
+        first,second = unread.pop(0),unread.pop(0)
+        gates.append((rng.choice(gateOps),f'n{len(gates)}',[first,second]))
+        unread.append(f'n{len(gates)-1}')
+    outList = [f'po{i}' for i in range(len(unread))]
+    outNets = dict(zip(unread,outList))
+    gates = [(op,outNets.get(outNet,outNet),inNets) for op,outNet,inNets in gates]
+    return inList,outList,gates
+
+
+def lockCircuit(rng:random.Random,gates:list,numKeys:int) -> tuple:
+    '''
+    Insert XOR/XNOR key gates on randomly chosen gate outputs. The locked gate drives <net>_pre, and the
+    key gate drives the original net. A key gate is an XOR when the correct key bit is False, and an
+    XNOR when it is True. Returns the list of keys, a dict of the correct key, and the locked gates.
+
+    rng         - Random generator
+    gates       - List of (op,outNet,inNets) gates, as returned by randomCircuit
+    numKeys     - Number of key gates
+    '''
+    keyList = [f'k{i}' for i in range(min(numKeys,len(gates)))]
+    keyVals = {}
+    lockedNets = {}
+    for keyVar,net in zip(keyList,rng.sample([outNet for op,outNet,inNets in gates],len(keyList))):
+        keyVals[keyVar] = rng.choice([False,True])
+        lockedNets[net] = keyVar
+    lockedGates = []
+    for op,outNet,inNets in gates:
+        if outNet in lockedNets:
+            keyVar = lockedNets[outNet]
+            lockedGates.append((op,f'{outNet}_pre',inNets))
+            lockedGates.append(('xnor' if keyVals[keyVar] else 'xor',outNet,[f'{outNet}_pre',keyVar]))
+        else:
+            lockedGates.append((op,outNet,inNets))
+    return keyList,keyVals,lockedGates
+
+
+def plClauses(gates:list) -> list:
+    return [f'{outNet} == {plGateTmplts[op].format(*inNets)}' for op,outNet,inNets in gates]
+
+
+def keysMatter(lockedGates:list,inList:list,keyList:list,outList:list) -> bool:
+    '''
+    Check that some input pattern tells two keys of a locked circuit apart, i.e. that the first miter of
+    a SAT attack on it is satisfiable. Small random circuits can mask every key gate.
+    '''
+    session = SolverSession('keysMatter')
+    shared = set(inList)
+    for copyNum in (1,2):
+        rename = lambda net: net if net in shared else f'{net}_{copyNum}'
+        copyGates = [(op,rename(outNet),[rename(net) for net in inNets]) for op,outNet,inNets in lockedGates]
+        session.declare({net: ('Bool',None) for net in inList + [rename(var) for var in keyList] + [outNet for op,outNet,inNets in copyGates]})
+        session.add(plClauses(copyGates))
+    session.add([f'Or({",".join([f"Xor({var}_1,{var}_2)" for var in outList])})'])
+    return session.check()[0]
+
+
+def genLocked(numGates:int,outDir=defSynthDir,name=None,numInputs=None,numOutputs=None,numKeys=None,seed=None) -> dict:
+    '''
+    Generate a random combinational circuit locked with XOR/XNOR key gates (see randomCircuit and
+    lockCircuit). Circuits whose key gates are all masked are drawn again. Returns a dict of the
+    generated files, see synthGen.
+
+    numGates    - Number of gates of the unlocked circuit (a few more are added to merge unread nets)
+    outDir      - Directory the files are written to
+    name        - Base name of the files. Defaults to locked<numGates>
+    numInputs   - Number of primary inputs. Defaults to the square root of numGates (at least 2)
+    numOutputs  - Number of outputs. Defaults to half of numInputs (at least 1)
+    numKeys     - Number of key gates. Defaults to defKeyFraction of numGates (at least 1)
+    seed        - Seed of the random generator, for reproducible circuits
+    '''
+    name = name or f'locked{numGates}'
+    numInputs = numInputs or max(2,int(numGates**0.5))
+    numOutputs = numOutputs or max(1,numInputs//2)
+    numKeys = numKeys or max(1,round(defKeyFraction*numGates))
+    if numInputs > numGates:
+        raise RuntimeError(f'A locked circuit with {numGates} gates cannot read all of its {numInputs} inputs. Use more gates or fewer inputs.')
+    rng = random.Random(seed)
+    for attempt in range(maxDraws):
+        inList,outList,gates = randomCircuit(rng,numGates,numInputs,numOutputs)
+        keyList,keyVals,lockedGates = lockCircuit(rng,gates,numKeys)
+        if keysMatter(lockedGates,inList,keyList,outList):
+            break
+    else:
+        raise RuntimeError(f'Every key gate of {maxDraws} random circuits with {numGates} gates was masked. Use more gates or keys.')
+    outSet = set(outList)
+    netList = [outNet for op,outNet,inNets in gates if outNet not in outSet]
+    lockedNetList = [outNet for op,outNet,inNets in lockedGates if outNet not in outSet]
+
+    os.makedirs(outDir,exist_ok=True)
+    base = os.path.join(outDir,name)
+    writePL(f'{base}.py',f'Random combinational circuit locked with {len(keyList)} XOR/XNOR key gates',
+            [('Circuit inputs',inList),('Key inputs',keyList),('Circuit outputs',outList),('Circuit nets',lockedNetList)],plClauses(lockedGates))
+    writePL(f'{base}_fun.py',f'Unlocked functionality of {name}.py, used as the oracle and for satVerify',
+            [('Circuit inputs',inList),('Circuit outputs',outList),('Circuit nets',netList)],plClauses(gates))
+    writeVerilog(f'{base}Locked.v',f'{name}Locked',inList,outList,lockedNetList,lockedGates,keyList)
+    writeVerilog(f'{base}_fun.v',f'{name}_fun',inList,outList,netList,gates)
+    writeIO(f'{base}_io.csv',inList,keyList,outList)
+    with open(f'{base}_key.csv','w',newline='') as f:
+        csv.writer(f).writerows([[keyVar,keyVals[keyVar]] for keyVar in keyList])
+
+    return {'name':name,'pl':f'{base}.py','io':f'{base}_io.csv','funPL':f'{base}_fun.py','oracleV':f'{base}_fun.v','top':f'{name}_fun',
+            'lockedV':f'{base}Locked.v','key':f'{base}_key.csv','highImpedance':False}
+
+
+def genTrap(numRows:int,numCols:int,outDir=defSynthDir,name=None) -> dict:
+    '''
+    Generate a TRAP fabric with trapFabricBuilder, with the pins of a NAND2 gate placed on its first
+    unit. Returns a dict of the generated files, see synthGen.
+
+    numRows     - Number of rows of TRAP units
+    numCols     - Number of columns of TRAP units
+    outDir      - Directory the files are written to
+    name        - Base name of the files. Defaults to trap<numRows>x<numCols>
+    '''
+    name = name or f'trap{numRows}x{numCols}'
+    os.makedirs(outDir,exist_ok=True)
+    base = os.path.join(outDir,name)
+    with open(f'{base}_pins.csv','w',newline='') as f:
+        csv.writer(f).writerows(trapPinRows)
+    trapBuilder = importlib.import_module(f'{__package__}.trapFabricBuilder')
+    trapBuilder.trapFabricBuilder(numRows,numCols,f'{base}_pins.csv',outputFn=base)
+
+    writePL(f'{base}_fun.py',f'NAND2 gate programmed onto {name}.py, used as the oracle and for satVerify',
+            [('Circuit inputs',['a','b']),('Circuit outputs',['o'])],['o == Not(And(a,b))'])
+    writeVerilog(f'{base}_fun.v',f'{name}_fun',['a','b'],['o'],[],[('nand','o',['a','b'])])
+    return {'name':name,'pl':f'{base}.py','io':f'{base}_io.csv','funPL':f'{base}_fun.py','oracleV':f'{base}_fun.v','top':f'{name}_fun','highImpedance':True}
+
+
+def genLut(numLUTs:int,outDir=defSynthDir,name=None) -> dict:
+    '''
+    Generate a chain of LUTs with lutCRFabricBuilder. The first LUT takes two primary inputs, and every
+    following LUT takes the previous LUT's output and one more primary input. The oracle computes the
+    XOR of every input. Returns a dict of the generated files, see synthGen.
+
+    numLUTs     - Number of LUTs
+    outDir      - Directory the files are written to
+    name        - Base name of the files. Defaults to lut<numLUTs>
+    '''
+    name = name or f'lut{numLUTs}'
+    os.makedirs(outDir,exist_ok=True)
+    base = os.path.join(outDir,name)
+    inList = ['a','b'] + [f'x{i}' for i in range(1,numLUTs)]
+    pinRows = [['a','P1_0','input'],['b','P2_0','input']]
+    for i in range(1,numLUTs):
+        pinRows.extend([[f'P1_{i}',f'P5_{i-1}','route'],[f'x{i}',f'P2_{i}','input']])
+    pinRows.append(['o',f'P5_{numLUTs-1}','output'])
+    with open(f'{base}_pins.csv','w',newline='') as f:
+        csv.writer(f).writerows(pinRows)
+    lutBuilder = importlib.import_module(f'{__package__}.lutCRFabricBuilder')
+    lutBuilder.lutCRFabricBuilder(numLUTs,f'{base}_pins.csv',outputFn=base)
+
+    # XOR chain, with one gate per LUT after the first
+    gates = []
+    prevNet = 'a'
+    for i,var in enumerate(inList[1:]):
+        outNet = 'o' if i == len(inList)-2 else f'xor{i}'
+        gates.append(('xor',outNet,[prevNet,var]))
+        prevNet = outNet
+    netList = [outNet for op,outNet,inNets in gates if outNet != 'o']
+    writePL(f'{base}_fun.py',f'XOR of every input, as programmed onto {name}.py. Used as the oracle and for satVerify',
+            [('Circuit inputs',inList),('Circuit outputs',['o']),('Circuit nets',netList)],[f'{outNet} == Xor({inNets[0]},{inNets[1]})' for op,outNet,inNets in gates])
+    writeVerilog(f'{base}_fun.v',f'{name}_fun',inList,['o'],netList,gates)
+    return {'name':name,'pl':f'{base}.py','io':f'{base}_io.csv','funPL':f'{base}_fun.py','oracleV':f'{base}_fun.v','top':f'{name}_fun','highImpedance':False}
+
+
+def parseSizes(sizes:str) -> list:
+    '''
+    Parse a comma-separated list of circuit sizes, e.g. "1x1,1x2" for TRAP fabrics or "2,4,8" for LUT
+    fabrics and locked circuits. An empty string gives no sizes.
+    '''
+    if sizes == '':
+        return []
+    return [tuple(int(dim) for dim in size.split('x')) if 'x' in size else int(size) for size in sizes.split(',')]
+
+
+def synthGen(kind:str,sizes:list,outDir=defSynthDir,seed=None,numInputs=None,numOutputs=None,numKeys=None) -> list:
+    '''
+    Generate synthetic circuits of one kind, for a list of sizes. Returns a list of dicts, one per
+    circuit, with its name and the paths of its files: "pl" and "io" (circuit to attack), "funPL",
+    "oracleV" and "top" (oracle), "highImpedance" (whether the attack and verification need tri-state
+    mode), and for locked circuits "lockedV" and "key".
+
+    kind        - "locked", "trap" or "lut"
+    sizes       - List of sizes: gate counts of locked circuits, (rows,columns) of TRAP fabrics, or LUT counts
+    outDir      - Directory the files are written to
+    seed        - Seed of the random generator of locked circuits. Each size gets its own seed derived from it
+    numInputs   - Number of primary inputs of locked circuits. See genLocked for the default
+    numOutputs  - Number of outputs of locked circuits. See genLocked for the default
+    numKeys     - Number of key gates of locked circuits. See genLocked for the default
+    '''
+    if kind not in synthKinds:
+        raise RuntimeError(f'Unrecognized synthetic circuit kind "{kind}". Expected one of: {", ".join(synthKinds)}')
+    circuits = []
+    for size in sizes:
+        if kind == 'locked':
+            circuits.append(genLocked(size,outDir,numInputs=numInputs,numOutputs=numOutputs,numKeys=numKeys,seed=None if seed is None else seed+size))
+        elif kind == 'trap':
+            circuits.append(genTrap(*size,outDir))
+        else:
+            circuits.append(genLut(size,outDir))
+    return circuits
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='synthGen',description='Generate synthetic locked circuits, TRAP fabrics and LUT islands of increasing size, with oracles and I/O CSVs, for benchmarking the attack tools')
+    parser.add_argument('kind',type=str,choices=synthKinds,help='Kind of circuit: random XOR/XNOR-locked combinational circuits, TRAP fabrics, or LUT islands')
+    parser.add_argument('sizes',type=str,help='Comma-separated sizes: gate counts of locked circuits (e.g. "10,100,1000"), rows x columns of TRAP fabrics (e.g. "1x1,1x2,2x2"), or LUT counts (e.g. "2,4,8")')
+    parser.add_argument('-i','--inputs',type=int,default=None,help='Number of primary inputs of locked circuits. Defaults to the square root of the gate count')
+    parser.add_argument('-k','--keys',type=int,default=None,help=f'Number of key gates of locked circuits. Defaults to {defKeyFraction} of the gate count')
+    parser.add_argument('-o','--outDir',type=str,default=defSynthDir,help='Directory the generated files are written to')
+    parser.add_argument('-p','--outputs',type=int,default=None,help='Number of outputs of locked circuits. Defaults to half the number of inputs')
+    parser.add_argument('-s','--seed',type=int,default=None,help='Seed of the random generator, for reproducible locked circuits')
+    clArgs = parser.parse_args()
+
+    synthGen(clArgs.kind,parseSizes(clArgs.sizes),clArgs.outDir,clArgs.seed,clArgs.inputs,clArgs.outputs,clArgs.keys)
@@ -0,0 +1,23 @@
+'''
+Command-line interface for synthGen.py
+
+Author:     Aric Fowler
+'''
+import argparse
+from .synthGen import synthGen,parseSizes,synthKinds,defKeyFraction,defSynthDir
+
+def main():
+    parser = argparse.ArgumentParser(prog='synthGen',description='Generate synthetic locked circuits, TRAP fabrics and LUT islands of increasing size, with oracles and I/O CSVs, for benchmarking the attack tools')
+    parser.add_argument('kind',type=str,choices=synthKinds,help='Kind of circuit: random XOR/XNOR-locked combinational circuits, TRAP fabrics, or LUT islands')
+    parser.add_argument('sizes',type=str,help='Comma-separated sizes: gate counts of locked circuits (e.g. "10,100,1000"), rows x columns of TRAP fabrics (e.g. "1x1,1x2,2x2"), or LUT counts (e.g. "2,4,8")')
+    parser.add_argument('-i','--inputs',type=int,default=None,help='Number of primary inputs of locked circuits. Defaults to the square root of the gate count')
+    parser.add_argument('-k','--keys',type=int,default=None,help=f'Number of key gates of locked circuits. Defaults to {defKeyFraction} of the gate count')
+    parser.add_argument('-o','--outDir',type=str,default=defSynthDir,help='Directory the generated files are written to')
+    parser.add_argument('-p','--outputs',type=int,default=None,help='Number of outputs of locked circuits. Defaults to half the number of inputs')
+    parser.add_argument('-s','--seed',type=int,default=None,help='Seed of the random generator, for reproducible locked circuits')
+    clArgs = parser.parse_args()
+
+    synthGen(clArgs.kind,parseSizes(clArgs.sizes),clArgs.outDir,clArgs.seed,clArgs.inputs,clArgs.outputs,clArgs.keys)
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,12 @@
+#!/bin/bash
+
+# Runs a SAT attack that also writes its final miter and DIP circuits in SMT-LIB2, then verifies the key on a
+# verification miter written and loaded in SMT-LIB2
+satAttack -f -F smt2 -p lutWithLogic.py io.csv oracle.py oracle
+ls work/miter.smt2 work/dipCircuits.smt2 || exit 1
+satVerify -F smt2 lutWithLogic.py oracle.py io.csv work/extracted_key.csv
+
+# The same in ASCII AIGER, with the verification miter solved by pysat
+satAttack -f -F aag -p lutWithLogic.py io.csv oracle.py oracle
+ls work/miter.aag work/dipCircuits.aag || exit 1
+satVerify -F aag -b pysat lutWithLogic.py oracle.py io.csv work/extracted_key.csv
@@ -0,0 +1,9 @@
+#!/bin/bash
+
+# Runs a SAT attack on pysat's default incremental solver (CaDiCaL) instead of Z3, and verifies the key with it
+satAttack -f -b pysat -p lutWithLogic.py io.csv oracle.py oracle
+satVerify -b pysat lutWithLogic.py oracle.py io.csv work/extracted_key.csv
+
+# The same attack on Glucose, with the key verified by Z3
+satAttack -f -b pysat:glucose4 -p lutWithLogic.py io.csv oracle.py oracle
+satVerify lutWithLogic.py oracle.py io.csv work/extracted_key.csv
@@ -0,0 +1,17 @@
+#!/bin/bash
+
+# Runs a SAT attack that keeps its running miter file (work/miter.pls) up to date every round
+satAttack -f -w -p lutWithLogic.py io.csv oracle.py oracle
+
+# Simulates an attack interrupted after two rounds: only the base miter and the circuit copies of the first
+# two DIPs are kept. The interrupted miter has no index yet, so recovery rebuilds it from the segment headers
+awk '/^# segment /{n++} n<=3' work/miter.pls > work/interruptedMiter.pls
+
+# Recovers the attack from the interrupted miter. New circuit copies must be numbered after the recovered ones
+satAttack -w -r work/interruptedMiter.pls -p lutWithLogic.py io.csv oracle.py oracle
+if grep '^# segment' work/interruptedMiter.pls | sort | uniq -d | grep -q .; then
+    echo 'Recovered attack reused the name of a circuit copy:'
+    grep '^# segment' work/interruptedMiter.pls
+    exit 1
+fi
+satVerify lutWithLogic.py oracle.py io.csv work/extracted_key.csv
@@ -0,0 +1,15 @@
+#!/bin/bash
+
+# Runs a SAT attack, which writes a checkpoint of its DIPs and oracle outputs every round (work/checkpoint.npz)
+satAttack -f -p lutWithLogic.py io.csv oracle.py oracle
+
+# Resumes the attack from its last checkpoint: the constraints of every checkpointed DIP are rebuilt without
+# solving, and the attack continues at the next round
+satAttack -k work/checkpoint.npz -p lutWithLogic.py io.csv oracle.py oracle
+satVerify lutWithLogic.py oracle.py io.csv work/extracted_key.csv
+
+# A checkpoint cannot be resumed with different key pruning settings
+if satAttack -q -x -k work/checkpoint.npz -p lutWithLogic.py io.csv oracle.py oracle; then
+    echo 'Checkpoint was resumed with key pruning, although it was written without'
+    exit 1
+fi
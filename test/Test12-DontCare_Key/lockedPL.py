@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+'''
+Locked circuit with a don't-care key: k1 only drives a dangling net, so it cannot change the outputs,
+but it still has to appear in the extracted key.
+
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+from z3 import *
+
+# Circuit inputs
+a = Bool('a')
+b = Bool('b')
+
+# Key inputs
+k0 = Bool('k0')
+k1 = Bool('k1')
+
+# Circuit outputs
+o = Bool('o')
+p = Bool('p')
+
+# Circuit nets
+n1 = Bool('n1')
+
+# Circuit description (PL clauses)
+c1 = o == Xor(a,k0)
+c2 = n1 == And(b,k1)
+c3 = p == Or(a,b)
+
+# Add model to solver
+s = Solver()
+s.add(c1,c2,c3)
+
+print(s.check())
+print(s.model())
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+'''
+Propositional logic clauses describing the unlocked circuit, for satVerify and the Python oracle.
+
+Python:     3.10.12
+Updated:    Oct 2026
+'''
+from z3 import *
+
+# Circuit inputs
+a = Bool('a')
+b = Bool('b')
+
+# Circuit outputs
+o = Bool('o')
+p = Bool('p')
+
+# Circuit description (PL clauses)
+c1 = o == Not(a)
+c2 = p == Or(a,b)
+
+# Add model to solver
+s = Solver()
+s.add(c1,c2)
+
+print(s.check())
+print(s.model())
@@ -0,0 +1,7 @@
+module oracle (a,b,o,p);
+    input a,b;
+    output o,p;
+
+    not(o,a);
+    or(p,a,b);
+endmodule
@@ -0,0 +1,9 @@
+#!/bin/bash
+
+# Runs a SAT attack on a circuit with a don't-care key, which must still be part of the extracted key
+satAttack -f lockedPL.py io.csv oracle.v oracle
+satVerify lockedPL.py oracle.py io.csv work/extracted_key.csv
+
+# The same attack with cube-and-conquer on the key solve, which may pick the don't-care key to split on
+satAttack -f -u 2 lockedPL.py io.csv oracle.v oracle
+satVerify lockedPL.py oracle.py io.csv work/extracted_key.csv